@@ -0,0 +1,128 @@
+"""
+Batch simulation of many input vectors through the same netlist.
+
+The pins of the batch are checked once, after which the vectors are packed into
+bitsliced lanes chunk by chunk and every chunk is evaluated in a single pass over the netlist.
+"""
+from schematic_types import *
+from netlist import Netlist
+from bitslice import pack_column, simulate_netlist_bitsliced, unpack_lane
+
+from itertools import islice
+from operator import itemgetter
+from typing import Iterable, Iterator, Mapping, Sequence
+
+# A batch of input signals, either as one dict per vector or as one sequence per input pin.
+InputBatch = Iterable[Mapping[OutputPinId, bool]] | Mapping[OutputPinId, Sequence[bool]]
+
+
+def check_batch_pins(
+    netlist: Netlist, pins: Iterable[PinId], index: int | None = None
+) -> None:
+    """
+    Verify that a vector or column mapping provides exactly the input pins of a netlist.
+    """
+    provided = set(pins)
+    expected = set(netlist.input_pins)
+    if provided == expected:
+        return
+
+    where = f" in input vector {index}" if index is not None else ""
+    extra = sorted(provided - expected)
+    if extra:
+        raise Exception(
+            f"Input signal {extra[0]}{where} is not defined on schematic {netlist.schematic_id}"
+        )
+    missing = sorted(expected - provided)
+    raise Exception(
+        f"Input signal {missing[0]}{where} is not provided for schematic {netlist.schematic_id}"
+    )
+
+
+def iter_vector_chunks(
+    netlist: Netlist,
+    input_vectors: Iterable[Mapping[OutputPinId, bool]],
+    chunk_rows: int,
+) -> Iterator[tuple[list[int], int]]:
+    """
+    Pack input vectors into lanes, chunk_rows vectors at a time.
+    Yields one packed int per input pin and the number of vectors in the chunk.
+    """
+    input_count = len(netlist.input_pins)
+    pin_getters = [itemgetter(pin) for pin in netlist.input_pins]
+
+    vectors = iter(input_vectors)
+    first_index = 0
+    while True:
+        chunk = list(islice(vectors, chunk_rows))
+        if not chunk:
+            return
+
+        # Gather each column with C level calls only. Building a tuple per vector
+        # instead would allocate millions of objects for the garbage collector to track.
+        try:
+            input_lanes = [pack_column(map(getter, chunk)) for getter in pin_getters]
+            # Vectors of the right size with every expected pin have exactly the expected pins.
+            valid = set(map(len, chunk)) == {input_count}
+
+        except KeyError:
+            valid = False
+
+        if not valid:
+            for index, input_signals in enumerate(chunk):
+                check_batch_pins(netlist, input_signals, first_index + index)
+
+        yield input_lanes, len(chunk)
+        first_index += len(chunk)
+
+
+def iter_column_chunks(
+    netlist: Netlist,
+    input_columns: Mapping[OutputPinId, Sequence[bool]],
+    chunk_rows: int,
+) -> Iterator[tuple[list[int], int]]:
+    """
+    Pack columns of input signals into lanes, chunk_rows rows at a time.
+    """
+    check_batch_pins(netlist, input_columns)
+
+    row_counts = set(len(input_columns[pin]) for pin in netlist.input_pins)  # type: ignore
+    if len(row_counts) > 1:
+        raise Exception(
+            f"Input columns for {netlist.schematic_id} have different lengths."
+        )
+    row_count = row_counts.pop() if row_counts else 0
+
+    for first_row in range(0, row_count, chunk_rows):
+        last_row = min(first_row + chunk_rows, row_count)
+        yield [
+            pack_column(input_columns[pin][first_row:last_row])  # type: ignore
+            for pin in netlist.input_pins
+        ], last_row - first_row
+
+
+def simulate_netlist_batch(
+    netlist: Netlist, input_batch: InputBatch, chunk_rows: int
+) -> dict[InputPinId, list[bool]]:
+    """
+    Simulate a netlist over a batch of input vectors.
+    Returns one list of signals per output pin, in the order of the vectors.
+    """
+    if chunk_rows <= 0:
+        raise Exception(f"Batch chunk size must be positive: {chunk_rows}")
+
+    if isinstance(input_batch, Mapping):
+        chunks = iter_column_chunks(netlist, input_batch, chunk_rows)
+    else:
+        chunks = iter_vector_chunks(netlist, input_batch, chunk_rows)
+
+    output_columns: list[list[bool]] = [[] for _ in netlist.output_pins]
+    for input_lanes, lane_count in chunks:
+        output_lanes = simulate_netlist_bitsliced(netlist, input_lanes, lane_count)
+        for column, lane in zip(output_columns, output_lanes):
+            column.extend(unpack_lane(lane, lane_count))
+
+    return {
+        InputPinId(pin): column
+        for pin, column in zip(netlist.output_pins, output_columns)
+    }
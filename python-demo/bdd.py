@@ -0,0 +1,391 @@
+"""
+Reduced ordered binary decision diagrams (ROBDDs) for symbolic analysis of schematics.
+
+Every boolean function over the input pins has exactly one node in a BDDManager,
+so two schematics are equivalent exactly when their outputs share the same nodes.
+"""
+from __future__ import annotations
+
+from schematic_types import *
+from schematic import Schematic
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable
+import re
+
+if TYPE_CHECKING:
+    from schematic_library import SchematicLibrary
+
+
+FALSE = 0
+TRUE = 1
+
+# The boolean operators supported by BDDManager.apply. All of them are commutative.
+OPERATORS: dict[str, Callable[[bool, bool], bool]] = {
+    "and": lambda a, b: a and b,
+    "or": lambda a, b: a or b,
+    "xor": lambda a, b: a != b,
+    "nand": lambda a, b: not (a and b),
+}
+
+# The bit index at the end of a pin name, either a3 or the bus bit pin a[3].
+BIT_INDEX_PATTERN = re.compile(r"\[?(\d+)\]?$")
+
+
+class BDDManager:
+    """
+    Stores the nodes of a set of BDDs over a fixed number of ordered variables.
+
+    Nodes are integers. 0 and 1 are the FALSE and TRUE terminals.
+    The unique table guarantees that every node is reduced and shared,
+    and the computed table caches the results of apply.
+    """
+
+    def __init__(self, variable_count: int):
+        self.variable_count = variable_count
+
+        # The variable level, low child and high child of every node.
+        # Terminals sit below the last variable.
+        self.levels: list[int] = [variable_count, variable_count]
+        self.lows: list[int] = [FALSE, TRUE]
+        self.highs: list[int] = [FALSE, TRUE]
+
+        self.unique_table: dict[tuple[int, int, int], int] = {}
+        self.computed_table: dict[tuple[str, int, int], int] = {}
+
+    @property
+    def node_count(self) -> int:
+        return len(self.levels)
+
+    def make_node(self, level: int, low: int, high: int) -> int:
+        if low == high:
+            return low
+
+        key = (level, low, high)
+        node = self.unique_table.get(key)
+        if node is None:
+            node = len(self.levels)
+            self.levels.append(level)
+            self.lows.append(low)
+            self.highs.append(high)
+            self.unique_table[key] = node
+        return node
+
+    def variable(self, level: int) -> int:
+        if not 0 <= level < self.variable_count:
+            raise Exception(f"BDD variable {level} is out of range.")
+        return self.make_node(level, FALSE, TRUE)
+
+    def apply(self, operator: str, a: int, b: int) -> int:
+        """
+        Combine two nodes with a boolean operator.
+        """
+        if a <= TRUE and b <= TRUE:
+            return TRUE if OPERATORS[operator](a == TRUE, b == TRUE) else FALSE
+
+        # All operators are commutative, so normalize the cache key.
+        if b < a:
+            a, b = b, a
+
+        key = (operator, a, b)
+        result = self.computed_table.get(key)
+        if result is not None:
+            return result
+
+        level_a = self.levels[a]
+        level_b = self.levels[b]
+        level = min(level_a, level_b)
+        a_low, a_high = (self.lows[a], self.highs[a]) if level_a == level else (a, a)
+        b_low, b_high = (self.lows[b], self.highs[b]) if level_b == level else (b, b)
+
+        result = self.make_node(
+            level,
+            self.apply(operator, a_low, b_low),
+            self.apply(operator, a_high, b_high),
+        )
+        self.computed_table[key] = result
+        return result
+
+    def nand(self, a: int, b: int) -> int:
+        # Shortcuts for the cases gates produce all the time.
+        if a == FALSE or b == FALSE:
+            return TRUE
+        if a == TRUE and b == TRUE:
+            return FALSE
+        return self.apply("nand", a, b)
+
+    def negate(self, a: int) -> int:
+        return self.apply("xor", a, TRUE)
+
+    def evaluate(self, node: int, assignment: list[bool]) -> bool:
+        """
+        Evaluate a node for one assignment of every variable.
+        """
+        while node > TRUE:
+            node = (
+                self.highs[node] if assignment[self.levels[node]] else self.lows[node]
+            )
+        return node == TRUE
+
+    def satisfy_count(self, node: int) -> int:
+        """
+        Count the assignments of all the variables for which the node is true.
+        """
+        counts: dict[int, int] = {FALSE: 0, TRUE: 1}
+
+        # Visit children before parents without recursing.
+        stack = [node]
+        while stack:
+            current = stack[-1]
+            if current in counts:
+                stack.pop()
+                continue
+
+            low, high = self.lows[current], self.highs[current]
+            pending = [child for child in (low, high) if child not in counts]
+            if pending:
+                stack.extend(pending)
+                continue
+
+            stack.pop()
+            level = self.levels[current]
+            counts[current] = (counts[low] << (self.levels[low] - level - 1)) + (
+                counts[high] << (self.levels[high] - level - 1)
+            )
+
+        return counts[node] << self.levels[node]
+
+    def satisfying_assignment(self, node: int) -> list[bool] | None:
+        """
+        Find one assignment of the variables for which the node is true.
+        Variables the node does not depend on are set to False.
+        """
+        if node == FALSE:
+            return None
+
+        assignment = [False] * self.variable_count
+        while node > TRUE:
+            # Every non terminal node of a reduced BDD can reach TRUE, so prefer any branch that is not FALSE.
+            if self.lows[node] != FALSE:
+                node = self.lows[node]
+            else:
+                assignment[self.levels[node]] = True
+                node = self.highs[node]
+        return assignment
+
+
+@dataclass
+class SchematicBDD:
+    """
+    The output functions of a schematic as nodes of a BDD manager.
+    """
+
+    manager: BDDManager
+
+    # The input pin assigned to each variable level.
+    variable_order: list[PinId]
+
+    output_nodes: dict[InputPinId, int]
+
+
+def default_variable_order(input_pins: set[PinId]) -> list[PinId]:
+    """
+    Order pins by their bit index and then by name, so a0, b0, a1, b1, ... are interleaved.
+    The index is read from the end of the name, as in a3, or from a bus bit pin, as in a[3].
+    Interleaving the bits of word operands keeps the BDDs of arithmetic circuits small.
+    """
+
+    def key(pin: PinId) -> tuple[int, str]:
+        match = BIT_INDEX_PATTERN.search(pin)
+        if match is None:
+            return (-1, pin)
+        return (int(match.group(1)), pin[: match.start()])
+
+    return sorted(input_pins, key=key)
+
+
+def component_order(schematic: Schematic) -> list[SchematicComponentId]:
+    """
+    Sort the components of a schematic so every component comes after the components driving it.
+    """
+    pending_inputs: dict[SchematicComponentId, int] = {}
+    dependants: dict[SchematicComponentId, list[SchematicComponentId]] = {}
+    for component_id in schematic.components:
+        drivers = set(
+            connection.source.component
+            for connection in schematic.get_input_connections_for_component(
+                component_id
+            )
+            if not isinstance(connection.source.component, SchematicInput)
+        )
+        pending_inputs[component_id] = len(drivers)
+        for driver in drivers:
+            dependants.setdefault(driver, []).append(component_id)  # type: ignore
+
+    ready = [
+        component_id for component_id, count in pending_inputs.items() if count == 0
+    ]
+    order: list[SchematicComponentId] = []
+    while ready:
+        component_id = ready.pop()
+        order.append(component_id)
+        for dependant in dependants.get(component_id, []):
+            pending_inputs[dependant] -= 1
+            if pending_inputs[dependant] == 0:
+                ready.append(dependant)
+
+    if len(order) != len(schematic.components):
+        raise Exception(f"Circular connection found in {schematic.schematic_id}.")
+    return order
+
+
+class SchematicBDDBuilder:
+    """
+    Builds the output BDDs of schematics by walking their hierarchy.
+    The outputs of every child schematic are memoized per schematic id and input nodes,
+    so identical sub-circuits driven by identical functions are only built once.
+    """
+
+    def __init__(self, manager: BDDManager, library: SchematicLibrary):
+        self.manager = manager
+        self.library = library
+
+        self.memo: dict[tuple[SchematicId, tuple[int, ...]], dict[PinId, int]] = {}
+        self.orders: dict[SchematicId, list[SchematicComponentId]] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def build(
+        self, schematic: Schematic, input_nodes: dict[PinId, int]
+    ) -> dict[PinId, int]:
+        if schematic.schematic_id == SchematicId("NAND"):
+            return {
+                PinId("out"): self.manager.nand(
+                    input_nodes[PinId("in1")], input_nodes[PinId("in2")]
+                )
+            }
+
+        key = (
+            schematic.schematic_id,
+            tuple(input_nodes[pin] for pin in sorted(schematic.input_pins)),
+        )
+        output_nodes = self.memo.get(key)
+        if output_nodes is not None:
+            self.hits += 1
+            return output_nodes
+        self.misses += 1
+
+        order = self.orders.get(schematic.schematic_id)
+        if order is None:
+            order = component_order(schematic)
+            self.orders[schematic.schematic_id] = order
+
+        component_output_nodes: dict[SchematicComponentId, dict[PinId, int]] = {}
+
+        def source_node(source: OutputAttachmentPoint) -> int:
+            if isinstance(source.component, SchematicInput):
+                return input_nodes[source.pin]
+            return component_output_nodes[source.component][source.pin]
+
+        for component_id in order:
+            child_inputs = {
+                connection.destination.pin: source_node(connection.source)
+                for connection in schematic.get_input_connections_for_component(
+                    component_id
+                )
+            }
+            child_schematic = self.library.get_schematic(
+                schematic.components[component_id]
+            )
+            component_output_nodes[component_id] = self.build(
+                child_schematic, child_inputs
+            )
+
+        output_nodes = {
+            connection.destination.pin: source_node(connection.source)
+            for connection in schematic.get_input_connections_for_component(
+                SchematicOutput()
+            )
+        }
+        self.memo[key] = output_nodes
+        return output_nodes
+
+
+def check_combinational(schematic: Schematic, library: SchematicLibrary) -> None:
+    """
+    Refuse schematics with registers, whose outputs also depend on earlier clock cycles.
+    """
+    if library.is_sequential(schematic):
+        raise Exception(
+            f"Cannot build the BDD of {schematic.schematic_id}, it holds state in DFF registers."
+        )
+
+
+def build_schematic_bdd(
+    schematic: Schematic,
+    library: SchematicLibrary,
+    variable_order: list[PinId] | None = None,
+    manager: BDDManager | None = None,
+) -> SchematicBDD:
+    """
+    Build the output functions of a schematic as BDDs, without enumerating its inputs.
+    variable_order defaults to default_variable_order.
+    Pass a shared manager to compare the results with other schematics.
+    """
+    check_combinational(schematic, library)
+    if variable_order is None:
+        variable_order = default_variable_order(schematic.input_pins)
+    if set(variable_order) != schematic.input_pins:
+        raise Exception(
+            f"The variable order must contain exactly the input pins of {schematic.schematic_id}"
+        )
+
+    if manager is None:
+        manager = BDDManager(len(variable_order))
+
+    builder = SchematicBDDBuilder(manager, library)
+    output_nodes = builder.build(
+        schematic,
+        {pin: manager.variable(level) for level, pin in enumerate(variable_order)},
+    )
+
+    return SchematicBDD(
+        manager=manager,
+        variable_order=list(variable_order),
+        output_nodes={InputPinId(pin): node for pin, node in output_nodes.items()},
+    )
+
+
+def find_counterexample(
+    schematic_a: Schematic, schematic_b: Schematic, library: SchematicLibrary
+) -> dict[PinId, bool] | None:
+    """
+    Check whether two schematics with the same pins compute the same outputs.
+    Returns None if they are equivalent, otherwise an input assignment on which they differ.
+    """
+    check_combinational(schematic_a, library)
+    check_combinational(schematic_b, library)
+    if schematic_a.input_pins != schematic_b.input_pins:
+        raise Exception(
+            f"{schematic_a.schematic_id} and {schematic_b.schematic_id} have different input pins."
+        )
+    if schematic_a.output_pins != schematic_b.output_pins:
+        raise Exception(
+            f"{schematic_a.schematic_id} and {schematic_b.schematic_id} have different output pins."
+        )
+
+    variable_order = default_variable_order(schematic_a.input_pins)
+    manager = BDDManager(len(variable_order))
+    bdd_a = build_schematic_bdd(schematic_a, library, variable_order, manager)
+    bdd_b = build_schematic_bdd(schematic_b, library, variable_order, manager)
+
+    for pin, node_a in bdd_a.output_nodes.items():
+        node_b = bdd_b.output_nodes[pin]
+        if node_a != node_b:
+            assignment = manager.satisfying_assignment(
+                manager.apply("xor", node_a, node_b)
+            )
+            return dict(zip(variable_order, assignment))  # type: ignore
+
+    return None
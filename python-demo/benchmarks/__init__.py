@@ -0,0 +1,11 @@
+"""
+Benchmarks of the simulator on generated circuits of increasing size.
+
+Run from the python-demo directory:
+
+    python -m benchmarks [--family adder] [--quick] [--output results.json]
+
+The results are written as JSON, see benchmarks.runner for the format.
+The simulation server in server.py is benchmarked separately with python -m benchmarks.server.
+The cycle based simulation of sequential schematics is benchmarked with python -m benchmarks.sequential.
+"""
@@ -0,0 +1,223 @@
+"""
+Parametric generators of mhrd designs used as benchmark workloads.
+
+Every generator returns the mhrd source of a single schematic.
+The designs use the schematics in the repository's schematics directory as parts.
+"""
+import random
+
+# The schematic id of the 2 to 1 multiplexer defined in schematics/MUX-1-2.mhrd.
+MUX_SCHEMATIC_ID = "MUX2-1"
+
+
+class DesignWriter:
+    """
+    Collects the parts and wires of a generated schematic and renders it as mhrd.
+
+    Signals are referenced by the source side of a wire, e.g. "input.a0" or "p3.sum".
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.input_pins: list[str] = []
+        self.output_pins: list[str] = []
+        self.parts: list[tuple[str, str]] = []
+        self.wires: list[tuple[str, str]] = []
+
+    def add_input(self, pin: str) -> str:
+        self.input_pins.append(pin)
+        return f"input.{pin}"
+
+    def add_output(self, pin: str, signal: str) -> None:
+        self.output_pins.append(pin)
+        self.wires.append((signal, f"output.{pin}"))
+
+    def add_part(self, part_type: str, inputs: dict[str, str]) -> str:
+        """
+        Add a part and wire its input pins to signals. Returns the name of the part.
+        """
+        name = f"p{len(self.parts)}"
+        self.parts.append((name, part_type))
+        for pin, signal in inputs.items():
+            self.wires.append((signal, f"{name}.{pin}"))
+        return name
+
+    def render(self) -> str:
+        return "\n".join(
+            [
+                f'Name: "{self.name}";',
+                f"Inputs: {', '.join(self.input_pins)};",
+                f"Outputs: {', '.join(self.output_pins)};",
+                "Parts: "
+                + ", ".join(f"{name}->{part_type}" for name, part_type in self.parts)
+                + ";",
+                "Wires: "
+                + ",\n    ".join(
+                    f"{source} -> {destination}" for source, destination in self.wires
+                )
+                + ";",
+                "",
+            ]
+        )
+
+
+def add_bits(
+    design: DesignWriter, xs: list[str], ys: list[str], carry: str | None = None
+) -> list[str]:
+    """
+    Add two little endian bit vectors of any length with half and full adders.
+    Returns the sum bits, one longer than the longer operand if a carry can be produced.
+    """
+    sums: list[str] = []
+    for index in range(max(len(xs), len(ys))):
+        operands = [bits[index] for bits in (xs, ys) if index < len(bits)]
+        if carry is not None:
+            operands.append(carry)
+
+        if len(operands) == 1:
+            sums.append(operands[0])
+            carry = None
+
+        elif len(operands) == 2:
+            part = design.add_part("HALFADDER", {"a": operands[0], "b": operands[1]})
+            sums.append(f"{part}.sum")
+            carry = f"{part}.carry"
+
+        else:
+            part = design.add_part(
+                "FULLADDER",
+                {"a": operands[0], "b": operands[1], "carryIn": operands[2]},
+            )
+            sums.append(f"{part}.sum")
+            carry = f"{part}.carryOut"
+
+    if carry is not None:
+        sums.append(carry)
+    return sums
+
+
+def ripple_carry_adder(bits: int) -> str:
+    """
+    An adder of two bits wide operands and a carry in, built from a chain of FULLADDER parts.
+    Inputs a0.., b0.. and carryIn, outputs s0.. and carryOut.
+    """
+    design = DesignWriter(f"ADDER{bits}")
+    a = [design.add_input(f"a{index}") for index in range(bits)]
+    b = [design.add_input(f"b{index}") for index in range(bits)]
+    carry = design.add_input("carryIn")
+
+    for index in range(bits):
+        part = design.add_part(
+            "FULLADDER", {"a": a[index], "b": b[index], "carryIn": carry}
+        )
+        design.add_output(f"s{index}", f"{part}.sum")
+        carry = f"{part}.carryOut"
+
+    design.add_output("carryOut", carry)
+    return design.render()
+
+
+def mux_tree(select_bits: int) -> str:
+    """
+    A multiplexer of 2 ** select_bits data inputs built from a tree of 2 to 1 multiplexers.
+    Inputs d0.. and s0.., where s0 is the least significant select bit. Output out is d[s].
+    """
+    design = DesignWriter(f"MUXTREE{select_bits}")
+    level = [design.add_input(f"d{index}") for index in range(1 << select_bits)]
+    selects = [design.add_input(f"s{index}") for index in range(select_bits)]
+
+    for select in selects:
+        parts = [
+            design.add_part(
+                MUX_SCHEMATIC_ID,
+                {"in1": level[index], "in2": level[index + 1], "sel": select},
+            )
+            for index in range(0, len(level), 2)
+        ]
+        level = [f"{part}.out" for part in parts]
+
+    design.add_output("out", level[0])
+    return design.render()
+
+
+def array_multiplier(bits: int) -> str:
+    """
+    An unsigned multiplier of two bits wide operands.
+    Partial products are ANDed together and summed row by row with half and full adders.
+    Inputs a0.. and b0.., outputs p0.. with 2 * bits bits (a single bit for 1 bit operands).
+    """
+    design = DesignWriter(f"MULTIPLIER{bits}")
+    a = [design.add_input(f"a{index}") for index in range(bits)]
+    b = [design.add_input(f"b{index}") for index in range(bits)]
+
+    def partial_products(row: int) -> list[str]:
+        return [
+            f"{design.add_part('AND', {'in1': a[column], 'in2': b[row]})}.out"
+            for column in range(bits)
+        ]
+
+    product: list[str] = []
+    accumulator = partial_products(0)
+    for row in range(1, bits):
+        # The lowest bit of the accumulator is final, the rest is added to the next row.
+        product.append(accumulator[0])
+        accumulator = add_bits(design, accumulator[1:], partial_products(row))
+    product.extend(accumulator)
+
+    for index, signal in enumerate(product):
+        design.add_output(f"p{index}", signal)
+    return design.render()
+
+
+def random_nand_dag(
+    gates: int, inputs: int = 16, outputs: int = 8, window: int = 64, seed: int = 0
+) -> str:
+    """
+    A random directed acyclic graph of NAND gates.
+    Each gate reads two signals chosen among the inputs and the last window gates,
+    which keeps the depth of the graph growing with its size.
+    The outputs are driven by the last gates.
+    """
+    rng = random.Random(seed)
+    design = DesignWriter(f"NANDDAG{gates}")
+    signals = [design.add_input(f"i{index}") for index in range(inputs)]
+    input_signals = list(signals)
+
+    for _ in range(gates):
+        candidates = signals[-window:]
+        in1 = rng.choice(candidates)
+        in2 = rng.choice(candidates if rng.random() < 0.9 else input_signals)
+        signals.append(f"{design.add_part('NAND', {'in1': in1, 'in2': in2})}.out")
+
+    for index, signal in enumerate(signals[-outputs:]):
+        design.add_output(f"o{index}", signal)
+    return design.render()
+
+
+def counter(bits: int) -> str:
+    """
+    A bits wide binary counter held in DFF registers, counting up on every cycle where inc is high.
+    Input inc, outputs q0.., where q0 is the least significant bit.
+    """
+    design = DesignWriter(f"COUNTER{bits}")
+    increment = design.add_input("inc")
+    registers = [design.add_part("DFF", {}) for _ in range(bits)]
+    q = [f"{register}.q" for register in registers]
+
+    # The carry out of the top bit wraps around and is dropped.
+    total = add_bits(design, q, [increment])
+    for register, signal in zip(registers, total):
+        design.wires.append((signal, f"{register}.d"))
+
+    for index, signal in enumerate(q):
+        design.add_output(f"q{index}", signal)
+    return design.render()
+
+
+# The generator of each benchmark family and the sizes it is run at by default.
+FAMILIES = {
+    "adder": (ripple_carry_adder, [4, 16, 64, 256]),
+    "mux": (mux_tree, [2, 4, 6, 8]),
+    "multiplier": (array_multiplier, [2, 4, 8, 16]),
+    "nand_dag": (random_nand_dag, [100, 1000, 10000, 50000]),
+}
@@ -0,0 +1,283 @@
+"""
+Timing of parsing, library loading, simulation and truth table generation on generated designs.
+
+The report is a JSON object with an "environment" entry describing the interpreter and
+a "benchmarks" list with one entry per generated design:
+
+    family, size, schematic_id       which design was generated
+    input_pins, output_pins          the size of its interface
+    connections                      the number of wires in the generated schematic
+    gates                            the NAND gates of its flattened (and optimized) netlist
+    parse, load                      seconds and peak_memory_bytes of each phase
+    simulate                         per engine: runs, seconds_per_vector and gates_per_second
+    truth_table                      rows, seconds, gates_per_second and peak_memory_bytes,
+                                     or null if the design has too many inputs
+
+Gates per second counts the gates of the netlist evaluated once per vector or row,
+so the engines can be compared on the same design.
+"""
+from schematic_types import *
+from schematic import Schematic
+from schematic_library import SchematicLibrary
+from mhrd_parser import parse_mhrd_schematic
+from numpy_backend import NUMPY_AVAILABLE
+from benchmarks.generators import FAMILIES
+
+from typing import Callable, TypeVar
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+T = TypeVar("T")
+
+SCHEMATICS_DIRECTORY = os.path.join(os.path.dirname(__file__), "..", "..", "schematics")
+
+# The single vector simulation engines of SchematicLibrary.
+ENGINES: dict[
+    str,
+    Callable[
+        [SchematicLibrary, Schematic, dict[OutputPinId, bool]], dict[InputPinId, bool]
+    ],
+] = {
+    "recursive": SchematicLibrary.simulate_schematic,
+    "flattened": SchematicLibrary.simulate_flattened_schematic,
+    "compiled": SchematicLibrary.simulate_compiled_schematic,
+}
+
+
+def load_base_schematics() -> list[Schematic]:
+    """
+    Parse the schematics shipped with the repository, which the generated designs use as parts.
+    """
+    schematics: list[Schematic] = []
+    for path in sorted(
+        glob.glob(os.path.join(SCHEMATICS_DIRECTORY, "**", "*.mhrd"), recursive=True)
+    ):
+        with open(path, "r") as f:
+            schematics.append(parse_mhrd_schematic(f.read()))
+    return schematics
+
+
+def timed(function: Callable[[], T]) -> tuple[float, T]:
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def peak_memory(function: Callable[[], object]) -> int:
+    """
+    Run a function again under tracemalloc and return the peak number of bytes it allocated.
+    This is kept apart from the timed runs, since tracing slows allocations down.
+    """
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def repeat_for(
+    function: Callable[[int], object], min_seconds: float, max_runs: int
+) -> tuple[int, float]:
+    """
+    Call function(run) until min_seconds have passed or max_runs calls were made.
+    Returns the number of calls and the total seconds.
+    """
+    runs = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while runs < max_runs and (runs == 0 or elapsed < min_seconds):
+        function(runs)
+        runs += 1
+        elapsed = time.perf_counter() - start
+    return runs, elapsed
+
+
+def benchmark_design(
+    family: str,
+    size: int,
+    base_schematics: list[Schematic],
+    args: argparse.Namespace,
+) -> dict:
+    generate, _ = FAMILIES[family]
+    source = generate(size)
+    if args.write_designs:
+        os.makedirs(args.write_designs, exist_ok=True)
+        with open(os.path.join(args.write_designs, f"{family}-{size}.mhrd"), "w") as f:
+            f.write(source)
+
+    parse_seconds, schematic = timed(lambda: parse_mhrd_schematic(source))
+
+    def load() -> SchematicLibrary:
+        library = SchematicLibrary(optimize_netlists=not args.no_optimize)
+        for base_schematic in base_schematics:
+            library.add_schematic(base_schematic)
+        library.add_schematic(schematic)
+        library.get_schematic_netlist(schematic)
+        return library
+
+    load_seconds, library = timed(load)
+    gates = len(library.get_schematic_netlist(schematic).gates)
+    input_pins = sorted(schematic.input_pins)
+
+    rng = random.Random(size)
+    vectors = [
+        {OutputPinId(pin): rng.random() < 0.5 for pin in input_pins}
+        for _ in range(min(args.max_runs, 256))
+    ]
+
+    simulate: dict[str, dict] = {}
+    for engine in args.engine:
+        simulate_vector = ENGINES[engine]
+        # Compile outside the timed runs, like loading.
+        simulate_vector(library, schematic, vectors[0])
+
+        runs, seconds = repeat_for(
+            lambda run: simulate_vector(
+                library, schematic, vectors[run % len(vectors)]
+            ),
+            args.min_seconds,
+            args.max_runs,
+        )
+        simulate[engine] = {
+            "runs": runs,
+            "seconds_per_vector": seconds / runs,
+            "gates_per_second": gates * runs / seconds if seconds else None,
+        }
+
+    truth_table = None
+    if len(input_pins) <= args.max_truth_table_inputs:
+        rows = 1 << len(input_pins)
+        seconds, _ = timed(lambda: library.get_schematic_truth_table_columns(schematic))
+        truth_table = {
+            "rows": rows,
+            "seconds": seconds,
+            "gates_per_second": gates * rows / seconds if seconds else None,
+            "peak_memory_bytes": peak_memory(
+                lambda: library.get_schematic_truth_table_columns(schematic)
+            ),
+        }
+
+    return {
+        "family": family,
+        "size": size,
+        "schematic_id": str(schematic.schematic_id),
+        "input_pins": len(schematic.input_pins),
+        "output_pins": len(schematic.output_pins),
+        "connections": len(schematic.connection_table),
+        "gates": gates,
+        "parse": {
+            "seconds": parse_seconds,
+            "peak_memory_bytes": peak_memory(lambda: parse_mhrd_schematic(source)),
+        },
+        "load": {
+            "seconds": load_seconds,
+            "peak_memory_bytes": peak_memory(load),
+        },
+        "simulate": simulate,
+        "truth_table": truth_table,
+    }
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "numpy": NUMPY_AVAILABLE,
+    }
+
+
+def parse_arguments(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark the simulator on generated circuits of increasing size.",
+    )
+    parser.add_argument(
+        "--family",
+        action="append",
+        choices=sorted(FAMILIES),
+        help="A family of designs to benchmark. Can be repeated. Defaults to all of them.",
+    )
+    parser.add_argument(
+        "--size",
+        action="append",
+        type=int,
+        help="A size to generate the designs at. Can be repeated. Defaults to each family's sizes.",
+    )
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="Only run the two smallest default sizes of each family.",
+    )
+    parser.add_argument(
+        "--engine",
+        action="append",
+        choices=sorted(ENGINES),
+        help="A single vector simulation engine to time. Can be repeated. Defaults to all of them.",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.2,
+        help="Keep simulating vectors with each engine for at least this long.",
+    )
+    parser.add_argument(
+        "--max-runs",
+        type=int,
+        default=1000,
+        help="Simulate at most this many vectors with each engine.",
+    )
+    parser.add_argument(
+        "--max-truth-table-inputs",
+        type=int,
+        default=16,
+        help="Only generate truth tables of designs with at most this many inputs.",
+    )
+    parser.add_argument(
+        "--no-optimize",
+        action="store_true",
+        help="Benchmark unoptimized netlists.",
+    )
+    parser.add_argument(
+        "--write-designs",
+        metavar="DIRECTORY",
+        help="Also write the generated mhrd designs to this directory.",
+    )
+    parser.add_argument(
+        "--output",
+        metavar="FILE",
+        help="Write the JSON report to this file instead of standard output.",
+    )
+
+    args = parser.parse_args(argv)
+    args.family = args.family or sorted(FAMILIES)
+    args.engine = args.engine or list(ENGINES)
+    return args
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_arguments(argv)
+    base_schematics = load_base_schematics()
+
+    results: list[dict] = []
+    for family in args.family:
+        _, default_sizes = FAMILIES[family]
+        sizes = args.size or (default_sizes[:2] if args.quick else default_sizes)
+        for size in sizes:
+            print(f"Benchmarking {family} {size}...", file=sys.stderr)
+            results.append(benchmark_design(family, size, base_schematics, args))
+
+    report = json.dumps({"environment": environment(), "benchmarks": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
@@ -0,0 +1,82 @@
+"""
+Clock cycles per second of the cycle based simulation of sequential schematics.
+
+    python -m benchmarks.sequential [--bits 8 --bits 64] [--cycles 100000]
+
+Runs a generated counter once with every cycle in a single call to the stepping function,
+and once calling it a cycle at a time, and prints a JSON report of both.
+"""
+from benchmarks.generators import counter
+from benchmarks.runner import load_base_schematics
+from mhrd_parser import parse_mhrd_schematic
+from schematic_library import SchematicLibrary
+
+import argparse
+import itertools
+import json
+import time
+
+
+def benchmark_counter(bits: int, cycles: int) -> dict:
+    library = SchematicLibrary()
+    for schematic in load_base_schematics():
+        library.add_schematic(schematic)
+    schematic = parse_mhrd_schematic(counter(bits))
+    library.add_schematic(schematic)
+
+    start = time.perf_counter()
+    simulator = library.create_cycle_simulator(schematic)
+    compile_seconds = time.perf_counter() - start
+    gates = len(library.get_sequential_netlist(schematic).logic.gates)
+
+    start = time.perf_counter()
+    simulator.step({"inc": itertools.repeat(1)}, cycles, sample_every=cycles)
+    bulk_seconds = time.perf_counter() - start
+
+    simulator.reset()
+    single_cycles = max(1, cycles // 10)
+    start = time.perf_counter()
+    for _ in range(single_cycles):
+        simulator.step({"inc": [1]})
+    single_seconds = time.perf_counter() - start
+
+    return {
+        "bits": bits,
+        "gates": gates,
+        "compile_seconds": compile_seconds,
+        "bulk_cycles_per_second": cycles / bulk_seconds,
+        "bulk_gates_per_second": cycles * gates / bulk_seconds,
+        "single_cycles_per_second": single_cycles / single_seconds,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.sequential",
+        description="Benchmark the cycle based simulation of generated counters.",
+    )
+    parser.add_argument(
+        "--bits",
+        type=int,
+        action="append",
+        help="The widths of the counters to run. Defaults to 8, 32 and 128.",
+    )
+    parser.add_argument("--cycles", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    print(
+        json.dumps(
+            {
+                "cycles": args.cycles,
+                "runs": [
+                    benchmark_counter(bits, args.cycles)
+                    for bits in args.bits or [8, 32, 128]
+                ],
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
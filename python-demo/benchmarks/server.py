@@ -0,0 +1,138 @@
+"""
+Throughput and latency of the simulation server under many concurrent clients.
+
+    python -m benchmarks.server [--clients 64] [--requests 200] [--schematic FULLADDER]
+
+Starts server.py on a temporary Unix socket, once with coalescing and once with --max-batch 1,
+and prints a JSON report with the requests per second and the p50, p95 and p99 latency of each run.
+"""
+from client import AsyncSimulationClient
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(__file__), "..", "server.py")
+SCHEMATICS_DIRECTORY = os.path.join(os.path.dirname(__file__), "..", "..", "schematics")
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    return sorted_values[
+        min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    ]
+
+
+async def wait_for_socket(path: str, process: subprocess.Popen) -> None:
+    while not os.path.exists(path):
+        if process.poll() is not None:
+            raise Exception("The simulation server exited before listening.")
+        await asyncio.sleep(0.05)
+
+
+async def run_clients(
+    socket_path: str, schematic_id: str, clients: int, requests: int
+) -> dict:
+    async def run_client(seed: int) -> list[float]:
+        rng = random.Random(seed)
+        latencies: list[float] = []
+        async with await AsyncSimulationClient.connect_unix(socket_path) as client:
+            input_pins, _ = await client.pins(schematic_id)
+            for _ in range(requests):
+                inputs = {pin: rng.random() < 0.5 for pin in input_pins}
+                start = time.perf_counter()
+                await client.simulate(schematic_id, inputs)
+                latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run_client(seed) for seed in range(clients)))
+    seconds = time.perf_counter() - start
+
+    latencies = sorted(latency for result in results for latency in result)
+    return {
+        "requests": len(latencies),
+        "seconds": seconds,
+        "requests_per_second": len(latencies) / seconds,
+        "latency_seconds": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+        },
+    }
+
+
+async def benchmark_server(args: argparse.Namespace, max_batch: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, "server.sock")
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                SERVER_SCRIPT,
+                "--socket",
+                socket_path,
+                "--schematics",
+                args.schematics,
+                "--max-batch",
+                str(max_batch),
+            ],
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            await wait_for_socket(socket_path, process)
+            result = await run_clients(
+                socket_path, args.schematic, args.clients, args.requests
+            )
+        finally:
+            process.terminate()
+            process.wait()
+
+    return {"max_batch": max_batch, **result}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.server",
+        description="Benchmark the simulation server with concurrent clients.",
+    )
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=200,
+        help="Simulate requests sent by each client.",
+    )
+    parser.add_argument("--schematic", default="FULLADDER")
+    parser.add_argument("--schematics", default=SCHEMATICS_DIRECTORY)
+    parser.add_argument(
+        "--max-batch",
+        type=int,
+        action="append",
+        help="The coalescing limits to run the server with. Defaults to 4096 and 1.",
+    )
+    args = parser.parse_args(argv)
+
+    runs = [
+        asyncio.run(benchmark_server(args, max_batch))
+        for max_batch in args.max_batch or [4096, 1]
+    ]
+    print(
+        json.dumps(
+            {
+                "schematic": args.schematic,
+                "clients": args.clients,
+                "requests_per_client": args.requests,
+                "runs": runs,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
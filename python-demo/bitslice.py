@@ -0,0 +1,118 @@
+"""
+Bit-parallel simulation of flattened netlists.
+
+Each wire holds an arbitrary precision int where bit r is the signal of that wire for row r.
+A single pass over the netlist therefore evaluates every row at once.
+"""
+from schematic_types import *
+from netlist import Netlist
+
+from typing import Iterable
+
+# Translate between bytes of 0 and 1 and the ascii digits of a binary string.
+BYTES_TO_DIGITS = bytes.maketrans(b"\0\1", b"01")
+DIGITS_TO_BYTES = bytes.maketrans(b"01", b"\0\1")
+
+
+def lane_mask(lane_count: int) -> int:
+    """
+    An int with the lowest lane_count bits set.
+    """
+    return (1 << lane_count) - 1
+
+
+def simulate_netlist_bitsliced(
+    netlist: Netlist, input_lanes: list[int], lane_count: int
+) -> list[int]:
+    """
+    Evaluate a netlist over lane_count rows at once.
+    input_lanes holds one packed int per input pin in the order of netlist.input_pins.
+    Returns one packed int per output pin in the order of netlist.output_pins.
+    """
+    mask = lane_mask(lane_count)
+    wires = list(input_lanes)
+    for in1, in2 in netlist.gates:
+        wires.append(~(wires[in1] & wires[in2]) & mask)
+
+    return [wires[wire] for wire in netlist.output_wires]
+
+
+def exhaustive_input_lanes(
+    input_count: int, first_row: int, lane_count: int
+) -> list[int]:
+    """
+    Build the input lanes for the rows first_row..first_row+lane_count-1 of a truth table.
+    The rows follow the order of itertools.product([False, True], repeat=input_count),
+    so the first input is the most significant bit of the row number.
+
+    lane_count must be a power of two and first_row must be a multiple of it.
+    """
+    if lane_count & (lane_count - 1) or first_row % lane_count:
+        raise Exception(
+            f"Cannot build {lane_count} truth table lanes starting at row {first_row}."
+        )
+
+    mask = lane_mask(lane_count)
+    lanes: list[int] = []
+    for input_index in range(input_count):
+        half_period = 1 << (input_count - 1 - input_index)
+
+        # Inputs that change slower than the chunk are constant within it.
+        if half_period >= lane_count:
+            lanes.append(mask if (first_row // half_period) & 1 else 0)
+            continue
+
+        # Repeat a block of half_period zeros followed by half_period ones.
+        lane = lane_mask(half_period) << half_period
+        width = 2 * half_period
+        while width < lane_count:
+            lane |= lane << width
+            width *= 2
+        lanes.append(lane)
+
+    return lanes
+
+
+def pack_column(values: Iterable[bool]) -> int:
+    """
+    Pack a sequence of signals into an int, with the first signal in the lowest bit.
+    """
+    # Shifting a large int per row is quadratic, so build a binary string instead.
+    bits = bytes(map(bool, values)).translate(BYTES_TO_DIGITS)
+    return int(bits[::-1], 2) if bits else 0
+
+
+def unpack_lane(lane: int, lane_count: int) -> list[bool]:
+    """
+    Unpack the lowest lane_count bits of an int into a list of signals.
+    """
+    if lane_count == 0:
+        return []
+    bits = format(lane & lane_mask(lane_count), f"0{lane_count}b")[::-1]
+    return list(map(bool, bits.encode().translate(DIGITS_TO_BYTES)))
+
+
+def pack_input_vectors(
+    netlist: Netlist, input_vectors: list[dict[OutputPinId, bool]]
+) -> list[int]:
+    """
+    Pack a list of input signal dicts into one int per input pin.
+    """
+    return [
+        pack_column(input_signals[pin] for input_signals in input_vectors)
+        for pin in netlist.input_pins
+    ]
+
+
+def unpack_output_lanes(
+    netlist: Netlist, output_lanes: list[int], lane_count: int
+) -> list[dict[InputPinId, bool]]:
+    """
+    Unpack one int per output pin into a list of output signal dicts.
+    """
+    output_pins = [InputPinId(pin) for pin in netlist.output_pins]
+    output_columns = [unpack_lane(lane, lane_count) for lane in output_lanes]
+    return [
+        {pin: column[row] for pin, column in zip(output_pins, output_columns)}
+        for row in range(lane_count)
+    ]
@@ -0,0 +1,173 @@
+"""
+Multi-bit buses and word level simulation.
+
+A bus is a group of bit pins named name[0], name[1], ... where bit 0 is the least significant bit
+of the word carried by the bus. A pin outside of any bus carries a word of a single bit.
+"""
+from schematic_types import *
+from netlist import Netlist
+from bitslice import pack_column, simulate_netlist_bitsliced, unpack_lane
+
+from dataclasses import dataclass
+from typing import Iterable, Mapping, Sequence
+import re
+
+BUS_PIN_PATTERN = re.compile(r"(.+)\[(\d+)\]")
+
+
+def bus_pin(name: str, index: int) -> str:
+    """
+    The name of bit index of a bus.
+    """
+    return f"{name}[{index}]"
+
+
+def group_buses(pins: Iterable[PinId]) -> dict[str, list[PinId]]:
+    """
+    Group pins into buses, sorted by name, each with its bit pins from the least significant bit up.
+    """
+    bits: dict[str, dict[int, PinId]] = {}
+    for pin in pins:
+        match = BUS_PIN_PATTERN.fullmatch(pin)
+        if match is None:
+            name, index = str(pin), None
+        else:
+            name, index = match.group(1), int(match.group(2))
+
+        bus = bits.setdefault(name, {})
+        if (index is None) != (None in bus) and bus:
+            raise Exception(f"Pin {name} is both a single pin and a bus")
+        bus[index] = pin  # type: ignore
+
+    buses: dict[str, list[PinId]] = {}
+    for name in sorted(bits):
+        bus = bits[name]
+        if None in bus:
+            buses[name] = [bus[None]]  # type: ignore
+            continue
+
+        for index in range(len(bus)):
+            if index not in bus:
+                raise Exception(f"Bus {name} is missing bit {index}")
+        buses[name] = [bus[index] for index in range(len(bus))]
+    return buses
+
+
+@dataclass
+class WordLayout:
+    """
+    Where the bits of every bus are found in a netlist.
+    """
+
+    schematic_id: SchematicId
+
+    # The input wire of each bit of each input bus.
+    input_buses: dict[str, list[int]]
+
+    # The index in the netlist outputs of each bit of each output bus.
+    output_buses: dict[str, list[int]]
+
+
+def build_word_layout(netlist: Netlist) -> WordLayout:
+    input_wires = {pin: wire for wire, pin in enumerate(netlist.input_pins)}
+    output_indexes = {pin: index for index, pin in enumerate(netlist.output_pins)}
+    return WordLayout(
+        schematic_id=netlist.schematic_id,
+        input_buses={
+            name: [input_wires[pin] for pin in bits]
+            for name, bits in group_buses(netlist.input_pins).items()
+        },
+        output_buses={
+            name: [output_indexes[pin] for pin in bits]
+            for name, bits in group_buses(netlist.output_pins).items()
+        },
+    )
+
+
+def check_input_words(layout: WordLayout, buses: Iterable[str]) -> None:
+    """
+    Verify that exactly the input buses of a netlist are provided.
+    """
+    provided = set(buses)
+    expected = set(layout.input_buses)
+    for name in sorted(provided - expected):
+        raise Exception(
+            f"Input bus {name} is not defined on schematic {layout.schematic_id}"
+        )
+    for name in sorted(expected - provided):
+        raise Exception(
+            f"Input bus {name} is not provided for schematic {layout.schematic_id}"
+        )
+
+
+def check_word(layout: WordLayout, name: str, word: int) -> None:
+    width = len(layout.input_buses[name])
+    if word < 0 or word >> width:
+        raise Exception(
+            f"Input word {word} does not fit in the {width} bits of bus {name} "
+            f"on schematic {layout.schematic_id}"
+        )
+
+
+def simulate_netlist_words(
+    netlist: Netlist, layout: WordLayout, input_words: Mapping[str, int]
+) -> dict[str, int]:
+    """
+    Evaluate a netlist for one int per input bus and return one int per output bus.
+    """
+    check_input_words(layout, input_words)
+
+    wires = [0] * len(netlist.input_pins)
+    for name, bit_wires in layout.input_buses.items():
+        word = input_words[name]
+        check_word(layout, name, word)
+        for bit, wire in enumerate(bit_wires):
+            wires[wire] = word >> bit & 1
+
+    for in1, in2 in netlist.gates:
+        wires.append(1 ^ (wires[in1] & wires[in2]))
+
+    output_wires = netlist.output_wires
+    output_words: dict[str, int] = {}
+    for name, bit_indexes in layout.output_buses.items():
+        word = 0
+        for bit, index in enumerate(bit_indexes):
+            word |= wires[output_wires[index]] << bit
+        output_words[name] = word
+    return output_words
+
+
+def simulate_netlist_words_batch(
+    netlist: Netlist, layout: WordLayout, input_words: Mapping[str, Sequence[int]]
+) -> dict[str, list[int]]:
+    """
+    Evaluate a netlist for a column of ints per input bus in a single bitsliced pass.
+    Returns a list of ints per output bus, in the order of the rows.
+    """
+    check_input_words(layout, input_words)
+    row_counts = set(len(words) for words in input_words.values())
+    if len(row_counts) > 1:
+        raise Exception(
+            f"Input words for {layout.schematic_id} have different lengths."
+        )
+    row_count = row_counts.pop() if row_counts else 1
+
+    input_lanes = [0] * len(netlist.input_pins)
+    for name, bit_wires in layout.input_buses.items():
+        words = input_words[name]
+        if words:
+            check_word(layout, name, min(words))
+            check_word(layout, name, max(words))
+        for bit, wire in enumerate(bit_wires):
+            input_lanes[wire] = pack_column([word >> bit & 1 for word in words])
+
+    output_lanes = simulate_netlist_bitsliced(netlist, input_lanes, row_count)
+
+    output_words: dict[str, list[int]] = {}
+    for name, bit_indexes in layout.output_buses.items():
+        words = [0] * row_count
+        for bit, index in enumerate(bit_indexes):
+            column = unpack_lane(output_lanes[index], row_count)
+            words = [word | signal << bit for word, signal in zip(words, column)]
+        output_words[name] = words
+    return output_words
@@ -0,0 +1,271 @@
+"""
+Clients of the simulation server in server.py.
+
+SimulationClient is a blocking client for scripts and test workers.
+AsyncSimulationClient keeps many requests in flight over a single connection.
+"""
+from schematic_types import *
+from bitslice import unpack_lane
+
+from typing import AsyncIterator, Iterator
+import asyncio
+import json
+import socket
+
+# The largest response line accepted.
+MAX_LINE_BYTES = 64 * 1024 * 1024
+
+
+class SimulationServerError(Exception):
+    """
+    An error reported by the server for a single request.
+    """
+
+    pass
+
+
+def encode_request(request: dict) -> bytes:
+    return json.dumps(request, separators=(",", ":")).encode() + b"\n"
+
+
+def check_response(response: dict) -> dict:
+    if "error" in response:
+        raise SimulationServerError(response["error"])
+    return response
+
+
+def row_signals(input_count: int, row: int) -> list[bool]:
+    """
+    The input signals of a truth table row, with the first input as the most significant bit.
+    """
+    return [bool(row >> (input_count - 1 - index) & 1) for index in range(input_count)]
+
+
+class SimulationClient:
+    """
+    A blocking client sending one request at a time.
+    """
+
+    def __init__(self, sock: socket.socket):
+        self.socket = sock
+        self.file = sock.makefile("rwb")
+        self.next_id = 0
+
+    @classmethod
+    def connect_unix(cls, path: str) -> "SimulationClient":
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+        return cls(sock)
+
+    @classmethod
+    def connect_tcp(
+        cls, host: str = "127.0.0.1", port: int = 8765
+    ) -> "SimulationClient":
+        return cls(socket.create_connection((host, port)))
+
+    def close(self) -> None:
+        self.file.close()
+        self.socket.close()
+
+    def __enter__(self) -> "SimulationClient":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def send(self, request: dict) -> int:
+        self.next_id += 1
+        self.file.write(encode_request({"id": self.next_id, **request}))
+        self.file.flush()
+        return self.next_id
+
+    def receive(self) -> dict:
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("The simulation server closed the connection.")
+        return check_response(json.loads(line))
+
+    def request(self, request: dict) -> dict:
+        self.send(request)
+        return self.receive()
+
+    def simulate(
+        self, schematic_id: str, input_signals: dict[str, bool]
+    ) -> dict[InputPinId, bool]:
+        response = self.request(
+            {"op": "simulate", "schematic": schematic_id, "inputs": input_signals}
+        )
+        return {InputPinId(pin): signal for pin, signal in response["outputs"].items()}
+
+    def load(self, mhrd_source: str) -> SchematicId:
+        return SchematicId(
+            self.request({"op": "load", "source": mhrd_source})["schematic"]
+        )
+
+    def schematics(self) -> list[SchematicId]:
+        response = self.request({"op": "schematics"})
+        return [SchematicId(schematic_id) for schematic_id in response["schematics"]]
+
+    def pins(self, schematic_id: str) -> tuple[list[OutputPinId], list[InputPinId]]:
+        """
+        The input and output pins of a schematic.
+        """
+        response = self.request({"op": "pins", "schematic": schematic_id})
+        return (
+            [OutputPinId(pin) for pin in response["input_pins"]],
+            [InputPinId(pin) for pin in response["output_pins"]],
+        )
+
+    def iter_truth_table(
+        self, schematic_id: str, chunk_rows: int | None = None
+    ) -> Iterator[tuple[dict[PinId, bool], dict[InputPinId, bool]]]:
+        """
+        Stream the rows of a truth table as they arrive.
+        """
+        request: dict = {"op": "truth_table", "schematic": schematic_id}
+        if chunk_rows is not None:
+            request["chunk_rows"] = chunk_rows
+        self.send(request)
+
+        header = self.receive()
+        input_pins = [PinId(pin) for pin in header["input_pins"]]
+        while True:
+            chunk = self.receive()
+            if chunk.get("done"):
+                return
+
+            first_row = chunk["first_row"]
+            row_count = chunk["row_count"]
+            output_columns = {
+                InputPinId(pin): unpack_lane(int(lane, 16), row_count)
+                for pin, lane in chunk["outputs"].items()
+            }
+            for row in range(row_count):
+                yield (
+                    dict(
+                        zip(input_pins, row_signals(len(input_pins), first_row + row))
+                    ),
+                    {pin: column[row] for pin, column in output_columns.items()},
+                )
+
+
+class AsyncSimulationClient:
+    """
+    An asyncio client multiplexing any number of concurrent requests over one connection.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 0
+
+        # The queue receiving the responses of each request in flight.
+        self.waiting: dict[int, asyncio.Queue] = {}
+        self.receiver = asyncio.create_task(self.receive_responses())
+
+    @classmethod
+    async def connect_unix(cls, path: str) -> "AsyncSimulationClient":
+        return cls(*await asyncio.open_unix_connection(path, limit=MAX_LINE_BYTES))
+
+    @classmethod
+    async def connect_tcp(
+        cls, host: str = "127.0.0.1", port: int = 8765
+    ) -> "AsyncSimulationClient":
+        return cls(*await asyncio.open_connection(host, port, limit=MAX_LINE_BYTES))
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.receiver.cancel()
+
+    async def __aenter__(self) -> "AsyncSimulationClient":
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    async def receive_responses(self) -> None:
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                queue = self.waiting.get(response.get("id"))
+                if queue is not None:
+                    queue.put_nowait(response)
+
+        finally:
+            # Wake up every request still waiting on a closed connection.
+            for queue in self.waiting.values():
+                queue.put_nowait(
+                    {"error": "The simulation server closed the connection."}
+                )
+
+    async def send(self, request: dict) -> tuple[int, asyncio.Queue]:
+        self.next_id += 1
+        request_id = self.next_id
+        queue: asyncio.Queue = asyncio.Queue()
+        self.waiting[request_id] = queue
+
+        self.writer.write(encode_request({"id": request_id, **request}))
+        await self.writer.drain()
+        return request_id, queue
+
+    async def request(self, request: dict) -> dict:
+        request_id, queue = await self.send(request)
+        try:
+            return check_response(await queue.get())
+        finally:
+            del self.waiting[request_id]
+
+    async def simulate(
+        self, schematic_id: str, input_signals: dict[str, bool]
+    ) -> dict[InputPinId, bool]:
+        response = await self.request(
+            {"op": "simulate", "schematic": schematic_id, "inputs": input_signals}
+        )
+        return {InputPinId(pin): signal for pin, signal in response["outputs"].items()}
+
+    async def load(self, mhrd_source: str) -> SchematicId:
+        response = await self.request({"op": "load", "source": mhrd_source})
+        return SchematicId(response["schematic"])
+
+    async def pins(
+        self, schematic_id: str
+    ) -> tuple[list[OutputPinId], list[InputPinId]]:
+        """
+        The input and output pins of a schematic.
+        """
+        response = await self.request({"op": "pins", "schematic": schematic_id})
+        return (
+            [OutputPinId(pin) for pin in response["input_pins"]],
+            [InputPinId(pin) for pin in response["output_pins"]],
+        )
+
+    async def iter_truth_table_chunks(
+        self, schematic_id: str, chunk_rows: int | None = None
+    ) -> AsyncIterator[tuple[list[PinId], int, int, dict[InputPinId, int]]]:
+        """
+        Stream a truth table chunk by chunk.
+        Yields the input pins, the first row and row count of the chunk and one packed int per output pin.
+        """
+        request: dict = {"op": "truth_table", "schematic": schematic_id}
+        if chunk_rows is not None:
+            request["chunk_rows"] = chunk_rows
+        request_id, queue = await self.send(request)
+
+        try:
+            header = check_response(await queue.get())
+            input_pins = [PinId(pin) for pin in header["input_pins"]]
+            while True:
+                chunk = check_response(await queue.get())
+                if chunk.get("done"):
+                    return
+                yield input_pins, chunk["first_row"], chunk["row_count"], {
+                    InputPinId(pin): int(lane, 16)
+                    for pin, lane in chunk["outputs"].items()
+                }
+
+        finally:
+            del self.waiting[request_id]
@@ -0,0 +1,137 @@
+"""
+Compilation of flattened netlists into generated Python functions.
+"""
+from __future__ import annotations
+
+from schematic_types import *
+from schematic import Schematic
+from netlist import Netlist
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable
+import itertools
+import linecache
+import re
+
+if TYPE_CHECKING:
+    from schematic_library import SchematicLibrary
+
+# Numbers the files of generated functions, so two functions never share a linecache entry
+# even when their schematic ids map to the same identifier.
+generated_file_numbers = itertools.count()
+
+
+@dataclass
+class CompiledSchematic:
+    """
+    A schematic compiled into a straight-line Python function.
+
+    The function takes one positional argument per input pin in the order of input_pins
+    and returns a tuple with one value per output pin in the order of output_pins.
+    Bitsliced functions take the lane mask as an extra first argument and operate on ints.
+    """
+
+    schematic_id: SchematicId
+
+    input_pins: list[PinId]
+    output_pins: list[PinId]
+
+    # Whether the function evaluates packed ints instead of bools.
+    bitsliced: bool
+
+    # The generated source, kept around for debugging.
+    source: str
+
+    # The linecache entry of the source, dropped with release_generated_source.
+    filename: str
+
+    function: Callable[..., tuple]
+
+
+def function_name(schematic_id: SchematicId, bitsliced: bool) -> str:
+    """
+    Build a valid python identifier for the generated function of a schematic.
+    """
+    name = re.sub(r"\W", "_", schematic_id)
+    suffix = "_bitsliced" if bitsliced else ""
+    return f"simulate_{name}{suffix}"
+
+
+def generate_netlist_source(netlist: Netlist, name: str, bitsliced: bool) -> str:
+    """
+    Emit the source of a function evaluating the netlist.
+    Every wire becomes a local variable and every NAND becomes a single assignment.
+    """
+    input_count = len(netlist.input_pins)
+    arguments = [f"w{wire}" for wire in range(input_count)]
+    if bitsliced:
+        arguments.insert(0, "mask")
+
+    lines = [f"def {name}({', '.join(arguments)}):"]
+    for gate_index, (in1, in2) in enumerate(netlist.gates):
+        out = input_count + gate_index
+        if bitsliced:
+            lines.append(f"    w{out} = ~(w{in1} & w{in2}) & mask")
+        else:
+            lines.append(f"    w{out} = not (w{in1} and w{in2})")
+
+    outputs = "".join(f"w{wire}, " for wire in netlist.output_wires)
+    lines.append(f"    return ({outputs})")
+
+    return "\n".join(lines) + "\n"
+
+
+def load_generated_function(
+    source: str, name: str, namespace: dict[str, object]
+) -> tuple[Callable, str]:
+    """
+    Compile and load a generated function named name.
+    The source is registered with linecache so tracebacks can show the generated lines.
+    Returns the function and the filename of its linecache entry.
+    """
+    filename = f"<compiled {name} #{next(generated_file_numbers)}>"
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+
+    exec(compile(source, filename, "exec"), namespace)
+    return namespace[name], filename  # type: ignore
+
+
+def release_generated_source(filename: str) -> None:
+    """
+    Drop the linecache entry of a generated function that is no longer used.
+    """
+    linecache.cache.pop(filename, None)
+
+
+def compile_netlist(netlist: Netlist, bitsliced: bool = False) -> CompiledSchematic:
+    """
+    Generate, compile and load the function evaluating a netlist.
+    """
+    name = function_name(netlist.schematic_id, bitsliced)
+    source = generate_netlist_source(netlist, name, bitsliced)
+    function, filename = load_generated_function(source, name, {})
+
+    return CompiledSchematic(
+        schematic_id=netlist.schematic_id,
+        input_pins=netlist.input_pins,
+        output_pins=netlist.output_pins,
+        bitsliced=bitsliced,
+        source=source,
+        filename=filename,
+        function=function,
+    )
+
+
+def compile_schematic(
+    schematic: Schematic, library: SchematicLibrary, bitsliced: bool = False
+) -> CompiledSchematic:
+    """
+    Compile a schematic into a Python function.
+    The result is cached in the library per schematic id.
+    """
+    key = (schematic.schematic_id, bitsliced)
+    compiled = library.compiled_schematics.get(key)
+    if compiled is None:
+        compiled = compile_netlist(library.get_schematic_netlist(schematic), bitsliced)
+        library.compiled_schematics[key] = compiled
+    return compiled
@@ -0,0 +1,159 @@
+"""
+Output cones: the part of a schematic that a subset of its output pins depends on.
+"""
+from __future__ import annotations
+
+from schematic_types import *
+from schematic import Schematic
+from netlist import Netlist
+
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass
+class OutputCone:
+    """
+    The transitive fan-in of some output pins of a schematic, through every level of the hierarchy.
+    """
+
+    schematic_id: SchematicId
+
+    # The requested output pins.
+    output_pins: frozenset[PinId]
+
+    # The input pins the requested outputs depend on.
+    input_pins: frozenset[PinId]
+
+    # The components that have to be evaluated, in topological order,
+    # with the output pins of each one that are read inside the cone.
+    components: dict[SchematicComponentId, frozenset[PinId]]
+
+
+def topological_components(schematic: Schematic) -> list[SchematicComponentId]:
+    """
+    Order the components of a validated schematic so every component comes after its drivers.
+    """
+    in_degrees = {component_id: 0 for component_id in schematic.components}
+    successors: dict[SchematicComponentId, list[SchematicComponentId]] = {}
+    for connection in schematic.connections:
+        source = connection.source.component
+        destination = connection.destination.component
+        if isinstance(source, SchematicInput) or isinstance(
+            destination, SchematicOutput
+        ):
+            continue
+        successors.setdefault(source, []).append(destination)
+        in_degrees[destination] += 1
+
+    order = [component_id for component_id, degree in in_degrees.items() if degree == 0]
+    for component_id in order:
+        for successor in successors.get(component_id, ()):
+            in_degrees[successor] -= 1
+            if in_degrees[successor] == 0:
+                order.append(successor)
+    return order
+
+
+def compute_output_cone(
+    schematic: Schematic,
+    output_pins: frozenset[PinId],
+    get_component_schematic: Callable[[SchematicComponentId], Schematic],
+    get_cone: Callable[[Schematic, frozenset[PinId]], OutputCone],
+) -> OutputCone:
+    """
+    Walk back from the requested outputs to the input pins they depend on.
+    Components are visited in reverse topological order, so the output pins needed from a component
+    are known before its own cone, fetched with get_cone, is asked for.
+    """
+    for pin in output_pins:
+        if pin not in schematic.output_pins:
+            raise Exception(
+                f"Output pin {pin} is not defined on schematic {schematic.schematic_id}"
+            )
+
+    needed_inputs: set[PinId] = set()
+    needed_outputs: dict[SchematicComponentId, set[PinId]] = {}
+
+    def require(destination: InputAttachmentPoint) -> None:
+        driver = schematic.get_driver_for_pin(destination)
+        if driver is None:
+            return
+        if isinstance(driver.source.component, SchematicInput):
+            needed_inputs.add(driver.source.pin)
+        else:
+            needed_outputs.setdefault(driver.source.component, set()).add(
+                driver.source.pin
+            )
+
+    for pin in output_pins:
+        require(InputAttachmentPoint(SchematicOutput(), InputPinId(pin)))
+
+    components: dict[SchematicComponentId, frozenset[PinId]] = {}
+    for component_id in reversed(topological_components(schematic)):
+        component_outputs = needed_outputs.get(component_id)
+        if not component_outputs:
+            continue
+
+        component_cone = get_cone(
+            get_component_schematic(component_id), frozenset(component_outputs)
+        )
+        components[component_id] = component_cone.output_pins
+        for pin in component_cone.input_pins:
+            require(InputAttachmentPoint(component_id, InputPinId(pin)))
+
+    return OutputCone(
+        schematic_id=schematic.schematic_id,
+        output_pins=output_pins,
+        input_pins=frozenset(needed_inputs),
+        components=dict(reversed(components.items())),
+    )
+
+
+def prune_netlist(
+    netlist: Netlist, output_pins: frozenset[PinId], keep_inputs: bool = True
+) -> Netlist:
+    """
+    Keep only the gates of a netlist that the given output pins depend on.
+    The outputs keep their order in the netlist. Unless keep_inputs is set,
+    input pins that none of the outputs depend on are dropped too.
+    """
+    input_count = len(netlist.input_pins)
+    outputs = [
+        (pin, wire)
+        for pin, wire in zip(netlist.output_pins, netlist.output_wires)
+        if pin in output_pins
+    ]
+
+    live = [False] * netlist.wire_count
+    for _, wire in outputs:
+        live[wire] = True
+
+    # Gates are topologically sorted, so a single backward pass finds the whole cone.
+    gates = netlist.gates
+    for gate_index in range(len(gates) - 1, -1, -1):
+        if live[input_count + gate_index]:
+            in1, in2 = gates[gate_index]
+            live[in1] = True
+            live[in2] = True
+
+    renumbered = [-1] * netlist.wire_count
+    input_pins: list[PinId] = []
+    for wire, pin in enumerate(netlist.input_pins):
+        if keep_inputs or live[wire]:
+            renumbered[wire] = len(input_pins)
+            input_pins.append(pin)
+
+    kept_gates: list[tuple[int, int]] = []
+    for gate_index, (in1, in2) in enumerate(gates):
+        if live[input_count + gate_index]:
+            renumbered[input_count + gate_index] = len(input_pins) + len(kept_gates)
+            kept_gates.append((renumbered[in1], renumbered[in2]))
+
+    return Netlist(
+        schematic_id=netlist.schematic_id,
+        input_pins=input_pins,
+        output_pins=[pin for pin, _ in outputs],
+        gates=kept_gates,
+        output_wires=[renumbered[wire] for _, wire in outputs],
+    )
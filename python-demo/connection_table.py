@@ -0,0 +1,342 @@
+"""
+Compact storage of the connections of a schematic.
+
+Component and pin names are interned into small integers, and every connection is stored
+as one entry in each of a few array('I') columns instead of as a Connection object holding
+two attachment points. Connection objects are only created when they are asked for.
+"""
+from schematic_types import *
+
+from array import array
+from typing import Iterable, Iterator
+
+# The component index of the schematic itself.
+# It is SchematicInput when used as a source and SchematicOutput when used as a destination.
+BOUNDARY = 0
+
+# The names the boundary goes by in mhrd wires.
+INPUT_NAME = "input"
+OUTPUT_NAME = "output"
+
+# The line stored for connections without a source location.
+NO_LINE = 0
+
+
+class NameTable(dict[str, int]):
+    """
+    Interns names into consecutive integers.
+    Looking up a missing name with table[name] interns it, use get to only look names up.
+    """
+
+    __slots__ = ("names",)
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.names: list[str] = list(dict.fromkeys(names))
+        super().__init__(zip(self.names, range(len(self.names))))
+
+    def __missing__(self, name: str) -> int:
+        index = len(self.names)
+        self.names.append(name)
+        self[name] = index
+        return index
+
+    def intern(self, name: str) -> int:
+        return self[name]
+
+
+def pack_connection(
+    source_component: int,
+    source_pin: int,
+    destination_component: int,
+    destination_pin: int,
+) -> int:
+    """
+    Pack the four 32 bit indexes of a connection into a single int.
+    """
+    return (
+        source_component << 96
+        | source_pin << 64
+        | destination_component << 32
+        | destination_pin
+    )
+
+
+class ConnectionTable:
+    """
+    The connections of a schematic as columns of interned component and pin indexes.
+
+    Component index BOUNDARY is the schematic itself. Every other component index is
+    the index of a component name in the components table.
+    Connection i goes from pin source_pins[i] of component source_components[i]
+    to pin destination_pins[i] of component destination_components[i].
+    """
+
+    __slots__ = (
+        "components",
+        "pins",
+        "source_components",
+        "source_pins",
+        "destination_components",
+        "destination_pins",
+        "lines",
+        "columns",
+        "row_indexes",
+    )
+
+    def __init__(self, component_names: Iterable[str] = ()):
+        self.components = NameTable(["", *component_names])
+        self.pins = NameTable()
+
+        self.source_components = array("I")
+        self.source_pins = array("I")
+        self.destination_components = array("I")
+        self.destination_pins = array("I")
+
+        # The source location of each connection, NO_LINE if it has none.
+        self.lines = array("I")
+        self.columns = array("I")
+
+        # The row of each connection by its packed key, built the first time a connection is looked up.
+        self.row_indexes: dict[int, int] | None = None
+
+    def __len__(self) -> int:
+        return len(self.source_components)
+
+    def append(
+        self,
+        source_component: int,
+        source_pin: int,
+        destination_component: int,
+        destination_pin: int,
+        location: SourceLocation | None = None,
+    ) -> None:
+        if self.row_indexes is not None:
+            self.row_indexes[
+                pack_connection(
+                    source_component, source_pin, destination_component, destination_pin
+                )
+            ] = len(self.source_components)
+        self.source_components.append(source_component)
+        self.source_pins.append(source_pin)
+        self.destination_components.append(destination_component)
+        self.destination_pins.append(destination_pin)
+        if location is None:
+            self.lines.append(NO_LINE)
+            self.columns.append(0)
+        else:
+            self.lines.append(location.line)
+            self.columns.append(location.column)
+
+    def row_key(self, index: int) -> int:
+        return pack_connection(
+            self.source_components[index],
+            self.source_pins[index],
+            self.destination_components[index],
+            self.destination_pins[index],
+        )
+
+    def remove(self, index: int) -> None:
+        """
+        Remove a connection by moving the last connection into its place.
+        """
+        row_indexes = self.row_indexes
+        if row_indexes is not None:
+            del row_indexes[self.row_key(index)]
+            last = len(self) - 1
+            if index != last:
+                row_indexes[self.row_key(last)] = index
+
+        for column in (
+            self.source_components,
+            self.source_pins,
+            self.destination_components,
+            self.destination_pins,
+            self.lines,
+            self.columns,
+        ):
+            column[index] = column[-1]
+            del column[-1]
+
+    def find(
+        self,
+        source_component: int,
+        source_pin: int,
+        destination_component: int,
+        destination_pin: int,
+    ) -> int | None:
+        """
+        Find the index of a connection, or None if the table does not contain it.
+        """
+        if self.row_indexes is None:
+            self.row_indexes = {
+                self.row_key(index): index for index in range(len(self))
+            }
+        return self.row_indexes.get(
+            pack_connection(
+                source_component, source_pin, destination_component, destination_pin
+            )
+        )
+
+    def location(self, index: int) -> SourceLocation | None:
+        if self.lines[index] == NO_LINE:
+            return None
+        return SourceLocation(self.lines[index], self.columns[index])
+
+    # Conversion from and to the front-end types.
+
+    def source_component_index(
+        self, component: SchematicComponentId | SchematicInput
+    ) -> int:
+        if isinstance(component, SchematicInput):
+            return BOUNDARY
+        return self.components.intern(component)
+
+    def destination_component_index(
+        self, component: SchematicComponentId | SchematicOutput
+    ) -> int:
+        if isinstance(component, SchematicOutput):
+            return BOUNDARY
+        return self.components.intern(component)
+
+    def connection_indexes(self, connection: Connection) -> tuple[int, int, int, int]:
+        return (
+            self.source_component_index(connection.source.component),
+            self.pins.intern(connection.source.pin),
+            self.destination_component_index(connection.destination.component),
+            self.pins.intern(connection.destination.pin),
+        )
+
+    def source_component(self, index: int) -> SchematicComponentId | SchematicInput:
+        component = self.source_components[index]
+        if component == BOUNDARY:
+            return SchematicInput()
+        return SchematicComponentId(self.components.names[component])
+
+    def destination_component(
+        self, index: int
+    ) -> SchematicComponentId | SchematicOutput:
+        component = self.destination_components[index]
+        if component == BOUNDARY:
+            return SchematicOutput()
+        return SchematicComponentId(self.components.names[component])
+
+    def connection(self, index: int) -> Connection:
+        """
+        Build the Connection object of a single connection.
+        """
+        return Connection(
+            OutputAttachmentPoint(
+                self.source_component(index),
+                OutputPinId(self.pins.names[self.source_pins[index]]),
+            ),
+            InputAttachmentPoint(
+                self.destination_component(index),
+                InputPinId(self.pins.names[self.destination_pins[index]]),
+            ),
+            self.location(index),
+        )
+
+    def __iter__(self) -> Iterator[Connection]:
+        for index in range(len(self)):
+            yield self.connection(index)
+
+    def iter_names(
+        self,
+    ) -> Iterator[tuple[tuple[str, str], tuple[str, str], SourceLocation | None]]:
+        """
+        Yield every connection as the component and pin names of an mhrd wire and its location.
+        """
+        component_names = self.components.names
+        pin_names = self.pins.names
+        for index in range(len(self)):
+            source_component = self.source_components[index]
+            destination_component = self.destination_components[index]
+            yield (
+                (
+                    component_names[source_component]
+                    if source_component != BOUNDARY
+                    else INPUT_NAME,
+                    pin_names[self.source_pins[index]],
+                ),
+                (
+                    component_names[destination_component]
+                    if destination_component != BOUNDARY
+                    else OUTPUT_NAME,
+                    pin_names[self.destination_pins[index]],
+                ),
+                self.location(index),
+            )
+
+
+def build_connection_table(
+    component_names: Iterable[str],
+    connection_tuples: Iterable[tuple[tuple[str, str], tuple[str, str]]],
+    connection_locations: list[SourceLocation] | None = None,
+) -> ConnectionTable:
+    """
+    Build a connection table from the names of mhrd wires.
+    Duplicate wires are only stored once.
+    """
+    table = ConnectionTable(component_names)
+    components = table.components
+    pins = table.pins
+
+    connection_tuples = list(connection_tuples)
+
+    # Intern the wires a column at a time. The columns are plain lists of ints,
+    # so no per-connection containers are left for the garbage collector to track.
+    source_components = [
+        BOUNDARY if source[0] == INPUT_NAME else components[source[0]]
+        for source, _ in connection_tuples
+    ]
+    source_pins = [pins[source[1]] for source, _ in connection_tuples]
+    destination_components = [
+        BOUNDARY if destination[0] == OUTPUT_NAME else components[destination[0]]
+        for _, destination in connection_tuples
+    ]
+    destination_pins = [pins[destination[1]] for _, destination in connection_tuples]
+
+    if connection_locations:
+        lines = [location.line for location in connection_locations]
+        columns = [location.column for location in connection_locations]
+    else:
+        lines = [NO_LINE] * len(connection_tuples)
+        columns = [0] * len(connection_tuples)
+
+    # Like a set of connections, keep only the first of any duplicate connections.
+    # Each connection is packed into a single int so they compare without tuple hashing.
+    component_count = len(components)
+    pin_count = len(pins)
+    keys = [
+        (
+            (source_component * pin_count + source_pin) * component_count
+            + destination_component
+        )
+        * pin_count
+        + destination_pin
+        for source_component, source_pin, destination_component, destination_pin in zip(
+            source_components, source_pins, destination_components, destination_pins
+        )
+    ]
+    if len(set(keys)) != len(keys):
+        seen: set[int] = set()
+        kept = [
+            index
+            for index, key in enumerate(keys)
+            if not (key in seen or seen.add(key))  # type: ignore
+        ]
+        source_components = [source_components[index] for index in kept]
+        source_pins = [source_pins[index] for index in kept]
+        destination_components = [destination_components[index] for index in kept]
+        destination_pins = [destination_pins[index] for index in kept]
+        lines = [lines[index] for index in kept]
+        columns = [columns[index] for index in kept]
+
+    table.source_components.extend(source_components)
+    table.source_pins.extend(source_pins)
+    table.destination_components.extend(destination_components)
+    table.destination_pins.extend(destination_pins)
+    table.lines.extend(lines)
+    table.columns.extend(columns)
+
+    return table
@@ -0,0 +1,184 @@
+"""
+Parallel stuck-at fault simulation, grading how many faults a set of input vectors detects.
+
+A stuck-at fault holds one wire of a flattened netlist at 0 or 1. Every input vector is evaluated
+for the fault free circuit and every remaining faulty copy of it in a single pass over the gates:
+bit 0 of each wire is the fault free signal and bit i the signal with the i-th remaining fault.
+A fault is detected once any output differs from the fault free one, and is then dropped,
+so later vectors only carry the faults still undetected.
+"""
+from schematic_types import *
+from netlist import Netlist
+from batch import check_batch_pins
+
+from dataclasses import dataclass
+from typing import Iterable, Mapping
+
+
+@dataclass(frozen=True)
+class Fault:
+    """
+    A wire of a netlist held at a constant signal.
+    """
+
+    wire: int
+    stuck_at: bool
+
+    # The input pin or gate driving the wire, for reports.
+    site: str
+
+    def __str__(self) -> str:
+        return f"{self.site} stuck at {int(self.stuck_at)}"
+
+
+@dataclass
+class FaultSimulationReport:
+    """
+    The faults detected by a set of input vectors.
+    """
+
+    schematic_id: SchematicId
+
+    # Every fault simulated, in the order they were enumerated.
+    faults: list[Fault]
+
+    # The index of the first input vector detecting each detected fault.
+    detections: dict[Fault, int]
+
+    # The number of input vectors simulated before every fault was detected or the vectors ran out.
+    vector_count: int
+
+    @property
+    def undetected(self) -> list[Fault]:
+        return [fault for fault in self.faults if fault not in self.detections]
+
+    @property
+    def coverage(self) -> float:
+        """
+        The percentage of the faults detected.
+        """
+        if not self.faults:
+            return 100.0
+        return 100.0 * len(self.detections) / len(self.faults)
+
+    def __str__(self) -> str:
+        return (
+            f"{self.schematic_id}: {len(self.detections)} of {len(self.faults)} faults detected "
+            f"by {self.vector_count} vectors ({self.coverage:.2f}% coverage)"
+        )
+
+
+def wire_sites(netlist: Netlist) -> list[str]:
+    """
+    Name the driver of every wire: an input pin, or a gate and the output pins it drives.
+    """
+    sites = [f"input.{pin}" for pin in netlist.input_pins]
+    sites.extend(f"gate{index}" for index in range(len(netlist.gates)))
+
+    input_count = len(netlist.input_pins)
+    for pin, wire in zip(netlist.output_pins, netlist.output_wires):
+        if wire >= input_count:
+            sites[wire] += f" -> output.{pin}"
+    return sites
+
+
+def enumerate_faults(netlist: Netlist) -> list[Fault]:
+    """
+    A stuck-at-0 and a stuck-at-1 fault on every wire of a netlist.
+    """
+    return [
+        Fault(wire, stuck_at, site)
+        for wire, site in enumerate(wire_sites(netlist))
+        for stuck_at in (False, True)
+    ]
+
+
+def pack_faults(faults: list[Fault]) -> dict[int, tuple[int, int]]:
+    """
+    Assign fault i to bit i + 1 of every wire.
+    Returns, for each faulty wire, the bits to clear and then set to force the faulty signals.
+    """
+    lanes: dict[int, list[int]] = {}
+    for lane, fault in enumerate(faults, 1):
+        bits = lanes.setdefault(fault.wire, [0, 0])
+        bit = 1 << lane
+        bits[0] |= bit
+        if fault.stuck_at:
+            bits[1] |= bit
+    return {wire: (~forced, ones) for wire, (forced, ones) in lanes.items()}
+
+
+def simulate_netlist_faults(
+    netlist: Netlist,
+    input_vectors: Iterable[Mapping[OutputPinId, bool]],
+    faults: list[Fault] | None = None,
+) -> FaultSimulationReport:
+    """
+    Simulate every fault, all the faults of a netlist by default, over the input vectors in order.
+    Stops early once every fault is detected.
+    """
+    if faults is None:
+        faults = enumerate_faults(netlist)
+
+    input_pins = netlist.input_pins
+    input_count = len(input_pins)
+    gates = netlist.gates
+    output_wires = netlist.output_wires
+
+    remaining = list(faults)
+    detections: dict[Fault, int] = {}
+    vector_count = 0
+
+    mask = (1 << len(remaining) + 1) - 1
+    forces = pack_faults(remaining)
+    input_forces = [
+        (wire, forces[wire]) for wire in range(input_count) if wire in forces
+    ]
+
+    for index, input_signals in enumerate(input_vectors):
+        if not remaining:
+            break
+        check_batch_pins(netlist, input_signals, index)
+        vector_count += 1
+
+        wires = [mask if input_signals[pin] else 0 for pin in input_pins]
+        for wire, (keep, ones) in input_forces:
+            wires[wire] = wires[wire] & keep | ones
+
+        for out, (in1, in2) in enumerate(gates, input_count):
+            signal = ~(wires[in1] & wires[in2]) & mask
+            force = forces.get(out)
+            if force is not None:
+                signal = signal & force[0] | force[1]
+            wires.append(signal)
+
+        # The faulty copies whose outputs differ from the fault free bit 0.
+        detected = 0
+        for wire in output_wires:
+            signal = wires[wire]
+            detected |= signal ^ mask if signal & 1 else signal
+        if not detected:
+            continue
+
+        # Reading the bits from a string is linear, shifting the int for each bit is not.
+        detected_bits = bin(detected)[:1:-1]
+        still_undetected: list[Fault] = []
+        for lane, fault in enumerate(remaining, 1):
+            if lane < len(detected_bits) and detected_bits[lane] == "1":
+                detections[fault] = index
+            else:
+                still_undetected.append(fault)
+        remaining = still_undetected
+
+        mask = (1 << len(remaining) + 1) - 1
+        forces = pack_faults(remaining)
+        input_forces = [
+            (wire, forces[wire]) for wire in range(input_count) if wire in forces
+        ]
+
+    return FaultSimulationReport(
+        schematic_id=netlist.schematic_id,
+        faults=list(faults),
+        detections=detections,
+        vector_count=vector_count,
+    )
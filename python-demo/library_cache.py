@@ -0,0 +1,223 @@
+"""
+Persistent on-disk cache of parsed schematics and their flattened netlists.
+
+Parsed schematics are keyed by a hash of the mhrd source they were parsed from.
+Netlists are keyed by a hash of the schematic and the keys of every schematic it depends on,
+so changing a part only invalidates the netlists of the schematics using it.
+Netlists are stored with the report of their optimization, so it survives a cache hit.
+"""
+from __future__ import annotations
+
+from schematic_types import *
+from schematic import Schematic, build_schematic
+from netlist import Netlist
+from optimize import OptimizationReport
+
+from array import array
+from dataclasses import astuple
+from typing import TYPE_CHECKING, Callable, TypeVar
+import hashlib
+import os
+import pickle
+import sys
+
+if TYPE_CHECKING:
+    from schematic_library import SchematicLibrary
+
+T = TypeVar("T")
+
+
+# Bump this whenever the serialized formats or the flattening change.
+CACHE_VERSION = f"2-{sys.version_info.major}.{sys.version_info.minor}"
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(CACHE_VERSION.encode() + data).hexdigest()
+
+
+def schematic_to_data(schematic: Schematic, include_locations: bool = True) -> tuple:
+    """
+    Convert a schematic into plain python data, in a canonical order.
+    """
+    connections = sorted(
+        (
+            source,
+            destination,
+            (location.line, location.column)
+            if location is not None and include_locations
+            else None,
+        )
+        for source, destination, location in schematic.connection_table.iter_names()
+    )
+    return (
+        str(schematic.schematic_id),
+        sorted(str(pin) for pin in schematic.input_pins),
+        sorted(str(pin) for pin in schematic.output_pins),
+        sorted((str(name), str(type)) for name, type in schematic.components.items()),
+        connections,
+    )
+
+
+def schematic_from_data(data: tuple) -> Schematic:
+    schematic_id, input_pins, output_pins, components, connections = data
+
+    locations = [location for _, _, location in connections]
+    return build_schematic(
+        schematic_id,
+        input_pins,
+        output_pins,
+        components,
+        [(source, destination) for source, destination, _ in connections],
+        [SourceLocation(*location) for location in locations]
+        if all(location is not None for location in locations)
+        else None,
+    )
+
+
+def netlist_to_data(netlist: Netlist) -> tuple:
+    gate_wires = array("I")
+    for in1, in2 in netlist.gates:
+        gate_wires.append(in1)
+        gate_wires.append(in2)
+
+    return (
+        str(netlist.schematic_id),
+        [str(pin) for pin in netlist.input_pins],
+        [str(pin) for pin in netlist.output_pins],
+        gate_wires.tobytes(),
+        netlist.output_wires,
+    )
+
+
+def netlist_from_data(data: tuple) -> Netlist:
+    schematic_id, input_pins, output_pins, gate_bytes, output_wires = data
+
+    gate_wires = array("I")
+    gate_wires.frombytes(gate_bytes)
+    return Netlist(
+        schematic_id=SchematicId(schematic_id),
+        input_pins=[PinId(pin) for pin in input_pins],
+        output_pins=[PinId(pin) for pin in output_pins],
+        gates=list(zip(gate_wires[0::2], gate_wires[1::2])),
+        output_wires=output_wires,
+    )
+
+
+def netlist_entry_from_data(
+    data: tuple,
+) -> tuple[Netlist, OptimizationReport | None]:
+    netlist_data, report_data = data
+    report = OptimizationReport(*report_data) if report_data is not None else None
+    return netlist_from_data(netlist_data), report
+
+
+class LibraryCache:
+    """
+    A directory of cached schematics and netlists.
+    """
+
+    def __init__(self, cache_directory: str):
+        self.cache_directory = cache_directory
+        os.makedirs(cache_directory, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+
+    def entry_path(self, kind: str, key: str) -> str:
+        return os.path.join(self.cache_directory, f"{kind}-{key}.pickle")
+
+    def read_entry(self, kind: str, key: str, decode: Callable[[tuple], T]) -> T | None:
+        """
+        Load and decode an entry. Missing, truncated and malformed entries are all misses,
+        so a damaged cache is rebuilt instead of stopping the program.
+        """
+        try:
+            with open(self.entry_path(kind, key), "rb") as f:
+                data = pickle.load(f)
+            entry = decode(data)
+
+        # Data of the wrong shape fails to decode with any kind of exception.
+        except Exception:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entry
+
+    def write_entry(self, kind: str, key: str, data: object) -> None:
+        # Write to a temporary file first so readers never see a partial entry.
+        path = self.entry_path(kind, key)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+
+    def load_schematic(
+        self, mhrd_string: str, parse: Callable[[str], Schematic]
+    ) -> Schematic:
+        """
+        Load the schematic parsed from some mhrd source.
+        The source is only parsed if it has not been parsed before.
+        """
+        key = hash_bytes(mhrd_string.encode())
+        schematic = self.read_entry("schematic", key, schematic_from_data)
+        if schematic is not None:
+            return schematic
+
+        schematic = parse(mhrd_string)
+        self.write_entry("schematic", key, schematic_to_data(schematic))
+        return schematic
+
+    def netlist_key(self, schematic: Schematic, library: SchematicLibrary) -> str:
+        """
+        Hash a schematic together with the hashes of all the schematics it depends on.
+        The hashes are kept on the library until a schematic is invalidated,
+        so only the schematics added or changed since the last lookup are hashed.
+        Netlists of libraries with and without optimization are kept apart.
+        """
+        keys = library.content_hashes
+        # The schematics whose parts are being hashed, to catch a schematic used as its own part.
+        visiting: set[SchematicId] = set()
+
+        def visit(schematic: Schematic) -> str:
+            key = keys.get(schematic.schematic_id)
+            if key is not None:
+                return key
+            if schematic.schematic_id in visiting:
+                raise Exception(
+                    f"Cannot cache the netlist of {schematic.schematic_id}, it is used as a part of itself."
+                )
+
+            visiting.add(schematic.schematic_id)
+            dependency_keys = [
+                visit(library.get_schematic(component_schematic_id))
+                for component_schematic_id in sorted(set(schematic.components.values()))
+            ]
+            visiting.discard(schematic.schematic_id)
+            # Locations are left out so moving definitions around in a file keeps the key.
+            data = pickle.dumps(
+                (schematic_to_data(schematic, include_locations=False), dependency_keys)
+            )
+            key = hash_bytes(data)
+            keys[schematic.schematic_id] = key
+            return key
+
+        key = visit(schematic)
+        if library.optimize_netlists:
+            key = hash_bytes(f"optimized-{key}".encode())
+        return key
+
+    def load_netlist(
+        self, key: str
+    ) -> tuple[Netlist, OptimizationReport | None] | None:
+        """
+        Load the netlist stored under a key from netlist_key,
+        with the report of its optimization or None if it was not optimized.
+        """
+        return self.read_entry("netlist", key, netlist_entry_from_data)
+
+    def store_netlist(
+        self, key: str, netlist: Netlist, report: OptimizationReport | None
+    ) -> None:
+        report_data = astuple(report) if report is not None else None
+        self.write_entry("netlist", key, (netlist_to_data(netlist), report_data))
@@ -0,0 +1,48 @@
+"""
+Precomputed truth tables of small schematics, used in place of simulating them gate by gate.
+"""
+from schematic_types import *
+from netlist import Netlist
+from bitslice import exhaustive_input_lanes, simulate_netlist_bitsliced
+
+from dataclasses import dataclass
+
+
+@dataclass
+class LookupTable:
+    """
+    The packed truth table of a schematic.
+    Row r of the table is the row where the input pins, first pin as the most significant bit, spell r.
+    Bit r of each output table is the output signal of row r.
+    """
+
+    schematic_id: SchematicId
+    input_pins: list[PinId]
+    output_pins: list[InputPinId]
+    output_tables: list[int]
+
+    def lookup(self, input_signals: dict[OutputPinId, bool]) -> dict[InputPinId, bool]:
+        row = 0
+        for pin in self.input_pins:
+            row = row << 1 | input_signals[pin]  # type: ignore
+        return {
+            pin: bool(table >> row & 1)
+            for pin, table in zip(self.output_pins, self.output_tables)
+        }
+
+
+def build_lookup_table(netlist: Netlist) -> LookupTable:
+    """
+    Evaluate every row of a netlist in a single bitsliced pass.
+    """
+    row_count = 1 << len(netlist.input_pins)
+    return LookupTable(
+        schematic_id=netlist.schematic_id,
+        input_pins=list(netlist.input_pins),
+        output_pins=[InputPinId(pin) for pin in netlist.output_pins],
+        output_tables=simulate_netlist_bitsliced(
+            netlist,
+            exhaustive_input_lanes(len(netlist.input_pins), 0, row_count),
+            row_count,
+        ),
+    )
@@ -1,16 +1,19 @@
 from mhrd_parser import *
 from schematic_library import SchematicLibrary
+from library_cache import LibraryCache
 
 if __name__ == "__main__":
     import glob
 
-    schematic_library = SchematicLibrary()
+    # Parsed schematics and netlists are cached here between runs.
+    library_cache = LibraryCache(".mhrd-cache")
+    schematic_library = SchematicLibrary(library_cache)
 
     for file in glob.glob("../schematics/**/*.mhrd", recursive=True):
         with open(file, "r") as f:
             print(f"Compiling {file}...")
             try:
-                schematic = parse_mhrd_schematic(f.read())
+                schematic = library_cache.load_schematic(f.read(), parse_mhrd_schematic)
                 schematic_library.add_schematic(schematic)
                 print(f"Success! {schematic.schematic_id} parsed from {file}")
 
@@ -20,6 +23,10 @@ if __name__ == "__main__":
             print()
 
     for schematic in schematic_library.schematics:
+        # Schematics with registers have no truth table, their outputs depend on earlier cycles.
+        if schematic_library.is_sequential(schematic):
+            continue
+
         print(f"Obtaining truth table of {schematic.schematic_id}...")
         truth_table = schematic_library.get_scehematic_truth_table(schematic)
 
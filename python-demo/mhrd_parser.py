@@ -1,154 +1,355 @@
-from typing import Callable
-
+from schematic_types import SourceLocation
 from schematic import Schematic, build_schematic
+from buses import bus_pin
 
+from typing import Callable, TypeVar
+import bisect
+import re
 
-def filter_string(input_string: str, filter_function: Callable[[str], bool]) -> str:
-    output_list = filter(filter_function, input_string)
-    output_string = "".join(output_list)
-    return output_string
-
-
-def string_after_literal(input_string: str, literal: str) -> str | None:
-    """
-    Returns the string after the first occurence of the literal.
-    If the literal is not found, returns None.
-    """
-    literal_index = input_string.find(literal)
-    if literal_index == -1:
-        return None
-
-    index_after_literal = literal_index + len(literal)
-    string_after_literal = input_string[index_after_literal:]
-    return string_after_literal
-
-
-def string_before_literal(input_string: str, literal: str) -> str | None:
-    """
-    Returns the string before the first occurence of the literal.
-    If the literal is not found, returns None.
-    """
-    literal_index = input_string.find(literal)
-    if literal_index == -1:
-        return None
+T = TypeVar("T")
 
-    string_before_literal = input_string[0:literal_index]
-    return string_before_literal
 
-
-def string_between_literals(
-    input_string: str, start_literal: str, stop_literal: str
-) -> str | None:
+class MHRDSyntaxError(Exception):
     """
-    Returns the string between the first occurence of the start literal and the first occurence of the stop literal.
-    If either literal is not found, returns None.
+    An error in the text of an mhrd file, pointing at where it was found.
     """
-    string_after_start = string_after_literal(input_string, start_literal)
-    if string_after_start is None:
-        return None
-
-    string_before_stop = string_before_literal(string_after_start, stop_literal)
-    if string_before_stop is None:
-        return None
-
-    return string_before_stop
-
 
-def parse_name_section(name_section: str) -> str:
-    name = string_between_literals(name_section, '"', '"')
-    if name is None:
-        raise Exception("Name was not found in name section.")
-    return name
+    def __init__(self, message: str, location: SourceLocation):
+        super().__init__(f"{message} ({location})")
+        self.location = location
 
 
-def parse_list(list_string: str) -> list[str]:
-    list_entries = list_string.split(",")
-    return list_entries
+# A token is its text and its offset in the source string.
+# The end of the input is marked with an empty token.
+Token = tuple[str, int]
 
+# A pin of a wire before buses are expanded: the component, the pin,
+# the bit indexes if the pin is indexed, and the token the reference starts at.
+PinReference = tuple[str, str, list[int] | None, Token]
 
-parse_input_section = parse_list
-parse_output_section = parse_list
+# Skips whitespace and captures a single token: an arrow, a range, a string, an identifier or a single character.
+# Identifiers may contain dashes (e.g. MUX2-1) as long as the dash does not start an arrow.
+TOKEN_PATTERN = re.compile(r'\s*(->|\.\.|"[^"\n]*"|\w+(?:-(?!>)\w*)*|\S)')
 
+PUNCTUATION = set(":;,.[]")
 
-def parse_components(components_section: str) -> list[tuple[str, str]]:
-    components: list[tuple[str, str]] = []
-    component_definitions = components_section.split(",")
-    for component in component_definitions:
-        try:
-            component_name, component_type = component.split("->")
 
-        except ValueError:
-            raise Exception("Invalid component definition: " + component)
+def tokenize_mhrd(mhrd_string: str) -> list[Token]:
+    """
+    Split mhrd source into tokens in a single pass.
+    """
+    tokens = [
+        (match.group(1), match.start(1))
+        for match in TOKEN_PATTERN.finditer(mhrd_string)
+    ]
+    tokens.append(("", len(mhrd_string)))
+    return tokens
 
-        components.append((component_name, component_type))
 
-    return components
+def is_identifier(text: str) -> bool:
+    return text != "" and (text[0].isalnum() or text[0] == "_")
 
 
-def parse_connections(
-    connections_section: str,
-) -> list[tuple[tuple[str, str], tuple[str, str]]]:
-    connections: list[tuple[tuple[str, str], tuple[str, str]]] = []
-    connection_definitions = connections_section.split(",")
+def describe_token(text: str) -> str:
+    return repr(text) if text else "end of file"
 
-    for connection_definition in connection_definitions:
-        try:
-            source, destination = connection_definition.split("->")
-            source_name, source_pin = source.split(".")
-            destination_name, destination_pin = destination.split(".")
 
-        except ValueError:
-            raise Exception("Invalid connection definition: " + connection_definition)
+class MHRDParser:
+    """
+    Recursive descent parser for the mhrd grammar.
+
+        schematic  := section*
+        section    := "Name" ":" string ";"
+                    | ("Inputs" | "Outputs") ":" [pin ("," pin)*] ";"
+                    | "Parts" ":" [part ("," part)*] ";"
+                    | "Wires" ":" [wire ("," wire)*] ";"
+        pin        := identifier ["[" number "]"]
+        part       := identifier "->" identifier
+        wire       := reference "->" reference
+        reference  := identifier "." identifier ["[" number [".." number] "]"]
+
+    A pin declared as a[32] is a bus of the bit pins a[0] to a[31].
+    Wires between ranges of bits, like input.a[0..31] -> adder.a[0..31], connect the bits pairwise.
+    A bus of the schematic itself may be wired without a range to connect all of its bits,
+    to a range or to the bits of a part pin of the same name, and a single bit may be wired
+    to a range to drive every bit of it.
+    """
 
-        connections.append(
-            ((source_name, source_pin), (destination_name, destination_pin))
+    SECTIONS = ("Name", "Inputs", "Outputs", "Parts", "Wires")
+
+    def __init__(self, mhrd_string: str):
+        self.tokens = tokenize_mhrd(mhrd_string)
+        self.position = 0
+
+        # The offset of every line break, used to turn token offsets into locations.
+        self.line_breaks = [match.start() for match in re.finditer("\n", mhrd_string)]
+
+        self.name = ""
+        self.input_pins: list[str] = []
+        self.output_pins: list[str] = []
+        self.components: list[tuple[str, str]] = []
+        self.connections: list[tuple[tuple[str, str], tuple[str, str]]] = []
+        self.connection_locations: list[SourceLocation] = []
+
+        # The wires as written, expanded into connections once the buses are all declared.
+        self.wires: list[tuple[PinReference, PinReference]] = []
+
+        # The width of every bus declared in the Inputs and Outputs sections.
+        self.input_buses: dict[str, int] = {}
+        self.output_buses: dict[str, int] = {}
+
+        self.seen_sections: set[str] = set()
+
+    def location(self, token: Token) -> SourceLocation:
+        offset = token[1]
+        line_index = bisect.bisect_left(self.line_breaks, offset)
+        line_start = self.line_breaks[line_index - 1] + 1 if line_index > 0 else 0
+        return SourceLocation(line_index + 1, offset - line_start + 1)
+
+    def error(self, message: str, token: Token) -> MHRDSyntaxError:
+        return MHRDSyntaxError(message, self.location(token))
+
+    def peek(self) -> str:
+        return self.tokens[self.position][0]
+
+    def expect(self, text: str) -> Token:
+        token = self.tokens[self.position]
+        if token[0] != text:
+            raise self.error(
+                f"Expected {text!r} but found {describe_token(token[0])}", token
+            )
+        self.position += 1
+        return token
+
+    def parse(self) -> Schematic:
+        while self.peek() != "":
+            self.parse_section()
+
+        for section in self.SECTIONS:
+            if section not in self.seen_sections:
+                raise self.error(
+                    f"{section} section not found", self.tokens[self.position]
+                )
+
+        for source, destination in self.wires:
+            self.expand_wire(source, destination)
+
+        return build_schematic(
+            self.name,
+            self.input_pins,
+            self.output_pins,
+            self.components,
+            self.connections,
+            self.connection_locations,
         )
 
-    return connections
-
-
-def parse_mhrd_schematic(mhrd_string: str) -> Schematic:
-    clean_text = filter_string(mhrd_string, (lambda c: not c.isspace()))
-
-    # parse name
-    name_section = string_between_literals(clean_text, "Name:", ";")
-    if name_section is None:
-        raise Exception("Name section not found!")
-
-    schematic_name = parse_name_section(name_section)
-
-    # Parse inputs
-    input_section = string_between_literals(clean_text, "Inputs:", ";")
-    if input_section is None:
-        raise Exception("Inputs section not found!")
-
-    schematic_input_pins = parse_input_section(input_section)
-
-    # Parse outputs
-    output_section = string_between_literals(clean_text, "Outputs:", ";")
-    if output_section is None:
-        raise Exception("Outputs section not found!")
-
-    schematic_output_pins = parse_output_section(output_section)
-
-    # Parse components.
-    component_section = string_between_literals(clean_text, "Parts:", ";")
-    if component_section is None:
-        raise Exception("Components section not found!")
-
-    schematic_components = parse_components(component_section)
+    def parse_section(self) -> None:
+        header = self.tokens[self.position]
+        section = self.parse_identifier()
+        if section not in self.SECTIONS:
+            raise self.error(f"Unknown section {section!r}", header)
+
+        if section in self.seen_sections:
+            raise self.error(f"Duplicate {section} section", header)
+        self.seen_sections.add(section)
+
+        self.expect(":")
+
+        if section == "Name":
+            self.name = self.parse_string()
+
+        elif section == "Inputs":
+            self.input_pins = self.parse_pin_declarations(self.input_buses)
+
+        elif section == "Outputs":
+            self.output_pins = self.parse_pin_declarations(self.output_buses)
+
+        elif section == "Parts":
+            self.components = self.parse_list(self.parse_part)
+
+        else:
+            self.wires = self.parse_list(self.parse_wire)
+
+        self.expect(";")
+
+    def parse_list(self, parse_entry: Callable[[], T]) -> list[T]:
+        entries: list[T] = []
+        if self.peek() == ";":
+            return entries
+
+        entries.append(parse_entry())
+        while self.peek() == ",":
+            self.position += 1
+            entries.append(parse_entry())
+
+        return entries
+
+    def parse_string(self) -> str:
+        token = self.tokens[self.position]
+        if len(token[0]) < 2 or not token[0].startswith('"'):
+            raise self.error(
+                f"Expected a string but found {describe_token(token[0])}", token
+            )
+        self.position += 1
+        return token[0][1:-1]
+
+    def parse_identifier(self) -> str:
+        token = self.tokens[self.position]
+        if not is_identifier(token[0]):
+            if token[0] and token[0] not in PUNCTUATION and token[0] != "->":
+                raise self.error(f"Unexpected character {token[0]!r}", token)
+            raise self.error(
+                f"Expected an identifier but found {describe_token(token[0])}", token
+            )
+        self.position += 1
+        return token[0]
+
+    def parse_number(self) -> int:
+        token = self.tokens[self.position]
+        if not token[0].isdigit():
+            raise self.error(
+                f"Expected a number but found {describe_token(token[0])}", token
+            )
+        self.position += 1
+        return int(token[0])
+
+    def parse_pin_declarations(self, buses: dict[str, int]) -> list[str]:
+        """
+        Parse a list of pins, expanding each bus into its bits.
+        """
+        pins: list[str] = []
+        declared: set[str] = set()
+        for name, width, token in self.parse_list(self.parse_pin_declaration):
+            # A name declared both as a pin and as a bus would leave wires to it ambiguous.
+            if name in declared:
+                raise self.error(f"Pin {name} is declared more than once", token)
+            declared.add(name)
+
+            if width is None:
+                pins.append(name)
+                continue
+
+            if width == 0:
+                raise self.error(f"Bus {name} must be at least one bit wide", token)
+            buses[name] = width
+            pins.extend(bus_pin(name, index) for index in range(width))
+        return pins
+
+    def parse_pin_declaration(self) -> tuple[str, int | None, Token]:
+        token = self.tokens[self.position]
+        name = self.parse_identifier()
+        if self.peek() != "[":
+            return (name, None, token)
+
+        self.position += 1
+        width = self.parse_number()
+        self.expect("]")
+        return (name, width, token)
+
+    def parse_part(self) -> tuple[str, str]:
+        component_name = self.parse_identifier()
+        self.expect("->")
+        component_type = self.parse_identifier()
+        return (component_name, component_type)
+
+    def parse_pin_reference(self) -> PinReference:
+        token = self.tokens[self.position]
+        component_name = self.parse_identifier()
+        self.expect(".")
+        pin_name = self.parse_identifier()
+        if self.peek() != "[":
+            return (component_name, pin_name, None, token)
+
+        self.position += 1
+        first = self.parse_number()
+        last = first
+        if self.peek() == "..":
+            self.position += 1
+            last = self.parse_number()
+        self.expect("]")
+
+        step = 1 if last >= first else -1
+        return (component_name, pin_name, list(range(first, last + step, step)), token)
+
+    def parse_wire(self) -> tuple[PinReference, PinReference]:
+        source = self.parse_pin_reference()
+        self.expect("->")
+        destination = self.parse_pin_reference()
+        return (source, destination)
+
+    def bus_width(self, reference: PinReference) -> int | None:
+        """
+        The width of the bus of the schematic itself a reference names, if it names one.
+        """
+        component_name, pin_name, _, _ = reference
+        if component_name == "input":
+            return self.input_buses.get(pin_name)
+        if component_name == "output":
+            return self.output_buses.get(pin_name)
+        return None
 
-    # Parse connections.
-    connection_section = string_between_literals(clean_text, "Wires:", ";")
-    if connection_section is None:
-        raise Exception("Connections section not found!")
+    def reference_bits(self, reference: PinReference) -> list[str] | None:
+        """
+        The pin names of the bits a reference covers, or None for a single bit pin of a part.
+        """
+        component_name, pin_name, indexes, _ = reference
+        if indexes is None:
+            width = self.bus_width(reference)
+            if width is None:
+                # A pin of the schematic itself that is not a bus is a single bit.
+                if component_name in ("input", "output"):
+                    return [pin_name]
+                return None
+            indexes = list(range(width))
+        return [bus_pin(pin_name, index) for index in indexes]
+
+    def expand_wire(self, source: PinReference, destination: PinReference) -> None:
+        """
+        Add the connections of a wire, one per bit.
+        """
+        source_bits = self.reference_bits(source)
+        destination_bits = self.reference_bits(destination)
+        location = self.location(source[3])
+
+        if source_bits is None and destination_bits is None:
+            self.connections.append(
+                ((source[0], source[1]), (destination[0], destination[1]))
+            )
+            self.connection_locations.append(location)
+            return
+
+        # A whole bus wired to a part pin without a range is wired to the same bits of the part.
+        if source_bits is None:
+            if destination[2] is None and self.bus_width(destination) is not None:
+                source_bits = [
+                    bus_pin(source[1], index)
+                    for index in range(len(destination_bits))  # type: ignore
+                ]
+            else:
+                source_bits = [source[1]]
+        elif destination_bits is None:
+            if source[2] is None and self.bus_width(source) is not None:
+                destination_bits = [
+                    bus_pin(destination[1], index) for index in range(len(source_bits))
+                ]
+            else:
+                destination_bits = [destination[1]]
+
+        # A single bit may drive a whole range.
+        if len(source_bits) == 1:
+            source_bits = source_bits * len(destination_bits)
+        if len(source_bits) != len(destination_bits):
+            raise self.error(
+                f"Cannot wire {len(source_bits)} bits to {len(destination_bits)} bits",
+                source[3],
+            )
+
+        for source_bit, destination_bit in zip(source_bits, destination_bits):
+            self.connections.append(
+                ((source[0], source_bit), (destination[0], destination_bit))
+            )
+            self.connection_locations.append(location)
 
-    schematic_connections = parse_connections(connection_section)
 
-    return build_schematic(
-        schematic_name,
-        schematic_input_pins,
-        schematic_output_pins,
-        schematic_components,
-        schematic_connections,
-    )
+def parse_mhrd_schematic(mhrd_string: str) -> Schematic:
+    return MHRDParser(mhrd_string).parse()
@@ -0,0 +1,305 @@
+"""
+Flattening of hierarchical schematics into a levelized netlist of NAND gates.
+"""
+from __future__ import annotations
+
+from schematic_types import *
+from schematic import Schematic
+from connection_table import BOUNDARY
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from schematic_library import SchematicLibrary
+
+
+@dataclass
+class Netlist:
+    """
+    A schematic flattened down to primitive NAND gates.
+
+    Every signal in the netlist is a wire identified by an integer.
+    Wires 0..len(input_pins)-1 carry the schematic inputs in the order of input_pins.
+    Gate i reads the wires gates[i] and drives wire len(input_pins) + i.
+    The gates are sorted topologically so they can be evaluated in a single pass.
+    """
+
+    # The schematic this netlist was flattened from.
+    schematic_id: SchematicId
+
+    # The input and output pins of the schematic in wire order.
+    input_pins: list[PinId]
+    output_pins: list[PinId]
+
+    # The two input wires of each NAND gate.
+    gates: list[tuple[int, int]]
+
+    # The wire driving each output pin, in the order of output_pins.
+    output_wires: list[int]
+
+    @property
+    def wire_count(self) -> int:
+        return len(self.input_pins) + len(self.gates)
+
+
+class NetlistBuilder:
+    """
+    Collects NAND gates while a schematic hierarchy is being walked.
+
+    Child output pins are allocated placeholder wires before the child is flattened,
+    so siblings can be wired together in any order.
+    The placeholders are aliased to the real wires once the child has been flattened.
+    """
+
+    def __init__(self):
+        self.wire_count = 0
+        self.gates: list[tuple[int, int, int]] = []
+        self.aliases: dict[int, int] = {}
+
+        # The d input and q output wire of every DFF register.
+        self.registers: list[tuple[int, int]] = []
+
+    def new_wire(self) -> int:
+        wire = self.wire_count
+        self.wire_count += 1
+        return wire
+
+    def add_gate(self, in1: int, in2: int) -> int:
+        out = self.new_wire()
+        self.gates.append((in1, in2, out))
+        return out
+
+    def add_register(self, d: int) -> int:
+        q = self.new_wire()
+        self.registers.append((d, q))
+        return q
+
+    def alias(self, wire: int, target: int) -> None:
+        self.aliases[wire] = target
+
+    def resolve(self, wire: int) -> int:
+        """
+        Follow the alias chain of a wire to the wire that actually drives it.
+        """
+        seen: set[int] = set()
+        while wire in self.aliases:
+            if wire in seen:
+                raise Exception("Circular connection found while flattening schematic.")
+            seen.add(wire)
+            wire = self.aliases[wire]
+        return wire
+
+
+def flatten_into(
+    builder: NetlistBuilder,
+    schematic: Schematic,
+    input_wires: dict[PinId, int],
+    library: SchematicLibrary,
+) -> dict[PinId, int]:
+    """
+    Emit the gates of a schematic into the builder.
+    Returns the wire driving each output pin of the schematic.
+    """
+    if schematic.schematic_id == SchematicId("NAND"):
+        out = builder.add_gate(input_wires[PinId("in1")], input_wires[PinId("in2")])
+        return {PinId("out"): out}
+
+    # The q output of a register is a wire of its own, cut off from the d input.
+    if schematic.schematic_id == SchematicId("DFF"):
+        return {PinId("q"): builder.add_register(input_wires[PinId("d")])}
+
+    # Work on the interned indexes of the connection table, so no hashing of names is needed per connection.
+    table = schematic.connection_table
+    component_names = table.components.names
+    pin_names = table.pins.names
+    pin_ids = [PinId(pin) for pin in pin_names]
+    pin_count = len(pin_names)
+
+    # The schematic of each component index, None for the boundary and unknown components.
+    component_indexes = [
+        table.components.intern(component_id) for component_id in schematic.components
+    ]
+    components: list[Schematic | None] = [None] * len(component_names)
+    for component_index, component_schematic_id in zip(
+        component_indexes, schematic.components.values()
+    ):
+        component_schematic = library.get_schematic_or_none(component_schematic_id)
+        if component_schematic is None:
+            raise Exception(
+                f"Schematic {component_schematic_id} required for {schematic.schematic_id} was not found in library."
+            )
+        components[component_index] = component_schematic
+
+    # Allocate a placeholder wire for every output pin of every child component,
+    # keyed by component index * pin_count + pin index.
+    component_output_wires: dict[int, int] = {}
+    for component_index, component_schematic in enumerate(components):
+        if component_schematic is None:
+            continue
+        for pin in component_schematic.output_pins:
+            pin_index = table.pins.get(pin)
+            if pin_index is not None:
+                component_output_wires[
+                    component_index * pin_count + pin_index
+                ] = builder.new_wire()
+
+    # The wire of each schematic input by pin index.
+    boundary_input_wires = [input_wires.get(pin) for pin in pin_ids]
+
+    # Route the wires into each child component and out of the schematic.
+    component_input_wires: list[dict[PinId, int]] = [{} for _ in components]
+    output_wires: dict[PinId, int] = {}
+    for source_component, source_pin, destination_component, destination_pin in zip(
+        table.source_components,
+        table.source_pins,
+        table.destination_components,
+        table.destination_pins,
+    ):
+        if source_component == BOUNDARY:
+            wire = boundary_input_wires[source_pin]
+        else:
+            wire = component_output_wires.get(source_component * pin_count + source_pin)
+        if wire is None:
+            source = (
+                "input"
+                if source_component == BOUNDARY
+                else component_names[source_component]
+            )
+            raise Exception(
+                f"Connection from unknown pin {source}.{pin_names[source_pin]} in {schematic.schematic_id}"
+            )
+
+        if destination_component == BOUNDARY:
+            output_wires[pin_ids[destination_pin]] = wire
+        elif components[destination_component] is not None:
+            component_input_wires[destination_component][
+                pin_ids[destination_pin]
+            ] = wire
+        else:
+            raise Exception(
+                f"Connection to unknown component {component_names[destination_component]} in {schematic.schematic_id}"
+            )
+
+    # Flatten each child and bind its placeholder wires to the real ones.
+    for component_index, component_schematic in enumerate(components):
+        if component_schematic is None:
+            continue
+
+        component_id = component_names[component_index]
+        child_input_wires = component_input_wires[component_index]
+        for pin in component_schematic.input_pins:
+            if pin not in child_input_wires:
+                raise Exception(
+                    f"Input pin {component_id}.{pin} is not connected in {schematic.schematic_id}"
+                )
+
+        child_output_wires = flatten_into(
+            builder, component_schematic, child_input_wires, library
+        )
+        for pin, wire in child_output_wires.items():
+            pin_index = table.pins.get(pin)
+            if pin_index is not None:
+                builder.alias(
+                    component_output_wires[component_index * pin_count + pin_index],
+                    wire,
+                )
+
+    for pin in schematic.output_pins:
+        if pin not in output_wires:
+            raise Exception(
+                f"Output pin {pin} is not connected in {schematic.schematic_id}"
+            )
+
+    return output_wires
+
+
+def levelize(
+    builder: NetlistBuilder, input_wires: list[int], output_wires: list[int]
+) -> tuple[list[tuple[int, int]], list[int]]:
+    """
+    Sort the collected gates topologically and renumber the wires densely.
+    Returns the renumbered gates and output wires.
+    """
+    gates = [
+        (builder.resolve(in1), builder.resolve(in2), out)
+        for in1, in2, out in builder.gates
+    ]
+
+    # Kahn's algorithm over the gates, keyed by the wire each gate drives.
+    renumbered: dict[int, int] = {wire: index for index, wire in enumerate(input_wires)}
+    waiting: dict[int, list[int]] = {}
+    pending_inputs: list[int] = []
+    ready: list[int] = []
+    for gate_index, (in1, in2, _) in enumerate(gates):
+        pending = len({in1, in2} - renumbered.keys())
+        pending_inputs.append(pending)
+        if pending == 0:
+            ready.append(gate_index)
+        for wire in {in1, in2} - renumbered.keys():
+            waiting.setdefault(wire, []).append(gate_index)
+
+    sorted_gates: list[tuple[int, int]] = []
+    while ready:
+        gate_index = ready.pop()
+        in1, in2, out = gates[gate_index]
+        sorted_gates.append((renumbered[in1], renumbered[in2]))
+        renumbered[out] = len(input_wires) + len(sorted_gates) - 1
+
+        for dependant in waiting.pop(out, []):
+            pending_inputs[dependant] -= 1
+            if pending_inputs[dependant] == 0:
+                ready.append(dependant)
+
+    if len(sorted_gates) != len(gates):
+        raise Exception("Circular connection found while flattening schematic.")
+
+    return sorted_gates, [renumbered[builder.resolve(wire)] for wire in output_wires]
+
+
+def flatten_schematic(schematic: Schematic, library: SchematicLibrary) -> Netlist:
+    """
+    Flatten a schematic and all of its children into a levelized NAND netlist.
+    The pins are sorted by name, so the wire of each pin does not depend on set iteration order.
+    """
+    builder = NetlistBuilder()
+
+    input_pins = sorted(schematic.input_pins)
+    output_pins = sorted(schematic.output_pins)
+    input_wires = {pin: builder.new_wire() for pin in input_pins}
+
+    output_wires = flatten_into(builder, schematic, input_wires, library)
+    if builder.registers:
+        raise Exception(
+            f"Schematic {schematic.schematic_id} holds state in DFF registers and can only be simulated cycle by cycle."
+        )
+
+    gates, levelized_output_wires = levelize(
+        builder,
+        [input_wires[pin] for pin in input_pins],
+        [output_wires[pin] for pin in output_pins],
+    )
+
+    return Netlist(
+        schematic_id=schematic.schematic_id,
+        input_pins=input_pins,
+        output_pins=output_pins,
+        gates=gates,
+        output_wires=levelized_output_wires,
+    )
+
+
+def simulate_netlist(
+    netlist: Netlist, input_signals: dict[OutputPinId, bool]
+) -> dict[InputPinId, bool]:
+    """
+    Evaluate a netlist for a single set of input signals in one linear pass.
+    """
+    wires = [input_signals[pin] for pin in netlist.input_pins]
+    for in1, in2 in netlist.gates:
+        wires.append(not (wires[in1] and wires[in2]))
+
+    return {
+        InputPinId(pin): wires[wire]
+        for pin, wire in zip(netlist.output_pins, netlist.output_wires)
+    }
@@ -0,0 +1,92 @@
+"""
+Optional NumPy backend for evaluating flattened netlists over arrays of signals.
+
+The backend is only used when NumPy is installed.
+Check NUMPY_AVAILABLE before calling any of the functions in this module.
+"""
+from schematic_types import *
+from netlist import Netlist
+
+from typing import Iterator
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+# The number of truth table rows evaluated per chunk.
+# This bounds the memory used by the intermediate wires of large netlists.
+NUMPY_CHUNK_ROWS = 1 << 16
+
+
+def simulate_netlist_numpy(netlist: Netlist, input_columns: list) -> list:
+    """
+    Evaluate a netlist over columns of signals.
+    input_columns holds one array per input pin in the order of netlist.input_pins.
+    The arrays may either be boolean arrays or uint64 arrays with 64 packed rows per element.
+    Returns one array of the same dtype per output pin in the order of netlist.output_pins.
+    """
+    wires = list(input_columns)
+    for in1, in2 in netlist.gates:
+        wires.append(~(wires[in1] & wires[in2]))
+
+    return [wires[wire] for wire in netlist.output_wires]
+
+
+def exhaustive_input_columns(input_count: int, first_row: int, row_count: int) -> list:
+    """
+    Build the boolean input columns for the rows first_row..first_row+row_count-1 of a truth table.
+    The rows follow the order of itertools.product([False, True], repeat=input_count),
+    so the first input is the most significant bit of the row number.
+    """
+    rows = np.arange(first_row, first_row + row_count, dtype=np.uint64)
+    return [
+        ((rows >> np.uint64(input_count - 1 - input_index)) & np.uint64(1)).astype(
+            np.bool_
+        )
+        for input_index in range(input_count)
+    ]
+
+
+def iter_truth_table_column_chunks(
+    netlist: Netlist, chunk_rows: int = NUMPY_CHUNK_ROWS
+) -> Iterator[tuple[int, list, list]]:
+    """
+    Evaluate the truth table of a netlist as boolean columns, chunk_rows rows at a time.
+    Yields the first row of each chunk, its input columns and its output columns,
+    so only the intermediate wires of a single chunk are held in memory at a time.
+    """
+    input_count = len(netlist.input_pins)
+    row_count = 1 << input_count
+
+    for first_row in range(0, row_count, chunk_rows):
+        chunk_row_count = min(chunk_rows, row_count - first_row)
+        input_columns = exhaustive_input_columns(
+            input_count, first_row, chunk_row_count
+        )
+        yield first_row, input_columns, simulate_netlist_numpy(netlist, input_columns)
+
+
+def truth_table_columns(netlist: Netlist) -> tuple[list, list]:
+    """
+    Compute the full truth table of a netlist as boolean columns.
+    Returns the input columns and the output columns.
+    Each chunk is copied into the columns as soon as it is evaluated,
+    rather than keeping every chunk around to concatenate at the end.
+    """
+    row_count = 1 << len(netlist.input_pins)
+    input_columns = [np.empty(row_count, dtype=np.bool_) for _ in netlist.input_pins]
+    output_columns = [np.empty(row_count, dtype=np.bool_) for _ in netlist.output_pins]
+
+    for first_row, input_chunk, output_chunk in iter_truth_table_column_chunks(netlist):
+        for column, chunk in zip(
+            input_columns + output_columns, input_chunk + output_chunk
+        ):
+            column[first_row : first_row + len(chunk)] = chunk
+
+    return input_columns, output_columns
@@ -0,0 +1,210 @@
+"""
+Optimization passes over flattened NAND netlists.
+"""
+from schematic_types import *
+from netlist import Netlist
+
+from dataclasses import dataclass
+
+# Literals used while rewriting a netlist. Non negative literals are wires.
+FALSE = -1
+TRUE = -2
+
+
+@dataclass
+class OptimizationReport:
+    """
+    Statistics gathered while optimizing a netlist.
+    """
+
+    gates_before: int
+    gates_after: int = 0
+
+    # Gates whose output was found to be constant.
+    folded_constants: int = 0
+
+    # NOT gates whose input was itself a NOT gate.
+    removed_double_inversions: int = 0
+
+    # Gates merged with an identical gate computing the same inputs.
+    merged_gates: int = 0
+
+    # Gates that could not reach any output.
+    removed_dead_gates: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.gates_before} -> {self.gates_after} gates "
+            f"({self.folded_constants} constant, "
+            f"{self.removed_double_inversions} double inversions, "
+            f"{self.merged_gates} merged, "
+            f"{self.removed_dead_gates} dead)"
+        )
+
+
+def rewrite_gates(
+    netlist: Netlist, report: OptimizationReport
+) -> tuple[list[tuple[int, int]], list[int]]:
+    """
+    Rewrite the gates of a netlist in a single forward pass.
+    Folds constants, removes double inversions and merges structurally identical gates.
+    Returns the new gates and the literal driving each output.
+    Gate i of the result drives wire len(netlist.input_pins) + i.
+    """
+    input_count = len(netlist.input_pins)
+
+    # The literal each wire of the original netlist was replaced with.
+    replacements: list[int] = list(range(input_count))
+
+    # For every new wire driven by a NOT gate, the wire it inverts.
+    inverted: dict[int, int] = {}
+
+    # The new wire computing each pair of inputs.
+    structure: dict[tuple[int, int], int] = {}
+
+    gates: list[tuple[int, int]] = []
+
+    def emit(in1: int, in2: int) -> int:
+        if in2 < in1:
+            in1, in2 = in2, in1
+
+        existing = structure.get((in1, in2))
+        if existing is not None:
+            report.merged_gates += 1
+            return existing
+
+        out = input_count + len(gates)
+        gates.append((in1, in2))
+        structure[(in1, in2)] = out
+        if in1 == in2:
+            inverted[out] = in1
+        return out
+
+    def invert(wire: int) -> int:
+        # not not x is x
+        if wire in inverted:
+            report.removed_double_inversions += 1
+            return inverted[wire]
+        return emit(wire, wire)
+
+    for in1, in2 in netlist.gates:
+        a = replacements[in1]
+        b = replacements[in2]
+
+        if a == FALSE or b == FALSE:
+            report.folded_constants += 1
+            result = TRUE
+
+        elif a == TRUE and b == TRUE:
+            report.folded_constants += 1
+            result = FALSE
+
+        elif a == TRUE or b == TRUE:
+            result = invert(b if a == TRUE else a)
+
+        elif inverted.get(a) == b or inverted.get(b) == a:
+            # x nand (not x) is always true.
+            report.folded_constants += 1
+            result = TRUE
+
+        elif a == b:
+            result = invert(a)
+
+        else:
+            result = emit(a, b)
+
+        replacements.append(result)
+
+    return gates, [replacements[wire] for wire in netlist.output_wires]
+
+
+def materialize_constants(
+    input_count: int, gates: list[tuple[int, int]], outputs: list[int]
+) -> list[int]:
+    """
+    Replace constant outputs with gates computing them from the first input.
+    """
+    if all(output >= 0 for output in outputs):
+        return outputs
+
+    if input_count == 0:
+        raise Exception("Cannot build a constant output for a netlist without inputs.")
+
+    # true = x nand (x nand x), false = true nand true
+    not_first = input_count + len(gates)
+    gates.append((0, 0))
+    true_wire = input_count + len(gates)
+    gates.append((0, not_first))
+    false_wire = input_count + len(gates)
+    gates.append((true_wire, true_wire))
+
+    constants = {TRUE: true_wire, FALSE: false_wire}
+    return [constants.get(output, output) for output in outputs]
+
+
+def remove_dead_gates(
+    input_count: int,
+    gates: list[tuple[int, int]],
+    outputs: list[int],
+    report: OptimizationReport,
+) -> tuple[list[tuple[int, int]], list[int]]:
+    """
+    Drop the gates that no output depends on and renumber the remaining wires.
+    """
+    live = [False] * (input_count + len(gates))
+    for output in outputs:
+        live[output] = True
+
+    # Gates are topologically sorted, so a single backward pass finds every live gate.
+    for gate_index in range(len(gates) - 1, -1, -1):
+        if live[input_count + gate_index]:
+            in1, in2 = gates[gate_index]
+            live[in1] = True
+            live[in2] = True
+
+    renumbered = list(range(input_count)) + [-1] * len(gates)
+    kept_gates: list[tuple[int, int]] = []
+    for gate_index, (in1, in2) in enumerate(gates):
+        if not live[input_count + gate_index]:
+            report.removed_dead_gates += 1
+            continue
+
+        renumbered[input_count + gate_index] = input_count + len(kept_gates)
+        kept_gates.append((renumbered[in1], renumbered[in2]))
+
+    return kept_gates, [renumbered[output] for output in outputs]
+
+
+def optimize_netlist(netlist: Netlist) -> tuple[Netlist, OptimizationReport]:
+    """
+    Run every optimization pass over a netlist until the gate count stops shrinking.
+    The optimized netlist computes the same outputs for every input.
+    """
+    report = OptimizationReport(gates_before=len(netlist.gates))
+    input_count = len(netlist.input_pins)
+
+    while True:
+        # Only count the work of rounds that actually shrink the netlist.
+        round_report = OptimizationReport(gates_before=len(netlist.gates))
+        gates, outputs = rewrite_gates(netlist, round_report)
+        outputs = materialize_constants(input_count, gates, outputs)
+        gates, outputs = remove_dead_gates(input_count, gates, outputs, round_report)
+
+        optimized = Netlist(
+            schematic_id=netlist.schematic_id,
+            input_pins=netlist.input_pins,
+            output_pins=netlist.output_pins,
+            gates=gates,
+            output_wires=outputs,
+        )
+        if len(optimized.gates) >= len(netlist.gates):
+            break
+
+        netlist = optimized
+        report.folded_constants += round_report.folded_constants
+        report.removed_double_inversions += round_report.removed_double_inversions
+        report.merged_gates += round_report.merged_gates
+        report.removed_dead_gates += round_report.removed_dead_gates
+
+    report.gates_after = len(netlist.gates)
+    return netlist, report
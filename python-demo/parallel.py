@@ -0,0 +1,125 @@
+"""
+Multi-process evaluation of truth tables and batches of input vectors.
+
+Each worker process receives the flattened netlist once when it starts
+and then evaluates shards of rows with the bitsliced engine.
+"""
+from schematic_types import *
+from netlist import Netlist
+from bitslice import (
+    exhaustive_input_lanes,
+    pack_input_vectors,
+    simulate_netlist_bitsliced,
+    unpack_output_lanes,
+)
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterator
+
+# The netlist evaluated by the current worker process, set by init_worker.
+worker_netlist: Netlist | None = None
+
+
+def init_worker(netlist: Netlist) -> None:
+    global worker_netlist
+    worker_netlist = netlist
+
+
+def evaluate_truth_table_shard(first_row: int, row_count: int) -> list[int]:
+    assert worker_netlist is not None
+    input_lanes = exhaustive_input_lanes(
+        len(worker_netlist.input_pins), first_row, row_count
+    )
+    return simulate_netlist_bitsliced(worker_netlist, input_lanes, row_count)
+
+
+def evaluate_lanes_shard(input_lanes: list[int], lane_count: int) -> list[int]:
+    assert worker_netlist is not None
+    return simulate_netlist_bitsliced(worker_netlist, input_lanes, lane_count)
+
+
+def check_shard_size(shard_size: int) -> None:
+    if shard_size <= 0:
+        raise Exception(
+            f"Shard size must be a positive number of vectors: {shard_size}"
+        )
+
+
+def create_worker_pool(netlist: Netlist, workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(netlist,)
+    )
+
+
+def iter_parallel_truth_table_chunks(
+    netlist: Netlist, workers: int, chunk_rows: int
+) -> Iterator[tuple[int, int, list[int], list[int]]]:
+    """
+    Evaluate the truth table of a netlist with a pool of worker processes.
+    Yields the same chunks as truth_table.iter_truth_table_chunks, in row order.
+    Only a few chunks per worker are in flight at once, so memory stays bounded.
+    """
+    if chunk_rows <= 0 or chunk_rows & (chunk_rows - 1):
+        raise Exception(f"Truth table chunk size must be a power of two: {chunk_rows}")
+
+    input_count = len(netlist.input_pins)
+    row_count = 1 << input_count
+    chunk_rows = min(chunk_rows, row_count)
+    shard_starts = iter(range(0, row_count, chunk_rows))
+
+    with create_worker_pool(netlist, workers) as pool:
+        in_flight: deque[tuple[int, Future]] = deque()
+
+        def submit_next() -> None:
+            first_row = next(shard_starts, None)
+            if first_row is not None:
+                in_flight.append(
+                    (
+                        first_row,
+                        pool.submit(evaluate_truth_table_shard, first_row, chunk_rows),
+                    )
+                )
+
+        for _ in range(2 * workers):
+            submit_next()
+
+        while in_flight:
+            first_row, future = in_flight.popleft()
+            output_lanes = future.result()
+            submit_next()
+
+            input_lanes = exhaustive_input_lanes(input_count, first_row, chunk_rows)
+            yield first_row, chunk_rows, input_lanes, output_lanes
+
+
+def simulate_vectors_parallel(
+    netlist: Netlist,
+    input_vectors: list[dict[OutputPinId, bool]],
+    workers: int,
+    shard_size: int,
+) -> list[dict[InputPinId, bool]]:
+    """
+    Simulate a batch of input vectors by splitting it into shards evaluated by worker processes.
+    The results are returned in the order of the input vectors.
+    """
+    check_shard_size(shard_size)
+    shards = [
+        input_vectors[start : start + shard_size]
+        for start in range(0, len(input_vectors), shard_size)
+    ]
+
+    with create_worker_pool(netlist, workers) as pool:
+        shard_output_lanes = pool.map(
+            evaluate_lanes_shard,
+            [pack_input_vectors(netlist, shard) for shard in shards],
+            [len(shard) for shard in shards],
+        )
+
+        output_signals: list[dict[InputPinId, bool]] = []
+        for shard, output_lanes in zip(shards, shard_output_lanes):
+            output_signals.extend(
+                unpack_output_lanes(netlist, output_lanes, len(shard))
+            )
+
+    return output_signals
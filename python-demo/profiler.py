@@ -0,0 +1,188 @@
+"""
+Instrumentation of the hierarchical simulation in SchematicLibrary.simulate_schematic.
+"""
+from schematic_types import *
+from schematic import Schematic
+
+from dataclasses import dataclass
+from typing import TextIO
+import time
+
+
+@dataclass
+class SchematicProfile:
+    """
+    The statistics collected for every evaluation of one schematic.
+    Times are in nanoseconds. Total time includes the children, self time does not.
+    """
+
+    schematic_id: SchematicId
+    evaluations: int = 0
+    total_time: int = 0
+    self_time: int = 0
+
+    # The evaluations that ran the fixed-point loop over the components,
+    # the others were answered by the memo, a lookup table or as a NAND primitive.
+    iterated_evaluations: int = 0
+
+    # The passes of the fixed-point loop over the components, summed over all evaluations.
+    iterations: int = 0
+
+    @property
+    def shortcut_evaluations(self) -> int:
+        return self.evaluations - self.iterated_evaluations
+
+    @property
+    def iterations_per_evaluation(self) -> float:
+        """
+        The average passes of the fixed-point loop, over the evaluations that ran it.
+        """
+        if not self.iterated_evaluations:
+            return 0.0
+        return self.iterations / self.iterated_evaluations
+
+
+class ProfileFrame:
+    """
+    A schematic evaluation in progress.
+    """
+
+    __slots__ = ("schematic_id", "instance", "start", "child_time")
+
+    def __init__(self, schematic_id: SchematicId, instance: str, start: int):
+        self.schematic_id = schematic_id
+        self.instance = instance
+        self.start = start
+        self.child_time = 0
+
+
+class SimulationProfiler:
+    """
+    Collects per schematic evaluation counts and times, fixed-point loop iterations,
+    the time spent under every path of the hierarchy and optionally how often each wire toggles.
+
+    Wires are named by the instance path of the component driving them, e.g. fa0/halfAdder1/xor.out,
+    and a wire toggles when its signal differs from the previous evaluation of the same instance.
+    """
+
+    def __init__(self, track_toggles: bool = True):
+        self.track_toggles = track_toggles
+
+        self.profiles: dict[SchematicId, SchematicProfile] = {}
+
+        # Self time per path of schematic ids from the top level schematic, for flamegraphs.
+        self.stack_times: dict[tuple[SchematicId, ...], int] = {}
+
+        self.toggles: dict[str, int] = {}
+        self.wire_signals: dict[str, bool] = {}
+
+        self.stack: list[ProfileFrame] = []
+
+        # The component about to be evaluated by the schematic on top of the stack.
+        self.next_component: SchematicComponentId | None = None
+
+    def reset(self) -> None:
+        self.profiles.clear()
+        self.stack_times.clear()
+        self.toggles.clear()
+        self.wire_signals.clear()
+
+    def enter(self, schematic_id: SchematicId) -> None:
+        if self.stack and self.next_component is not None:
+            instance = f"{self.stack[-1].instance}{self.next_component}/"
+        else:
+            instance = ""
+        self.next_component = None
+        self.stack.append(ProfileFrame(schematic_id, instance, time.perf_counter_ns()))
+
+    def exit(self) -> None:
+        frame = self.stack.pop()
+        elapsed = time.perf_counter_ns() - frame.start
+
+        profile = self.profiles.get(frame.schematic_id)
+        if profile is None:
+            profile = SchematicProfile(frame.schematic_id)
+            self.profiles[frame.schematic_id] = profile
+        profile.evaluations += 1
+        profile.total_time += elapsed
+        profile.self_time += elapsed - frame.child_time
+
+        path = tuple(parent.schematic_id for parent in self.stack) + (
+            frame.schematic_id,
+        )
+        self.stack_times[path] = (
+            self.stack_times.get(path, 0) + elapsed - frame.child_time
+        )
+
+        if self.stack:
+            self.stack[-1].child_time += elapsed
+
+    def record_iterations(self, schematic_id: SchematicId, iterations: int) -> None:
+        profile = self.profiles.setdefault(schematic_id, SchematicProfile(schematic_id))
+        profile.iterated_evaluations += 1
+        profile.iterations += iterations
+
+    def record_signals(
+        self,
+        schematic: Schematic,
+        connection_signal_state: dict[Connection, bool | None],
+    ) -> None:
+        """
+        Count the wires of the schematic on top of the stack that changed since its previous evaluation.
+        """
+        if not self.track_toggles:
+            return
+
+        instance = self.stack[-1].instance
+        for connection, signal in connection_signal_state.items():
+            source = connection.source
+            if isinstance(source.component, SchematicInput):
+                wire = f"{instance}input.{source.pin}"
+            else:
+                wire = f"{instance}{source.component}.{source.pin}"
+
+            previous = self.wire_signals.get(wire)
+            if previous is not None and previous != signal:
+                self.toggles[wire] = self.toggles.get(wire, 0) + 1
+            self.wire_signals[wire] = signal  # type: ignore
+
+    def sorted_profiles(self) -> list[SchematicProfile]:
+        return sorted(
+            self.profiles.values(),
+            key=lambda profile: profile.total_time,
+            reverse=True,
+        )
+
+    def write_report(self, file: TextIO, max_wires: int = 20) -> None:
+        """
+        Write a flat report of every schematic, most expensive first, and the most active wires.
+        Shortcuts count the evaluations answered without the fixed-point loop,
+        iterations are averaged over the evaluations that ran it.
+        """
+        file.write(
+            f"{'schematic':<24}{'evaluations':>12}{'total ms':>12}{'self ms':>12}"
+            f"{'shortcuts':>12}{'iterations':>12}\n"
+        )
+        for profile in self.sorted_profiles():
+            file.write(
+                f"{profile.schematic_id:<24}{profile.evaluations:>12}"
+                f"{profile.total_time / 1e6:>12.3f}{profile.self_time / 1e6:>12.3f}"
+                f"{profile.shortcut_evaluations:>12}"
+                f"{profile.iterations_per_evaluation:>12.2f}\n"
+            )
+
+        if self.track_toggles and self.toggles:
+            file.write(f"\n{'wire':<48}{'toggles':>12}\n")
+            most_active = sorted(
+                self.toggles.items(), key=lambda item: item[1], reverse=True
+            )
+            for wire, toggles in most_active[:max_wires]:
+                file.write(f"{wire:<48}{toggles:>12}\n")
+
+    def write_collapsed_stacks(self, file: TextIO) -> None:
+        """
+        Write the self time of every path of the hierarchy in the collapsed stack format
+        read by flamegraph.pl and speedscope: the path joined by semicolons and the nanoseconds.
+        """
+        for path, self_time in sorted(self.stack_times.items()):
+            file.write(f"{';'.join(path)} {self_time}\n")
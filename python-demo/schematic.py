@@ -1,10 +1,31 @@
 from schematic_types import *
+from connection_table import ConnectionTable, build_connection_table
+from validation import check_schematic
 
-from dataclasses import dataclass
+from typing import Iterable
 
 
-@dataclass
 class Schematic:
+    """
+    A schematic with its pins, components and the connections between them.
+
+    The connections are stored in a compact ConnectionTable of interned integer indexes.
+    The connections set and the indexes over Connection objects are a front-end over the table,
+    built the first time they are used.
+    """
+
+    __slots__ = (
+        "schematic_id",
+        "input_pins",
+        "output_pins",
+        "components",
+        "connection_table",
+        "cached_connections",
+        "cached_fan_in",
+        "cached_fan_out",
+        "cached_pin_drivers",
+    )
+
     # A unique identifier of the schematic.
     schematic_id: SchematicId
 
@@ -16,25 +37,187 @@ class Schematic:
     components: dict[SchematicComponentId, SchematicId]
 
     # The connections between input / output pins and the child components.
-    connections: set[Connection]
+    connection_table: ConnectionTable
+
+    # The front-end views of the connection table, or None until they are used.
+    # Use add_connection and remove_connection so these stay in sync with the table.
+    cached_connections: set[Connection] | None
+
+    # The connections going into and out of each component.
+    cached_fan_in: dict[SchematicComponentId | SchematicOutput, list[Connection]] | None
+    cached_fan_out: dict[SchematicComponentId | SchematicInput, list[Connection]] | None
+
+    # The connection driving each input attachment point.
+    cached_pin_drivers: dict[InputAttachmentPoint, Connection] | None
+
+    def __init__(
+        self,
+        schematic_id: SchematicId,
+        input_pins: set[PinId],
+        output_pins: set[PinId],
+        components: dict[SchematicComponentId, SchematicId],
+        connections: Iterable[Connection] = (),
+        connection_table: ConnectionTable | None = None,
+    ):
+        self.schematic_id = schematic_id
+        self.input_pins = input_pins
+        self.output_pins = output_pins
+        self.components = components
+
+        if connection_table is None:
+            connection_table = ConnectionTable(components)
+            # Like a set, keep the first of any duplicate connections.
+            for connection in dict.fromkeys(connections):
+                connection_table.append(
+                    *connection_table.connection_indexes(connection),
+                    connection.location,
+                )
+        self.connection_table = connection_table
+
+        self.clear_cached_views()
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Schematic):
+            return NotImplemented
+        return (
+            self.schematic_id == other.schematic_id
+            and self.input_pins == other.input_pins
+            and self.output_pins == other.output_pins
+            and self.components == other.components
+            and self.connections == other.connections
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Schematic(schematic_id={self.schematic_id!r}, "
+            f"input_pins={self.input_pins!r}, "
+            f"output_pins={self.output_pins!r}, "
+            f"components={self.components!r}, "
+            f"connections={self.connections!r})"
+        )
+
+    def clear_cached_views(self) -> None:
+        self.cached_connections = None
+        self.cached_fan_in = None
+        self.cached_fan_out = None
+        self.cached_pin_drivers = None
+
+    @property
+    def connections(self) -> set[Connection]:
+        if self.cached_connections is None:
+            self.cached_connections = set(self.connection_table)
+        return self.cached_connections
+
+    @property
+    def fan_in(self) -> dict[SchematicComponentId | SchematicOutput, list[Connection]]:
+        if self.cached_fan_in is None:
+            self.build_indexes()
+        return self.cached_fan_in  # type: ignore
+
+    @property
+    def fan_out(self) -> dict[SchematicComponentId | SchematicInput, list[Connection]]:
+        if self.cached_fan_out is None:
+            self.build_indexes()
+        return self.cached_fan_out  # type: ignore
+
+    @property
+    def pin_drivers(self) -> dict[InputAttachmentPoint, Connection]:
+        if self.cached_pin_drivers is None:
+            self.build_indexes()
+        return self.cached_pin_drivers  # type: ignore
+
+    def build_indexes(self) -> None:
+        self.cached_fan_in = {}
+        self.cached_fan_out = {}
+        self.cached_pin_drivers = {}
+        for connection in self.connections:
+            self.index_connection(connection)
+
+    def rebuild_indexes(self) -> None:
+        """
+        Rebuild the connection table and indexes from the connections set.
+        Only needed if the connections set was modified directly.
+        """
+        connections = self.connections
+        self.connection_table = ConnectionTable(self.components)
+        for connection in connections:
+            self.connection_table.append(
+                *self.connection_table.connection_indexes(connection),
+                connection.location,
+            )
+
+        self.clear_cached_views()
+        self.cached_connections = connections
+
+    def index_connection(self, connection: Connection) -> None:
+        if self.cached_fan_in is None:
+            return
+        self.cached_fan_in.setdefault(connection.destination.component, []).append(
+            connection
+        )
+        self.cached_fan_out.setdefault(connection.source.component, []).append(  # type: ignore
+            connection
+        )
+        self.cached_pin_drivers[connection.destination] = connection  # type: ignore
+
+    def add_connection(self, connection: Connection) -> None:
+        """
+        Add a connection to the schematic and update the indexes.
+        """
+        table = self.connection_table
+        indexes = table.connection_indexes(connection)
+        if table.find(*indexes) is not None:
+            return
+
+        table.append(*indexes, connection.location)
+        if self.cached_connections is not None:
+            self.cached_connections.add(connection)
+            self.index_connection(connection)
+
+    def remove_connection(self, connection: Connection) -> None:
+        """
+        Remove a connection from the schematic and update the indexes.
+        """
+        table = self.connection_table
+        index = table.find(*table.connection_indexes(connection))
+        if index is None:
+            raise KeyError(connection)
+        table.remove(index)
+
+        if self.cached_connections is not None:
+            self.cached_connections.remove(connection)
+
+        if self.cached_fan_in is None:
+            return
+        self.cached_fan_in[connection.destination.component].remove(connection)
+        self.cached_fan_out[connection.source.component].remove(connection)  # type: ignore
+
+        # If the pin had multiple drivers fall back to one of the remaining ones.
+        pin_drivers: dict[InputAttachmentPoint, Connection] = self.cached_pin_drivers  # type: ignore
+        if pin_drivers.get(connection.destination) == connection:
+            del pin_drivers[connection.destination]
+            for other in self.cached_fan_in[connection.destination.component]:
+                if other.destination == connection.destination:
+                    pin_drivers[other.destination] = other
 
     def get_input_connections_for_component(
         self, component_id: SchematicComponentId | SchematicOutput
     ) -> list[Connection]:
-        return [
-            connection
-            for connection in self.connections
-            if connection.destination.component == component_id
-        ]
+        return list(self.fan_in.get(component_id, []))
 
     def get_output_connections_for_component(
         self, component_id: SchematicComponentId | SchematicInput
     ) -> list[Connection]:
-        return [
-            connection
-            for connection in self.connections
-            if connection.source.component == component_id
-        ]
+        return list(self.fan_out.get(component_id, []))
+
+    def get_driver_for_pin(
+        self, attachment_point: InputAttachmentPoint
+    ) -> Connection | None:
+        """
+        Fetch the connection driving an input attachment point.
+        If the attachment point is not connected, return None.
+        """
+        return self.pin_drivers.get(attachment_point)
 
 
 # Hardcoded definition of a nand schematic.
@@ -47,6 +230,16 @@ nand_schematic = Schematic(
     connections=set([]),
 )
 
+# Hardcoded definition of a D flip-flop.
+# On every clock cycle q takes the value d had in the previous cycle, starting from low.
+dff_schematic = Schematic(
+    schematic_id=SchematicId("DFF"),
+    input_pins=set([PinId("d")]),
+    output_pins=set([PinId("q")]),
+    components={},
+    connections=set([]),
+)
+
 
 def build_schematic_id(schematic_id: str) -> SchematicId:
     return SchematicId(schematic_id)
@@ -67,13 +260,14 @@ def build_schematic_components(
 
 
 def build_connections(
-    connection_tuples: list[tuple[tuple[str, str], tuple[str, str]]]
+    connection_tuples: list[tuple[tuple[str, str], tuple[str, str]]],
+    connection_locations: list[SourceLocation] | None = None,
 ) -> set[Connection]:
     connections: list[Connection] = []
-    for (source_name, source_pin), (
-        destination_name,
-        destination_pin,
-    ) in connection_tuples:
+    for index, (
+        (source_name, source_pin),
+        (destination_name, destination_pin),
+    ) in enumerate(connection_tuples):
         if source_name == "input":
             source_component = SchematicInput()
 
@@ -92,7 +286,9 @@ def build_connections(
             destination_component, InputPinId(destination_pin)
         )
 
-        connections.append(Connection(source, destination))
+        location = connection_locations[index] if connection_locations else None
+
+        connections.append(Connection(source, destination, location))
 
     return set(connections)
 
@@ -103,30 +299,35 @@ def build_schematic(
     output_pins: list[str],
     components: list[tuple[str, str]],
     connections: list[tuple[tuple[str, str], tuple[str, str]]],
+    connection_locations: list[SourceLocation] | None = None,
 ):
     """
     Construct a new schematic.
     This should be called instead of constructing a schematic yourself.
     This handles all the proper validation checks for a schematic.
+    connection_locations optionally gives the source location of each connection.
 
-    @TODO: Validation
-        Ensure all input pins are connected.
-        Ensure each input pin only has a single connection.
-        Check for circular connections.
+    Raises a SchematicValidationError listing every wire to an undeclared component or pin,
+    every multiply driven or undriven output pin and every combinational loop.
+    The parts are checked against their schematics when the schematic is used by a library.
     """
 
     schematic_id = build_schematic_id(schematic_id)
     schematic_input_pins = build_input_pins(input_pins)
     schematic_output_pins = build_output_pins(output_pins)
     schematic_components = build_schematic_components(components)
-    schematic_connections = build_connections(connections)
+    # The connections go straight into a connection table, without building Connection objects.
+    connection_table = build_connection_table(
+        schematic_components, connections, connection_locations
+    )
 
     schematic = Schematic(
         schematic_id=schematic_id,
         input_pins=schematic_input_pins,
         output_pins=schematic_output_pins,
         components=schematic_components,
-        connections=schematic_connections,
+        connection_table=connection_table,
     )
+    check_schematic(schematic)
 
     return schematic
@@ -1,24 +1,179 @@
 from schematic_types import *
-from schematic import Schematic, nand_schematic
+from schematic import Schematic, dff_schematic, nand_schematic
+from netlist import Netlist, flatten_schematic, simulate_netlist
+from optimize import OptimizationReport, optimize_netlist
+from bitslice import (
+    exhaustive_input_lanes,
+    pack_column,
+    pack_input_vectors,
+    simulate_netlist_bitsliced,
+    unpack_lane,
+    unpack_output_lanes,
+)
+from codegen import CompiledSchematic, compile_schematic, release_generated_source
+from simulation_memo import SimulationMemo
+from lookup_table import LookupTable, build_lookup_table
+from profiler import SimulationProfiler
+from incremental import IncrementalSimulator
+from library_cache import LibraryCache
+from parallel import check_shard_size, simulate_vectors_parallel
+from batch import InputBatch, simulate_netlist_batch
+from buses import (
+    WordLayout,
+    build_word_layout,
+    simulate_netlist_words,
+    simulate_netlist_words_batch,
+)
+from sequential import (
+    CompiledCycles,
+    CycleSimulator,
+    SequentialNetlist,
+    compile_cycles,
+    find_registered_pins,
+    flatten_sequential_schematic,
+)
+from fault import (
+    Fault,
+    FaultSimulationReport,
+    enumerate_faults,
+    simulate_netlist_faults,
+)
+from bdd import SchematicBDD, build_schematic_bdd, find_counterexample
+from cone import OutputCone, compute_output_cone, prune_netlist
+from validation import (
+    RECURSIVE_PART,
+    SchematicValidationError,
+    ValidationIssue,
+    check_schematic,
+)
+from truth_table import (
+    DEFAULT_CHUNK_ROWS,
+    check_chunk_rows,
+    export_truth_table_bitset,
+    export_truth_table_csv,
+    iter_truth_table_chunks,
+    iter_truth_table_rows,
+)
+from numpy_backend import (
+    NUMPY_AVAILABLE,
+    np,
+    iter_truth_table_column_chunks,
+    simulate_netlist_numpy,
+    truth_table_columns,
+)
 
-import itertools
+from typing import (
+    BinaryIO,
+    Collection,
+    Iterable,
+    Iterator,
+    Mapping,
+    Sequence,
+    TextIO,
+)
 
 
 class SchematicLibrary:
-    schematics: list[Schematic]
+    # The schematics in the library indexed by their id, in insertion order.
+    schematic_index: dict[SchematicId, Schematic]
+
+    # For each schematic id, the ids of the schematics using it as a component.
+    dependants: dict[SchematicId, set[SchematicId]]
+
+    # Flattened netlists of the schematics, compiled on first use.
+    netlists: dict[SchematicId, Netlist]
+
+    # The output cones of each schematic and the netlists pruned to them, keyed by the output pins.
+    output_cones: dict[SchematicId, dict[frozenset[PinId], OutputCone]]
+    cone_netlists: dict[SchematicId, dict[frozenset[PinId], Netlist]]
+
+    # Where the bits of each bus are in the netlist of each schematic.
+    word_layouts: dict[SchematicId, WordLayout]
+
+    # Whether each schematic holds state in DFF registers, directly or through its parts.
+    sequential_schematics: dict[SchematicId, bool]
+
+    # The netlists of the schematics with registers, split at the registers,
+    # and the functions stepping them keyed by the sampled output pins.
+    sequential_netlists: dict[SchematicId, SequentialNetlist]
+    compiled_cycles: dict[SchematicId, dict[frozenset[PinId], CompiledCycles]]
+
+    # Generated python functions of the schematics, keyed by id and whether they are bitsliced.
+    compiled_schematics: dict[tuple[SchematicId, bool], CompiledSchematic]
+
+    # Optional memo of sub-circuit results used by simulate_schematic.
+    simulation_memo: SimulationMemo | None
 
-    def __init__(self):
-        self.schematics = [nand_schematic]
+    # Schematics with at most this many input pins are simulated by a lookup in their truth table,
+    # or None to simulate every schematic gate by gate.
+    lookup_table_max_inputs: int | None
+
+    # The truth tables of the small schematics, built on first use.
+    lookup_tables: dict[SchematicId, LookupTable]
+
+    # Optional instrumentation of simulate_schematic.
+    profiler: SimulationProfiler | None
+
+    # The ids of the schematics checked against the schematics of their parts,
+    # and of the schematics whose parts are being checked.
+    validated_schematics: set[SchematicId]
+    validation_path: set[SchematicId]
+
+    # Optional on-disk cache of flattened netlists shared between runs.
+    persistent_cache: LibraryCache | None
+
+    # The hash of each schematic and of everything it depends on, keying its cached netlist.
+    content_hashes: dict[SchematicId, str]
+
+    # Whether flattened netlists are run through the optimization passes.
+    optimize_netlists: bool
+
+    # The result of optimizing each netlist flattened by this library.
+    optimization_reports: dict[SchematicId, OptimizationReport]
+
+    def __init__(
+        self,
+        persistent_cache: LibraryCache | None = None,
+        optimize_netlists: bool = True,
+    ):
+        self.schematic_index = {}
+        self.dependants = {}
+        self.netlists = {}
+        self.output_cones = {}
+        self.cone_netlists = {}
+        self.word_layouts = {}
+        self.sequential_schematics = {}
+        self.sequential_netlists = {}
+        self.compiled_cycles = {}
+        self.compiled_schematics = {}
+        self.simulation_memo = None
+        self.lookup_table_max_inputs = None
+        self.lookup_tables = {}
+        self.profiler = None
+        self.validated_schematics = set()
+        self.validation_path = set()
+        self.persistent_cache = persistent_cache
+        self.content_hashes = {}
+        self.optimize_netlists = optimize_netlists
+        self.optimization_reports = {}
+
+        self.add_schematic(nand_schematic)
+        self.add_schematic(dff_schematic)
+
+    @property
+    def schematics(self) -> tuple[Schematic, ...]:
+        """
+        The schematics in the library in insertion order, as a read-only snapshot.
+        Use add_schematic and replace_schematic to change them.
+        """
+        return tuple(self.schematic_index.values())
 
     def get_schematic_or_none(self, schematic_id: SchematicId) -> Schematic | None:
         """
         Fetch a schematic by its id.
         If the requested schematic is not found, return None.
         """
-        for schematic in self.schematics:
-            if schematic.schematic_id == schematic_id:
-                return schematic
-        return None
+        return self.schematic_index.get(schematic_id)
 
     def get_schematic(self, schematic_id: SchematicId) -> Schematic:
         """
@@ -34,26 +189,506 @@ class SchematicLibrary:
         """
         Add a schematic to the library.
         """
-        if self.get_schematic_or_none(schematic.schematic_id) is not None:
+        if schematic.schematic_id in self.schematic_index:
             raise Exception(
                 f"Cannot add schematic with duplicate id: {schematic.schematic_id}"
             )
 
-        self.schematics.append(schematic)
+        self.schematic_index[schematic.schematic_id] = schematic
+        self.add_dependencies(schematic)
+
+        # Schematics added earlier may use this one as a part, and cached results computed without it.
+        if self.dependants.get(schematic.schematic_id):
+            self.invalidate_schematic(schematic.schematic_id)
+
+    def replace_schematic(self, schematic: Schematic) -> None:
+        """
+        Replace the schematic with the same id in the library.
+        Only the cached artifacts of the schematic and the schematics depending on it are invalidated.
+        """
+        if schematic.schematic_id in (
+            nand_schematic.schematic_id,
+            dff_schematic.schematic_id,
+        ):
+            raise Exception(
+                f"Cannot replace the hardcoded {schematic.schematic_id} schematic."
+            )
+
+        previous_schematic = self.get_schematic(schematic.schematic_id)
+        self.remove_dependencies(previous_schematic)
+
+        self.schematic_index[schematic.schematic_id] = schematic
+        self.add_dependencies(schematic)
+
+        self.invalidate_schematic(schematic.schematic_id)
+
+    def add_dependencies(self, schematic: Schematic) -> None:
+        for component_schematic_id in set(schematic.components.values()):
+            self.dependants.setdefault(component_schematic_id, set()).add(
+                schematic.schematic_id
+            )
+
+    def remove_dependencies(self, schematic: Schematic) -> None:
+        for component_schematic_id in set(schematic.components.values()):
+            self.dependants[component_schematic_id].discard(schematic.schematic_id)
+
+    def get_dependants(self, schematic_id: SchematicId) -> set[SchematicId]:
+        """
+        Fetch the ids of all schematics that use a schematic, directly or through other schematics.
+        """
+        found: set[SchematicId] = set()
+        stack = [schematic_id]
+        while stack:
+            for dependant_id in self.dependants.get(stack.pop(), ()):
+                if dependant_id not in found:
+                    found.add(dependant_id)
+                    stack.append(dependant_id)
+        return found
+
+    def invalidate_schematic(self, schematic_id: SchematicId) -> None:
+        """
+        Drop the cached artifacts of a schematic and of every schematic depending on it.
+        Call this after modifying a schematic in place.
+        """
+        for invalid_id in self.get_dependants(schematic_id) | {schematic_id}:
+            self.clear_cached_artifacts(invalid_id)
+
+    def clear_cached_artifacts(self, schematic_id: SchematicId) -> None:
+        """
+        Drop everything compiled from a single schematic.
+        """
+        self.validated_schematics.discard(schematic_id)
+        self.netlists.pop(schematic_id, None)
+        self.output_cones.pop(schematic_id, None)
+        self.cone_netlists.pop(schematic_id, None)
+        self.word_layouts.pop(schematic_id, None)
+        self.sequential_schematics.pop(schematic_id, None)
+        self.sequential_netlists.pop(schematic_id, None)
+        self.optimization_reports.pop(schematic_id, None)
+        self.content_hashes.pop(schematic_id, None)
+        for bitsliced in (False, True):
+            compiled = self.compiled_schematics.pop((schematic_id, bitsliced), None)
+            if compiled is not None:
+                release_generated_source(compiled.filename)
+        for compiled_cycles in self.compiled_cycles.pop(schematic_id, {}).values():
+            release_generated_source(compiled_cycles.filename)
+        self.lookup_tables.pop(schematic_id, None)
+        if self.simulation_memo is not None:
+            self.simulation_memo.discard_schematic(schematic_id)
+
+    def enable_simulation_memo(
+        self, max_entries: int = 4096, max_inputs: int = 8
+    ) -> None:
+        """
+        Memoize the results of simulate_schematic for schematics with at most max_inputs input pins.
+        At most max_entries results are kept, evicting the least recently used one.
+        """
+        self.simulation_memo = SimulationMemo(max_entries, max_inputs)
+
+    def disable_simulation_memo(self) -> None:
+        self.simulation_memo = None
+
+    def enable_lookup_tables(self, max_inputs: int = 3) -> None:
+        """
+        Simulate every schematic with at most max_inputs input pins with a single lookup
+        in its precomputed truth table, instead of simulating its components.
+        """
+        self.lookup_table_max_inputs = max_inputs
+
+    def disable_lookup_tables(self) -> None:
+        self.lookup_table_max_inputs = None
+        self.lookup_tables.clear()
+
+    def get_lookup_table(self, schematic: Schematic) -> LookupTable:
+        lookup_table = self.lookup_tables.get(schematic.schematic_id)
+        if lookup_table is None:
+            lookup_table = build_lookup_table(self.get_schematic_netlist(schematic))
+            self.lookup_tables[schematic.schematic_id] = lookup_table
+        return lookup_table
+
+    @property
+    def memo_hits(self) -> int:
+        return self.simulation_memo.hits if self.simulation_memo is not None else 0
+
+    @property
+    def memo_misses(self) -> int:
+        return self.simulation_memo.misses if self.simulation_memo is not None else 0
+
+    def enable_profiling(self, track_toggles: bool = True) -> SimulationProfiler:
+        """
+        Instrument simulate_schematic until disable_profiling is called.
+        Returns the profiler collecting the statistics.
+        Tracking wire toggles records every signal of every evaluation, so it can be turned off.
+        """
+        self.profiler = SimulationProfiler(track_toggles)
+        return self.profiler
+
+    def disable_profiling(self) -> None:
+        self.profiler = None
+
+    def validate_schematic(self, schematic: Schematic) -> list[ValidationIssue]:
+        """
+        Check a schematic and the schematics of its parts, recursively, against the library.
+        Raises a SchematicValidationError listing every error of the first invalid schematic.
+        Returns the warnings of the schematics not checked before.
+        """
+        warnings: list[ValidationIssue] = []
+        # Each schematic is visited once, and finished once its parts are.
+        # A part found among the schematics being visited is used as a part of itself.
+        entered: set[SchematicId] = set()
+        stack = [(schematic, False)]
+        try:
+            while stack:
+                current, finished = stack.pop()
+                schematic_id = current.schematic_id
+                if finished:
+                    self.validation_path.discard(schematic_id)
+                    self.validated_schematics.add(schematic_id)
+                    continue
+
+                # The hardcoded NAND and DFF have no wires to check.
+                if schematic_id in self.validated_schematics or schematic_id in (
+                    nand_schematic.schematic_id,
+                    dff_schematic.schematic_id,
+                ):
+                    continue
+
+                if schematic_id in self.validation_path:
+                    raise SchematicValidationError(
+                        schematic_id,
+                        [
+                            ValidationIssue(
+                                RECURSIVE_PART,
+                                f"{schematic_id} is used as a part of itself",
+                            )
+                        ],
+                    )
+
+                # Checking a schematic may validate the parts holding registers first,
+                # so it is on the path from here on.
+                self.validation_path.add(schematic_id)
+                entered.add(schematic_id)
+                warnings.extend(
+                    check_schematic(
+                        current, self.get_schematic_or_none, self.get_registered_pins
+                    )
+                )
+
+                stack.append((current, True))
+                for part_schematic_id in set(current.components.values()):
+                    stack.append((self.get_schematic(part_schematic_id), False))
+
+        finally:
+            self.validation_path.difference_update(entered)
+
+        return warnings
+
+    def is_sequential(self, schematic: Schematic) -> bool:
+        """
+        Check whether a schematic holds state in DFF registers, directly or through its parts.
+        """
+        sequential = self.sequential_schematics.get(schematic.schematic_id)
+        if sequential is not None:
+            return sequential
+
+        # A schematic used as its own part is reported by validation, not followed forever.
+        self.sequential_schematics[schematic.schematic_id] = False
+        sequential = schematic.schematic_id == dff_schematic.schematic_id
+        for part_schematic_id in set(schematic.components.values()):
+            part = self.get_schematic_or_none(part_schematic_id)
+            if part is not None and self.is_sequential(part):
+                sequential = True
+                break
+
+        self.sequential_schematics[schematic.schematic_id] = sequential
+        return sequential
+
+    def get_sequential_netlist(self, schematic: Schematic) -> SequentialNetlist:
+        """
+        Fetch the netlist of a schematic split at its registers.
+        The logic between the registers is optimized like any other netlist, unless disabled on the library.
+        """
+        netlist = self.sequential_netlists.get(schematic.schematic_id)
+        if netlist is None:
+            self.validate_schematic(schematic)
+            netlist = flatten_sequential_schematic(schematic, self)
+            if self.optimize_netlists:
+                netlist.logic, _ = optimize_netlist(netlist.logic)
+            self.sequential_netlists[schematic.schematic_id] = netlist
+        return netlist
+
+    def get_registered_pins(self, schematic: Schematic) -> frozenset[PinId]:
+        """
+        Fetch the output pins of a schematic that only change on a clock cycle,
+        because every path to them from an input goes through a register.
+        """
+        if schematic.schematic_id == dff_schematic.schematic_id:
+            return frozenset(dff_schematic.output_pins)
+        if not self.is_sequential(schematic):
+            return frozenset()
+        return find_registered_pins(self.get_sequential_netlist(schematic))
+
+    def create_cycle_simulator(
+        self,
+        schematic: Schematic,
+        output_pins: Collection[PinId] | None = None,
+        lanes: int = 1,
+    ) -> CycleSimulator:
+        """
+        Create a clocked simulator of a schematic, with every register cleared.
+        Only output_pins, all of them by default, are sampled, and only the gates they
+        and the registers depend on are evaluated.
+        The stepping function is generated once per schematic and set of sampled pins.
+        """
+        sampled_pins = frozenset(
+            schematic.output_pins if output_pins is None else output_pins
+        )
+        for pin in sampled_pins:
+            if pin not in schematic.output_pins:
+                raise Exception(
+                    f"Output pin {pin} is not defined on schematic {schematic.schematic_id}"
+                )
+
+        compiled_cycles = self.compiled_cycles.setdefault(schematic.schematic_id, {})
+        compiled = compiled_cycles.get(sampled_pins)
+        if compiled is None:
+            compiled = compile_cycles(
+                self.get_sequential_netlist(schematic), sampled_pins
+            )
+            compiled_cycles[sampled_pins] = compiled
+        return CycleSimulator(compiled, lanes)
+
+    def simulate_cycles(
+        self,
+        schematic: Schematic,
+        input_streams: Mapping[PinId, Iterable[int]],
+        cycles: int | None = None,
+        output_pins: Collection[PinId] | None = None,
+        sample_every: int = 1,
+    ) -> dict[InputPinId, list[int]]:
+        """
+        Simulate a schematic clock cycle by clock cycle from power on.
+        Each input pin reads a 0 or 1 per cycle from its stream, and each of output_pins,
+        all of them by default, is sampled at the end of every sample_every-th cycle.
+        See CycleSimulator.step to keep the register state between runs.
+        """
+        return self.create_cycle_simulator(schematic, output_pins).step(
+            input_streams, cycles, sample_every
+        )
+
+    def get_schematic_netlist(self, schematic: Schematic) -> Netlist:
+        """
+        Fetch the flattened NAND netlist of a schematic.
+        The netlist is compiled on first use and cached per schematic id,
+        and in the persistent cache if the library has one.
+        Unless disabled on the library, the netlist is optimized after flattening.
+        """
+        netlist = self.netlists.get(schematic.schematic_id)
+        if netlist is not None:
+            return netlist
+
+        # Validate even when the netlist is cached, hashing the key walks the parts too.
+        self.validate_schematic(schematic)
+
+        report = None
+        cache = self.persistent_cache
+        if cache is not None:
+            # The key is computed once for both the lookup and the store on a miss.
+            cache_key = cache.netlist_key(schematic, self)
+            entry = cache.load_netlist(cache_key)
+            if entry is not None:
+                netlist, report = entry
+
+        if netlist is None:
+            netlist = flatten_schematic(schematic, self)
+            if self.optimize_netlists:
+                netlist, report = optimize_netlist(netlist)
+
+            if cache is not None:
+                cache.store_netlist(cache_key, netlist, report)
+
+        if report is not None:
+            self.optimization_reports[schematic.schematic_id] = report
+        self.netlists[schematic.schematic_id] = netlist
+        return netlist
+
+    def get_output_cone(
+        self, schematic: Schematic, output_pins: Collection[PinId]
+    ) -> OutputCone:
+        """
+        Fetch the transitive fan-in of some output pins of a schematic across the hierarchy.
+        Cones are computed once per schematic id and set of output pins.
+        """
+        output_pins = frozenset(output_pins)
+        cones = self.output_cones.setdefault(schematic.schematic_id, {})
+        cone = cones.get(output_pins)
+        if cone is not None:
+            return cone
+
+        if schematic.schematic_id == nand_schematic.schematic_id:
+            cone = OutputCone(
+                schematic.schematic_id,
+                output_pins,
+                frozenset(schematic.input_pins) if output_pins else frozenset(),
+                {},
+            )
+        else:
+            self.validate_schematic(schematic)
+            cone = compute_output_cone(
+                schematic,
+                output_pins,
+                lambda component_id: self.get_schematic(
+                    schematic.components[component_id]
+                ),
+                self.get_output_cone,
+            )
+
+        cones[output_pins] = cone
+        return cone
+
+    def get_output_cone_netlist(
+        self, schematic: Schematic, output_pins: Collection[PinId]
+    ) -> Netlist:
+        """
+        Fetch the flattened netlist of a schematic pruned to the gates some output pins depend on.
+        The netlist keeps every input pin of the schematic, so it is simulated with the same inputs.
+        """
+        output_pins = frozenset(output_pins)
+        netlists = self.cone_netlists.setdefault(schematic.schematic_id, {})
+        netlist = netlists.get(output_pins)
+        if netlist is None:
+            for pin in output_pins:
+                if pin not in schematic.output_pins:
+                    raise Exception(
+                        f"Output pin {pin} is not defined on schematic {schematic.schematic_id}"
+                    )
+            netlist = prune_netlist(self.get_schematic_netlist(schematic), output_pins)
+            netlists[output_pins] = netlist
+        return netlist
+
+    def get_netlist_for_outputs(
+        self, schematic: Schematic, output_pins: Collection[PinId] | None
+    ) -> Netlist:
+        if output_pins is None:
+            return self.get_schematic_netlist(schematic)
+        return self.get_output_cone_netlist(schematic, output_pins)
+
+    def simulate_flattened_schematic(
+        self,
+        schematic: Schematic,
+        input_signals: dict[OutputPinId, bool],
+        output_pins: Collection[PinId] | None = None,
+    ) -> dict[InputPinId, bool]:
+        """
+        Simulate a schematic using its flattened netlist.
+        This gives the same results as simulate_schematic in a single pass over the gates.
+        If output_pins is given only those outputs, and the gates they depend on, are evaluated.
+        """
+        verify_schematic_signal_pins(schematic, input_signals)
+        return simulate_netlist(
+            self.get_netlist_for_outputs(schematic, output_pins), input_signals
+        )
 
     def simulate_schematic(
-        self, schematic: Schematic, input_signals: dict[OutputPinId, bool]
+        self,
+        schematic: Schematic,
+        input_signals: dict[OutputPinId, bool],
+        output_pins: Collection[PinId] | None = None,
+    ) -> dict[InputPinId, bool]:
+        """
+        Simulate a schematic by recursively simulating its components.
+        If output_pins is given only the components in the output cone of those pins are simulated,
+        only those outputs are returned and only the input pins in the cone have to be provided.
+        """
+        # Without a profiler the only cost of instrumentation is this check.
+        profiler = self.profiler
+        if profiler is None:
+            return self.evaluate_schematic(schematic, input_signals, None, output_pins)
+
+        profiler.enter(schematic.schematic_id)
+        try:
+            return self.evaluate_schematic(
+                schematic, input_signals, profiler, output_pins
+            )
+        finally:
+            profiler.exit()
+
+    def evaluate_schematic(
+        self,
+        schematic: Schematic,
+        input_signals: dict[OutputPinId, bool],
+        profiler: SimulationProfiler | None,
+        output_pins: Collection[PinId] | None = None,
     ) -> dict[InputPinId, bool]:
+        cone = None
+        if output_pins is not None:
+            cone = self.get_output_cone(schematic, output_pins)
+            # A cone needing every input for every output is simulated like the whole schematic.
+            if len(cone.output_pins) == len(schematic.output_pins) and len(
+                cone.input_pins
+            ) == len(schematic.input_pins):
+                cone = None
+
         # verify that the input signals are valid
-        verify_schematic_signal_pins(schematic, input_signals)
+        if cone is None:
+            verify_schematic_signal_pins(schematic, input_signals)
+        else:
+            verify_cone_signal_pins(schematic, cone, input_signals)
 
         # If we're trying to simulate a NAND use the hardcoded logic function.
         if schematic.schematic_id == SchematicId("NAND"):
             return nand_logic(input_signals)
 
+        # Registers only change on a clock cycle, which needs the cycle based simulation.
+        if self.is_sequential(schematic):
+            raise Exception(
+                f"Schematic {schematic.schematic_id} holds state in DFF registers, simulate it with simulate_cycles."
+            )
+
+        # Small schematics are a single lookup in their truth table.
+        if (
+            self.lookup_table_max_inputs is not None
+            and cone is None
+            and len(schematic.input_pins) <= self.lookup_table_max_inputs
+        ):
+            return self.get_lookup_table(schematic).lookup(input_signals)
+
+        # Return the memoized result if this input combination was seen before.
+        # Only results for every output are memoized.
+        memo = self.simulation_memo
+        memo_key = None
+        if (
+            memo is not None
+            and cone is None
+            and memo.accepts(len(schematic.input_pins))
+        ):
+            memo_key = memo.make_key(schematic.schematic_id, input_signals)
+            memoized_output_signals = memo.get(memo_key)
+            if memoized_output_signals is not None:
+                return memoized_output_signals
+
+        # Validate the schematic the first time it is simulated, instead of looping forever on it.
+        if schematic.schematic_id not in self.validated_schematics:
+            self.validate_schematic(schematic)
+
         # fetch each component used in the schematic.
         components = get_schematic_components(schematic, self)
 
+        # Only the components in the cone are evaluated, each for the outputs read from it.
+        # They only need the inputs in their own cones.
+        component_cones: dict[SchematicComponentId, OutputCone] = {}
+        if cone is not None:
+            components = {
+                component_id: components[component_id]
+                for component_id in cone.components
+            }
+            component_cones = {
+                component_id: self.get_output_cone(
+                    components[component_id], component_output_pins
+                )
+                for component_id, component_output_pins in cone.components.items()
+            }
+
         # Initialize the signal state of the schematic.
         # All signals will start as unresolved (None)
         connection_signal_state: dict[Connection, bool | None] = {
@@ -65,16 +700,29 @@ class SchematicLibrary:
             SchematicInput()
         )
         for connection in circuit_input_connections:
-            connection_signal_state[connection] = input_signals[connection.source.pin]
+            if cone is None or connection.source.pin in cone.input_pins:
+                connection_signal_state[connection] = input_signals[
+                    connection.source.pin
+                ]
 
         # Loop until all output signals have been resolved.
+        iterations = 0
         while True:
+            iterations += 1
+
             # Loop through each component in the schematic.
             for component_id, component_schematic in components.items():
                 # If all the output signals for the component are resolved, skip it.
                 component_output_connections = (
                     schematic.get_output_connections_for_component(component_id)
                 )
+                component_cone = component_cones.get(component_id)
+                if component_cone is not None:
+                    component_output_connections = [
+                        connection
+                        for connection in component_output_connections
+                        if connection.source.pin in component_cone.output_pins
+                    ]
                 if are_connections_resolved(
                     schematic, component_output_connections, connection_signal_state
                 ):
@@ -84,6 +732,12 @@ class SchematicLibrary:
                 component_input_connections = (
                     schematic.get_input_connections_for_component(component_id)
                 )
+                if component_cone is not None:
+                    component_input_connections = [
+                        connection
+                        for connection in component_input_connections
+                        if connection.destination.pin in component_cone.input_pins
+                    ]
                 if are_connections_resolved(
                     schematic, component_input_connections, connection_signal_state
                 ):
@@ -94,8 +748,14 @@ class SchematicLibrary:
                     }
 
                     # Simulate the component
+                    if profiler is not None:
+                        profiler.next_component = component_id
                     component_simulation_output_signals = self.simulate_schematic(
-                        component_schematic, component_simulation_input_signals
+                        component_schematic,
+                        component_simulation_input_signals,
+                        component_cone.output_pins
+                        if component_cone is not None
+                        else None,
                     )
 
                     # Update the signal state for the component's output signals
@@ -110,33 +770,349 @@ class SchematicLibrary:
             circuit_output_signals = schematic.get_input_connections_for_component(
                 SchematicOutput()
             )
+            if cone is not None:
+                circuit_output_signals = [
+                    connection
+                    for connection in circuit_output_signals
+                    if connection.destination.pin in cone.output_pins
+                ]
             if are_connections_resolved(
                 schematic, circuit_output_signals, connection_signal_state
             ):
-                return {
+                output_signals: dict[InputPinId, bool] = {
                     InputPinId(connection.destination.pin): connection_signal_state[connection]  # type: ignore
                     for connection in circuit_output_signals
                 }
+                if memo is not None and memo_key is not None:
+                    memo.put(memo_key, output_signals)
+                if profiler is not None:
+                    profiler.record_iterations(schematic.schematic_id, iterations)
+                    profiler.record_signals(schematic, connection_signal_state)
+                return output_signals
 
-    def get_scehematic_truth_table(
-        self, schematic: Schematic
-    ) -> list[tuple[dict[PinId, bool], dict[InputPinId, bool]]]:
-        input_pins = schematic.input_pins
+    def create_incremental_simulator(
+        self, schematic: Schematic, input_signals: dict[OutputPinId, bool]
+    ) -> IncrementalSimulator:
+        """
+        Create a stateful simulator for a schematic, starting from a full set of input signals.
+        Later input changes are applied with IncrementalSimulator.apply.
+        """
+        verify_schematic_signal_pins(schematic, input_signals)
+        return IncrementalSimulator(
+            self.get_schematic_netlist(schematic), input_signals
+        )
+
+    def simulate_compiled_schematic(
+        self, schematic: Schematic, input_signals: dict[OutputPinId, bool]
+    ) -> dict[InputPinId, bool]:
+        """
+        Simulate a schematic using its generated python function.
+        """
+        verify_schematic_signal_pins(schematic, input_signals)
 
-        input_combinations = list(
-            itertools.product([False, True], repeat=len(input_pins))
+        compiled = compile_schematic(schematic, self)
+        output_signals = compiled.function(
+            *[input_signals[pin] for pin in compiled.input_pins]  # type: ignore
         )
-        pin_combinations: list[dict[PinId, bool]] = [
-            dict(zip(input_pins, combination)) for combination in input_combinations
-        ]
+        return {
+            InputPinId(pin): signal
+            for pin, signal in zip(compiled.output_pins, output_signals)
+        }
+
+    def simulate_schematic_bitsliced(
+        self,
+        schematic: Schematic,
+        input_vectors: list[dict[OutputPinId, bool]],
+        workers: int = 1,
+        shard_size: int = DEFAULT_CHUNK_ROWS,
+    ) -> list[dict[InputPinId, bool]]:
+        """
+        Simulate a schematic for many input vectors at once.
+        The vectors are packed into the bits of one int per input pin,
+        so the whole list is evaluated in a single pass over the netlist.
+        With more than one worker the vectors are split into shards of shard_size
+        which are evaluated by a process pool.
+        """
+        check_shard_size(shard_size)
+        for input_signals in input_vectors:
+            verify_schematic_signal_pins(schematic, input_signals)
+
+        netlist = self.get_schematic_netlist(schematic)
+        if workers > 1:
+            return simulate_vectors_parallel(
+                netlist, input_vectors, workers, shard_size
+            )
+
+        output_lanes = simulate_netlist_bitsliced(
+            netlist, pack_input_vectors(netlist, input_vectors), len(input_vectors)
+        )
+        return unpack_output_lanes(netlist, output_lanes, len(input_vectors))
+
+    def simulate_schematic_columns(
+        self, schematic: Schematic, input_columns: dict[OutputPinId, Sequence[bool]]
+    ) -> dict[InputPinId, Sequence[bool]]:
+        """
+        Simulate a schematic over columns of input signals, one sequence per input pin.
+        Returns one sequence per output pin.
+        The columns are NumPy boolean arrays when NumPy is installed and lists otherwise.
+        """
+        verify_schematic_signal_pins(schematic, input_columns)  # type: ignore
+
+        netlist = self.get_schematic_netlist(schematic)
+        row_counts = set(len(input_columns[pin]) for pin in netlist.input_pins)
+        if len(row_counts) > 1:
+            raise Exception(
+                f"Input columns for {schematic.schematic_id} have different lengths."
+            )
+        row_count = row_counts.pop() if row_counts else 1
+
+        if NUMPY_AVAILABLE:
+            output_columns = simulate_netlist_numpy(
+                netlist,
+                [
+                    np.asarray(input_columns[pin], dtype=np.bool_)
+                    for pin in netlist.input_pins
+                ],
+            )
 
-        output_results: list[tuple[dict[PinId, bool], dict[InputPinId, bool]]] = []
-        for pin_combination in pin_combinations:
-            output_results.append(
-                (pin_combination, self.simulate_schematic(schematic, pin_combination))
+        else:
+            output_lanes = simulate_netlist_bitsliced(
+                netlist,
+                [pack_column(input_columns[pin]) for pin in netlist.input_pins],
+                row_count,
             )
+            output_columns = [unpack_lane(lane, row_count) for lane in output_lanes]
+
+        return {
+            InputPinId(pin): column
+            for pin, column in zip(netlist.output_pins, output_columns)
+        }
+
+    def simulate_batch(
+        self,
+        schematic: Schematic,
+        input_batch: InputBatch,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        output_pins: Collection[PinId] | None = None,
+    ) -> dict[InputPinId, list[bool]]:
+        """
+        Simulate a schematic over a batch of input vectors in one call.
+        The batch is either a list or iterator of input signal dicts,
+        or a mapping of each input pin to a sequence of signals.
+        Returns one list of signals per output pin, in the order of the vectors.
+        The schematic is looked up and flattened once, and iterators are consumed chunk_rows vectors at a time.
+        If output_pins is given only the gates those outputs depend on are evaluated.
+        """
+        return simulate_netlist_batch(
+            self.get_netlist_for_outputs(schematic, output_pins),
+            input_batch,
+            chunk_rows,
+        )
 
-        return output_results
+    def enumerate_faults(self, schematic: Schematic) -> list[Fault]:
+        """
+        A stuck-at-0 and a stuck-at-1 fault on every wire of the flattened netlist of a schematic.
+        Faults are placed on the netlist the library simulates, so with optimization enabled
+        wires that always carry the same signal are merged before the faults are enumerated.
+        """
+        return enumerate_faults(self.get_schematic_netlist(schematic))
+
+    def simulate_faults(
+        self,
+        schematic: Schematic,
+        input_vectors: Iterable[Mapping[OutputPinId, bool]],
+        faults: list[Fault] | None = None,
+    ) -> FaultSimulationReport:
+        """
+        Grade a set of input vectors by the stuck-at faults they detect, all the faults
+        of enumerate_faults by default. The faulty copies of the circuit are packed into
+        the bits of every wire and simulated together, and each fault is dropped
+        by the first vector detecting it.
+        """
+        return simulate_netlist_faults(
+            self.get_schematic_netlist(schematic), input_vectors, faults
+        )
+
+    def get_truth_table_netlist(
+        self, schematic: Schematic, output_pins: Collection[PinId] | None
+    ) -> Netlist:
+        """
+        The netlist a truth table is enumerated over.
+        The truth table of some output pins only has a column for each input pin they depend on.
+        """
+        if output_pins is None:
+            return self.get_schematic_netlist(schematic)
+        return prune_netlist(
+            self.get_output_cone_netlist(schematic, output_pins),
+            frozenset(output_pins),
+            keep_inputs=False,
+        )
+
+    def get_word_layout(self, schematic: Schematic) -> WordLayout:
+        layout = self.word_layouts.get(schematic.schematic_id)
+        if layout is None:
+            layout = build_word_layout(self.get_schematic_netlist(schematic))
+            self.word_layouts[schematic.schematic_id] = layout
+        return layout
+
+    def simulate_schematic_words(
+        self, schematic: Schematic, input_words: Mapping[str, int]
+    ) -> dict[str, int]:
+        """
+        Simulate a schematic with one int per input bus, e.g. {"a": 5, "b": 9, "carryIn": 1}.
+        Returns one int per output bus. Bit i of a word is the signal of pin name[i],
+        and pins outside of a bus are words of a single bit.
+        """
+        return simulate_netlist_words(
+            self.get_schematic_netlist(schematic),
+            self.get_word_layout(schematic),
+            input_words,
+        )
+
+    def simulate_batch_words(
+        self, schematic: Schematic, input_words: Mapping[str, Sequence[int]]
+    ) -> dict[str, list[int]]:
+        """
+        Simulate a schematic over a sequence of ints per input bus in a single bitsliced pass.
+        Returns a list of ints per output bus, in the order of the rows.
+        """
+        return simulate_netlist_words_batch(
+            self.get_schematic_netlist(schematic),
+            self.get_word_layout(schematic),
+            input_words,
+        )
+
+    def get_schematic_truth_table_columns(
+        self, schematic: Schematic, output_pins: Collection[PinId] | None = None
+    ) -> tuple[dict[PinId, Sequence[bool]], dict[InputPinId, Sequence[bool]]]:
+        """
+        Compute the truth table of a schematic as columns instead of a list of rows.
+        Returns one sequence per input pin and one sequence per output pin.
+        The columns are NumPy boolean arrays when NumPy is installed and lists otherwise.
+        If output_pins is given the table only covers those outputs and the inputs they depend on.
+        """
+        netlist = self.get_truth_table_netlist(schematic, output_pins)
+        row_count = 1 << len(netlist.input_pins)
+
+        if NUMPY_AVAILABLE:
+            input_columns, output_columns = truth_table_columns(netlist)
+
+        else:
+            input_lanes = exhaustive_input_lanes(len(netlist.input_pins), 0, row_count)
+            output_lanes = simulate_netlist_bitsliced(netlist, input_lanes, row_count)
+            input_columns = [unpack_lane(lane, row_count) for lane in input_lanes]
+            output_columns = [unpack_lane(lane, row_count) for lane in output_lanes]
+
+        return (
+            dict(zip(netlist.input_pins, input_columns)),
+            {
+                InputPinId(pin): column
+                for pin, column in zip(netlist.output_pins, output_columns)
+            },
+        )
+
+    def iter_schematic_truth_table_columns(
+        self,
+        schematic: Schematic,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        output_pins: Collection[PinId] | None = None,
+    ) -> Iterator[tuple[dict[PinId, Sequence[bool]], dict[InputPinId, Sequence[bool]]]]:
+        """
+        Lazily yield the truth table of a schematic as columns, chunk_rows rows at a time.
+        Yields the input and output columns of each chunk, in row order.
+        The columns are NumPy boolean arrays when NumPy is installed and lists otherwise.
+        If output_pins is given the table only covers those outputs and the inputs they depend on.
+        """
+        check_chunk_rows(chunk_rows)
+        netlist = self.get_truth_table_netlist(schematic, output_pins)
+
+        if NUMPY_AVAILABLE:
+            chunks = (
+                (input_columns, output_columns)
+                for _, input_columns, output_columns in iter_truth_table_column_chunks(
+                    netlist, chunk_rows
+                )
+            )
+
+        else:
+            chunks = (
+                (
+                    [unpack_lane(lane, row_count) for lane in input_lanes],
+                    [unpack_lane(lane, row_count) for lane in output_lanes],
+                )
+                for _, row_count, input_lanes, output_lanes in iter_truth_table_chunks(
+                    netlist, chunk_rows
+                )
+            )
+
+        for input_columns, output_columns in chunks:
+            yield dict(zip(netlist.input_pins, input_columns)), {
+                InputPinId(pin): column
+                for pin, column in zip(netlist.output_pins, output_columns)
+            }
+
+    def get_schematic_bdd(
+        self, schematic: Schematic, variable_order: list[PinId] | None = None
+    ) -> SchematicBDD:
+        """
+        Build the output functions of a schematic as BDDs without enumerating its inputs.
+        """
+        return build_schematic_bdd(schematic, self, variable_order)
+
+    def check_schematic_equivalence(
+        self, schematic_a: Schematic, schematic_b: Schematic
+    ) -> dict[PinId, bool] | None:
+        """
+        Symbolically check whether two schematics compute the same outputs.
+        Returns None if they do, otherwise an input assignment on which they differ.
+        """
+        return find_counterexample(schematic_a, schematic_b, self)
+
+    def iter_schematic_truth_table(
+        self,
+        schematic: Schematic,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        workers: int = 1,
+        output_pins: Collection[PinId] | None = None,
+    ) -> Iterator[tuple[dict[PinId, bool], dict[InputPinId, bool]]]:
+        """
+        Lazily yield the rows of the truth table of a schematic.
+        Rows are evaluated chunk_rows at a time, so memory does not grow with the table.
+        With more than one worker the chunks are evaluated by a process pool.
+        If output_pins is given the table only covers those outputs and the inputs they depend on.
+        """
+        return iter_truth_table_rows(
+            self.get_truth_table_netlist(schematic, output_pins), chunk_rows, workers
+        )
+
+    def export_schematic_truth_table_csv(
+        self,
+        schematic: Schematic,
+        file: TextIO,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        workers: int = 1,
+    ) -> None:
+        export_truth_table_csv(
+            self.get_schematic_netlist(schematic), file, chunk_rows, workers
+        )
+
+    def export_schematic_truth_table_bitset(
+        self,
+        schematic: Schematic,
+        file: BinaryIO,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        workers: int = 1,
+    ) -> None:
+        export_truth_table_bitset(
+            self.get_schematic_netlist(schematic), file, chunk_rows, workers
+        )
+
+    def get_scehematic_truth_table(
+        self, schematic: Schematic, workers: int = 1
+    ) -> list[tuple[dict[PinId, bool], dict[InputPinId, bool]]]:
+        return list(
+            self.iter_schematic_truth_table(schematic, DEFAULT_CHUNK_ROWS, workers)
+        )
 
 
 def nand_logic(input_signals: dict[OutputPinId, bool]):
@@ -144,7 +1120,7 @@ def nand_logic(input_signals: dict[OutputPinId, bool]):
     The hardcoded logic for a nand gate.
     """
     return {
-        InputPinId("out"): (
+        InputPinId("out"): not (
             input_signals[OutputPinId("in1")] and input_signals[OutputPinId("in2")]
         )
     }
@@ -169,6 +1145,25 @@ def verify_schematic_signal_pins(
             )
 
 
+def verify_cone_signal_pins(
+    schematic: Schematic, cone: OutputCone, input_signals: dict[OutputPinId, bool]
+) -> None:
+    """
+    Verify all input signals provided are defined on the schematic and that the inputs of the cone are provided.
+    """
+    for pin_id in input_signals:
+        if pin_id not in schematic.input_pins:
+            raise Exception(
+                f"Input signal {pin_id} is not defined on schematic {schematic.schematic_id}"
+            )
+
+    for pin_id in cone.input_pins:
+        if pin_id not in input_signals:
+            raise Exception(
+                f"Input signal {pin_id} is not provided for schematic {schematic.schematic_id}"
+            )
+
+
 def get_schematic_components(
     schematic: Schematic, library: SchematicLibrary
 ) -> dict[SchematicComponentId, Schematic]:
@@ -1,7 +1,7 @@
 """
 Collection of simple wrapper types.
 """
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 class SchematicId(str):
@@ -9,7 +9,7 @@ class SchematicId(str):
     A unique identifier for a schematic stored in a schematic library.
     """
 
-    pass
+    __slots__ = ()
 
 
 class SchematicComponentId(str):
@@ -21,7 +21,7 @@ class SchematicComponentId(str):
         The component has the SchematicComponentId('nand1') and the SchematicId('NAND')
     """
 
-    pass
+    __slots__ = ()
 
 
 class PinId(str):
@@ -31,7 +31,7 @@ class PinId(str):
     Use either InputPinId or OutputPinId when working on a schematic.
     """
 
-    pass
+    __slots__ = ()
 
 
 class InputPinId(PinId):
@@ -40,7 +40,7 @@ class InputPinId(PinId):
     This pin must be provided only a single signal with a connection from a single OutputPin.
     """
 
-    pass
+    __slots__ = ()
 
 
 class OutputPinId(PinId):
@@ -49,7 +49,7 @@ class OutputPinId(PinId):
     A single output pin can have multiple or no connections from it.
     """
 
-    pass
+    __slots__ = ()
 
 
 class SchematicInput:
@@ -57,6 +57,16 @@ class SchematicInput:
     @TODO: Document
     """
 
+    __slots__ = ()
+
+    # There is only ever a single instance, so sentinels cost nothing per connection.
+    instance: "SchematicInput | None" = None
+
+    def __new__(cls) -> "SchematicInput":
+        if cls.instance is None:
+            cls.instance = super().__new__(cls)
+        return cls.instance
+
     def __eq__(self, other: object) -> bool:
         return isinstance(other, SchematicInput)
 
@@ -69,6 +79,16 @@ class SchematicOutput:
     @TODO: Document
     """
 
+    __slots__ = ()
+
+    # There is only ever a single instance, so sentinels cost nothing per connection.
+    instance: "SchematicOutput | None" = None
+
+    def __new__(cls) -> "SchematicOutput":
+        if cls.instance is None:
+            cls.instance = super().__new__(cls)
+        return cls.instance
+
     def __eq__(self, other: object) -> bool:
         return isinstance(other, SchematicOutput)
 
@@ -76,7 +96,7 @@ class SchematicOutput:
         return hash("SchematicOutput")
 
 
-@dataclass
+@dataclass(slots=True)
 class InputAttachmentPoint:
     """
     A point on a schematic where a connection can be created to.
@@ -89,7 +109,7 @@ class InputAttachmentPoint:
         return hash((self.component, self.pin))
 
 
-@dataclass
+@dataclass(slots=True)
 class OutputAttachmentPoint:
     """
     A point on a schematic where a connection can be created from.
@@ -102,7 +122,20 @@ class OutputAttachmentPoint:
         return hash((self.component, self.pin))
 
 
-@dataclass
+@dataclass(frozen=True)
+class SourceLocation:
+    """
+    A position in a source file, both line and column starting at 1.
+    """
+
+    line: int
+    column: int
+
+    def __str__(self) -> str:
+        return f"line {self.line}, column {self.column}"
+
+
+@dataclass(slots=True)
 class Connection:
     """
     A connection between and OutputAttachmentPoint and an InputAttachmentPoint.
@@ -112,5 +145,8 @@ class Connection:
     source: OutputAttachmentPoint
     destination: InputAttachmentPoint
 
+    # Where the connection was defined, if it was parsed from a file.
+    location: SourceLocation | None = field(default=None, compare=False)
+
     def __hash__(self) -> int:
         return hash((self.source, self.destination))
@@ -0,0 +1,311 @@
+"""
+Cycle based simulation of schematics holding state in DFF registers.
+
+The combinational logic between the registers is flattened into a single netlist once.
+Every clock cycle evaluates that netlist from the inputs of the cycle and the register outputs,
+samples the outputs and loads the next value of every register.
+The whole run of cycles is compiled into one generated python loop,
+so a cycle costs little more than evaluating its gates.
+"""
+from __future__ import annotations
+
+from schematic_types import *
+from schematic import Schematic
+from netlist import Netlist, NetlistBuilder, flatten_into, levelize
+from cone import prune_netlist
+from codegen import load_generated_function
+
+from dataclasses import dataclass
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Iterable, Mapping, Sequence
+import re
+
+if TYPE_CHECKING:
+    from schematic_library import SchematicLibrary
+
+
+@dataclass
+class SequentialNetlist:
+    """
+    A schematic flattened down to NAND gates and DFF registers.
+
+    The logic netlist reads the schematic inputs followed by the q output of every register,
+    and drives the schematic outputs followed by the d input of every register.
+    """
+
+    schematic_id: SchematicId
+
+    # The input and output pins of the schematic.
+    input_pins: list[PinId]
+    output_pins: list[PinId]
+
+    register_count: int
+
+    # The combinational logic between the registers.
+    logic: Netlist
+
+
+def register_pin(index: int, pin: str) -> PinId:
+    """
+    The name of a pin of a register in the logic netlist.
+    Pin names in a schematic can't contain a dot, so these never clash with them.
+    """
+    return PinId(f"dff{index}.{pin}")
+
+
+def flatten_sequential_schematic(
+    schematic: Schematic, library: SchematicLibrary
+) -> SequentialNetlist:
+    """
+    Flatten a schematic and all of its children, cutting every register into
+    an input and an output of the logic between the registers.
+    The pins are sorted by name like in flatten_schematic.
+    """
+    builder = NetlistBuilder()
+
+    input_pins = sorted(schematic.input_pins)
+    output_pins = sorted(schematic.output_pins)
+    input_wires = {pin: builder.new_wire() for pin in input_pins}
+
+    output_wires = flatten_into(builder, schematic, input_wires, library)
+    register_count = len(builder.registers)
+
+    gates, levelized_output_wires = levelize(
+        builder,
+        [input_wires[pin] for pin in input_pins] + [q for _, q in builder.registers],
+        [output_wires[pin] for pin in output_pins] + [d for d, _ in builder.registers],
+    )
+
+    return SequentialNetlist(
+        schematic_id=schematic.schematic_id,
+        input_pins=input_pins,
+        output_pins=output_pins,
+        register_count=register_count,
+        logic=Netlist(
+            schematic_id=schematic.schematic_id,
+            input_pins=input_pins
+            + [register_pin(index, "q") for index in range(register_count)],
+            output_pins=output_pins
+            + [register_pin(index, "d") for index in range(register_count)],
+            gates=gates,
+            output_wires=levelized_output_wires,
+        ),
+    )
+
+
+def find_registered_pins(netlist: SequentialNetlist) -> frozenset[PinId]:
+    """
+    Find the output pins that only depend on the registers and not on the inputs of the current cycle.
+    Feedback from these pins to the inputs goes through a register, so it is not a combinational loop.
+    """
+    input_count = len(netlist.input_pins)
+    logic = netlist.logic
+
+    # Whether each wire depends on an input of the current cycle.
+    combinational = [wire < input_count for wire in range(len(logic.input_pins))]
+    for in1, in2 in logic.gates:
+        combinational.append(combinational[in1] or combinational[in2])
+
+    return frozenset(
+        pin
+        for pin, wire in zip(netlist.output_pins, logic.output_wires)
+        if not combinational[wire]
+    )
+
+
+@dataclass
+class CompiledCycles:
+    """
+    A sequential netlist compiled into a Python function running any number of clock cycles.
+
+    The function takes the lane mask, the number of cycles, the sampling period,
+    one iterable per input pin in the order of input_pins and the register values to start from.
+    It returns one list of samples per pin of sampled_pins, the register values after the last cycle
+    and the number of cycles run, which is less than asked for if an input stream runs out.
+    """
+
+    schematic_id: SchematicId
+
+    input_pins: list[PinId]
+    sampled_pins: list[PinId]
+    register_count: int
+
+    # The generated source, kept around for debugging.
+    source: str
+
+    # The linecache entry of the source, dropped with codegen.release_generated_source.
+    filename: str
+
+    function: Callable[..., tuple[list[list[int]], list[int], int]]
+
+
+def generate_cycles_source(
+    netlist: Netlist, name: str, input_count: int, register_count: int
+) -> str:
+    """
+    Emit the source of a function looping over clock cycles.
+    The logic netlist is pruned to the sampled outputs followed by the d input of every register.
+
+    Every wire is a local variable, like in codegen.py, and the register outputs
+    are the wires the d inputs are copied to at the end of each cycle.
+    """
+    logic_input_count = len(netlist.input_pins)
+    sampled_count = len(netlist.output_pins) - register_count
+    sampled_wires = netlist.output_wires[:sampled_count]
+    d_wires = netlist.output_wires[sampled_count:]
+
+    input_wires = "".join(f"w{wire}, " for wire in range(input_count))
+    q_wires = "".join(f"w{wire}, " for wire in range(input_count, logic_input_count))
+    streams = ", ".join(f"s{index}" for index in range(input_count))
+
+    lines = [
+        f"def {name}(mask, cycles, period, {streams}{', ' if streams else ''}state):"
+    ]
+    for index in range(sampled_count):
+        lines.append(f"    o{index} = []")
+        lines.append(f"    a{index} = o{index}.append")
+    if register_count:
+        lines.append(f"    ({q_wires}) = state")
+    lines.append("    countdown = period")
+    lines.append("    cycle = 0")
+
+    if input_count:
+        lines.append(
+            f"    for cycle, ({input_wires}) in enumerate(islice(zip({streams}), cycles), 1):"
+        )
+    else:
+        lines.append("    for cycle in range(1, cycles + 1):")
+
+    for gate_index, (in1, in2) in enumerate(netlist.gates):
+        out = logic_input_count + gate_index
+        lines.append(f"        w{out} = ~(w{in1} & w{in2}) & mask")
+
+    if sampled_count:
+        lines.append("        countdown -= 1")
+        lines.append("        if not countdown:")
+        lines.append("            countdown = period")
+        for index, wire in enumerate(sampled_wires):
+            lines.append(f"            a{index}(w{wire})")
+
+    if register_count:
+        next_state = "".join(f"w{wire}, " for wire in d_wires)
+        lines.append(f"        ({q_wires}) = ({next_state})")
+
+    samples = "".join(f"o{index}, " for index in range(sampled_count))
+    lines.append(f"    return [{samples}], [{q_wires}], cycle")
+
+    return "\n".join(lines) + "\n"
+
+
+def compile_cycles(
+    netlist: SequentialNetlist, sampled_pins: Iterable[PinId]
+) -> CompiledCycles:
+    """
+    Generate, compile and load the function stepping a sequential netlist.
+    Only the gates the sampled output pins and the registers depend on are evaluated.
+    """
+    sampled = set(sampled_pins)
+    sampled_pins = [pin for pin in netlist.output_pins if pin in sampled]
+    register_outputs = netlist.logic.output_pins[len(netlist.output_pins) :]
+    logic = prune_netlist(netlist.logic, frozenset(sampled_pins + register_outputs))
+
+    name = "step_" + re.sub(r"\W", "_", netlist.schematic_id)
+    source = generate_cycles_source(
+        logic, name, len(netlist.input_pins), netlist.register_count
+    )
+
+    function, filename = load_generated_function(source, name, {"islice": islice})
+
+    return CompiledCycles(
+        schematic_id=netlist.schematic_id,
+        input_pins=netlist.input_pins,
+        sampled_pins=sampled_pins,
+        register_count=netlist.register_count,
+        source=source,
+        filename=filename,
+        function=function,
+    )
+
+
+class CycleSimulator:
+    """
+    The register state of a sequential schematic and the compiled function stepping it.
+
+    Signals are ints. With a single lane every signal is 0 or 1. With more lanes,
+    bit i of every signal belongs to the i-th of that many independent copies of the circuit.
+    """
+
+    def __init__(self, compiled: CompiledCycles, lanes: int = 1):
+        if lanes < 1:
+            raise Exception(f"A cycle simulator needs at least one lane, not {lanes}.")
+
+        self.compiled = compiled
+        self.mask = (1 << lanes) - 1
+
+        # The number of clock cycles stepped since the last reset.
+        self.cycle = 0
+
+        # The output of every register.
+        self.state = [0] * compiled.register_count
+
+    def reset(self) -> None:
+        """
+        Clear every register, as at power on.
+        """
+        self.cycle = 0
+        self.state = [0] * self.compiled.register_count
+
+    def step(
+        self,
+        input_streams: Mapping[PinId, Iterable[int]],
+        cycles: int | None = None,
+        sample_every: int = 1,
+    ) -> dict[InputPinId, list[int]]:
+        """
+        Run clock cycles, reading the signal of every input pin in each cycle from its stream.
+        The outputs are sampled at the end of every sample_every-th cycle, before the registers load.
+
+        Unless cycles is given, run until the shortest stream is exhausted.
+        Streams only have to be iterable, so itertools.repeat holds an input steady.
+        Returns the samples of each sampled output pin.
+        """
+        compiled = self.compiled
+        for pin in input_streams:
+            if pin not in compiled.input_pins:
+                raise Exception(
+                    f"Input pin {pin} is not defined on schematic {compiled.schematic_id}"
+                )
+        for pin in compiled.input_pins:
+            if pin not in input_streams:
+                raise Exception(
+                    f"Input pin {pin} is not provided for schematic {compiled.schematic_id}"
+                )
+        if sample_every < 1:
+            raise Exception(f"Cannot sample every {sample_every} cycles.")
+
+        streams = [input_streams[pin] for pin in compiled.input_pins]
+        if cycles is None:
+            lengths = [
+                len(stream) for stream in streams if isinstance(stream, Sequence)
+            ]
+            if not lengths:
+                raise Exception(
+                    "The number of cycles to run is needed when no stream has a length."
+                )
+            cycles = min(lengths)
+        else:
+            for pin, stream in zip(compiled.input_pins, streams):
+                if isinstance(stream, Sequence) and len(stream) < cycles:
+                    raise Exception(
+                        f"The stream of input pin {pin} has {len(stream)} signals, not {cycles}."
+                    )
+
+        samples, self.state, cycles_run = compiled.function(
+            self.mask, cycles, sample_every, *streams, self.state
+        )
+        self.cycle += cycles_run
+
+        return {
+            InputPinId(pin): pin_samples
+            for pin, pin_samples in zip(compiled.sampled_pins, samples)
+        }
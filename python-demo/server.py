@@ -0,0 +1,380 @@
+"""
+A local simulation server keeping a warm SchematicLibrary between requests.
+
+Clients connect over a Unix socket or localhost TCP and exchange JSON objects, one per line.
+Every request carries an "id" that is copied into its responses, so responses may arrive in any order.
+
+    {"id": 1, "op": "simulate", "schematic": "AND", "inputs": {"in1": true, "in2": false}}
+        -> {"id": 1, "outputs": {"out": false}}
+
+    {"id": 2, "op": "truth_table", "schematic": "AND", "chunk_rows": 65536}
+        -> {"id": 2, "input_pins": [...], "output_pins": [...], "rows": 4}
+        -> {"id": 2, "first_row": 0, "row_count": 4, "outputs": {"out": "8"}}
+        -> {"id": 2, "done": true}
+
+    {"id": 3, "op": "load", "source": "Name: ..."}  -> {"id": 3, "schematic": "..."}
+    {"id": 4, "op": "schematics"}                    -> {"id": 4, "schematics": [...]}
+    {"id": 5, "op": "pins", "schematic": "AND"}      -> {"id": 5, "input_pins": [...], "output_pins": [...]}
+
+Truth table rows follow the order of itertools.product over input_pins.
+Each output of a chunk is a hex encoded int where bit r is row first_row + r.
+Failed requests are answered with {"id": ..., "error": "..."}.
+
+Concurrent simulate requests for the same schematic are coalesced into a single
+SchematicLibrary.simulate_batch call. The library is only used from one worker thread,
+so the event loop keeps reading requests, and growing the next batch, while a batch is evaluated.
+"""
+from schematic_types import *
+from schematic_library import SchematicLibrary, verify_schematic_signal_pins
+from library_cache import LibraryCache
+from mhrd_parser import parse_mhrd_schematic
+from truth_table import DEFAULT_CHUNK_ROWS, iter_truth_table_chunks
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+
+T = TypeVar("T")
+
+# The largest number of vectors evaluated in one coalesced batch.
+DEFAULT_MAX_BATCH = 4096
+
+# The longest request line accepted, large enough for mhrd sources sent with load.
+MAX_LINE_BYTES = 64 * 1024 * 1024
+
+
+class PendingBatch:
+    """
+    The simulate requests for one schematic waiting to be evaluated together.
+    """
+
+    def __init__(self):
+        self.vectors: list[dict[OutputPinId, bool]] = []
+        self.futures: list[asyncio.Future] = []
+
+
+class SimulationServer:
+    def __init__(self, library: SchematicLibrary, max_batch: int = DEFAULT_MAX_BATCH):
+        self.library = library
+        self.max_batch = max_batch
+
+        # Every use of the library happens on this thread, one call at a time.
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+        self.pending: dict[SchematicId, PendingBatch] = {}
+
+        # Statistics of the coalescing.
+        self.requests = 0
+        self.batches = 0
+
+    async def run_in_library_thread(self, function: Callable[[], T]) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function)
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        tasks: set[asyncio.Task] = set()
+
+        async def send(response: dict) -> None:
+            writer.write(json.dumps(response, separators=(",", ":")).encode() + b"\n")
+            await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                task = asyncio.create_task(self.handle_line(line, send))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        except ConnectionError:
+            pass
+
+        finally:
+            writer.close()
+
+    async def handle_line(self, line: bytes, send) -> None:
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise Exception("A request must be a JSON object.")
+            request_id = request.get("id")
+
+            op = request.get("op")
+            if op == "simulate":
+                outputs = await self.simulate(
+                    SchematicId(request["schematic"]), request["inputs"]
+                )
+                await send({"id": request_id, "outputs": outputs})
+
+            elif op == "truth_table":
+                await self.stream_truth_table(
+                    request_id,
+                    SchematicId(request["schematic"]),
+                    int(request.get("chunk_rows", DEFAULT_CHUNK_ROWS)),
+                    send,
+                )
+
+            elif op == "load":
+                schematic_id = await self.run_in_library_thread(
+                    lambda: self.load_schematic(request["source"])
+                )
+                await send({"id": request_id, "schematic": schematic_id})
+
+            elif op == "schematics":
+                schematic_ids = await self.run_in_library_thread(
+                    lambda: [
+                        str(schematic.schematic_id)
+                        for schematic in self.library.schematics
+                    ]
+                )
+                await send({"id": request_id, "schematics": schematic_ids})
+
+            elif op == "pins":
+                input_pins, output_pins = await self.run_in_library_thread(
+                    lambda: self.list_pins(SchematicId(request["schematic"]))
+                )
+                await send(
+                    {
+                        "id": request_id,
+                        "input_pins": input_pins,
+                        "output_pins": output_pins,
+                    }
+                )
+
+            else:
+                raise Exception(f"Unknown op: {op!r}")
+
+        except ConnectionError:
+            raise
+
+        except Exception as e:
+            await send({"id": request_id, "error": str(e) or type(e).__name__})
+
+    def load_schematic(self, source: str) -> str:
+        """
+        Add a schematic to the library, replacing any schematic with the same id.
+        """
+        schematic = parse_mhrd_schematic(source)
+        if self.library.get_schematic_or_none(schematic.schematic_id) is None:
+            self.library.add_schematic(schematic)
+        else:
+            self.library.replace_schematic(schematic)
+        return str(schematic.schematic_id)
+
+    def list_pins(self, schematic_id: SchematicId) -> tuple[list[str], list[str]]:
+        schematic = self.library.get_schematic(schematic_id)
+        return sorted(schematic.input_pins), sorted(schematic.output_pins)
+
+    async def simulate(
+        self, schematic_id: SchematicId, inputs: dict[str, bool]
+    ) -> dict[str, bool]:
+        """
+        Queue a vector in the pending batch of its schematic and wait for its outputs.
+        The schematic and the pins are checked on the library thread when the batch is evaluated,
+        as a load may replace the schematic in the meantime.
+        """
+        input_signals = {
+            OutputPinId(pin): bool(signal) for pin, signal in inputs.items()
+        }
+
+        batch = self.pending.get(schematic_id)
+        if batch is None:
+            batch = PendingBatch()
+            self.pending[schematic_id] = batch
+            # Flush once every request already read in this pass of the event loop has joined.
+            asyncio.get_running_loop().call_soon(
+                lambda: asyncio.ensure_future(self.flush(schematic_id))
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        batch.vectors.append(input_signals)
+        batch.futures.append(future)
+        self.requests += 1
+
+        if len(batch.vectors) >= self.max_batch:
+            del self.pending[schematic_id]
+            asyncio.ensure_future(self.evaluate(schematic_id, batch))
+
+        return await future
+
+    async def flush(self, schematic_id: SchematicId) -> None:
+        batch = self.pending.pop(schematic_id, None)
+        if batch is not None:
+            await self.evaluate(schematic_id, batch)
+
+    async def evaluate(self, schematic_id: SchematicId, batch: PendingBatch) -> None:
+        self.batches += 1
+        try:
+            output_columns, errors = await self.run_in_library_thread(
+                lambda: self.simulate_batch(schematic_id, batch.vectors)
+            )
+
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        valid_futures: list[asyncio.Future] = []
+        for future, error in zip(batch.futures, errors):
+            if error is None:
+                valid_futures.append(future)
+            elif not future.done():
+                future.set_exception(error)
+
+        for row, future in enumerate(valid_futures):
+            if not future.done():
+                future.set_result(
+                    {str(pin): column[row] for pin, column in output_columns.items()}
+                )
+
+    def simulate_batch(
+        self, schematic_id: SchematicId, vectors: list[dict[OutputPinId, bool]]
+    ) -> tuple[dict[InputPinId, list[bool]], list[Exception | None]]:
+        """
+        Simulate the vectors with valid pins in one batch.
+        Returns their output columns and the pin error of every vector, None if it is valid.
+        """
+        schematic = self.library.get_schematic(schematic_id)
+
+        valid_vectors: list[dict[OutputPinId, bool]] = []
+        errors: list[Exception | None] = []
+        for input_signals in vectors:
+            try:
+                verify_schematic_signal_pins(schematic, input_signals)
+            except Exception as e:
+                errors.append(e)
+                continue
+            valid_vectors.append(input_signals)
+            errors.append(None)
+
+        if not valid_vectors:
+            return {}, errors
+        return self.library.simulate_batch(schematic, valid_vectors), errors
+
+    async def stream_truth_table(
+        self, request_id: object, schematic_id: SchematicId, chunk_rows: int, send
+    ) -> None:
+        netlist = await self.run_in_library_thread(
+            lambda: self.library.get_schematic_netlist(
+                self.library.get_schematic(schematic_id)
+            )
+        )
+        output_pins = [str(pin) for pin in netlist.output_pins]
+        await send(
+            {
+                "id": request_id,
+                "input_pins": [str(pin) for pin in netlist.input_pins],
+                "output_pins": output_pins,
+                "rows": 1 << len(netlist.input_pins),
+            }
+        )
+
+        # Evaluate one chunk at a time, so other requests are served in between.
+        chunks = iter_truth_table_chunks(netlist, chunk_rows)
+        while True:
+            chunk = await self.run_in_library_thread(lambda: next(chunks, None))
+            if chunk is None:
+                break
+
+            first_row, row_count, _, output_lanes = chunk
+            await send(
+                {
+                    "id": request_id,
+                    "first_row": first_row,
+                    "row_count": row_count,
+                    "outputs": {
+                        pin: format(lane, "x")
+                        for pin, lane in zip(output_pins, output_lanes)
+                    },
+                }
+            )
+
+        await send({"id": request_id, "done": True})
+
+
+def load_library(
+    schematics_directory: str, cache_directory: str | None = None
+) -> SchematicLibrary:
+    """
+    Load every mhrd file in a directory and flatten the schematics ahead of the first request.
+    """
+    library_cache = LibraryCache(cache_directory) if cache_directory else None
+    library = SchematicLibrary(library_cache)
+
+    for path in sorted(
+        glob.glob(os.path.join(schematics_directory, "**", "*.mhrd"), recursive=True)
+    ):
+        with open(path, "r") as f:
+            source = f.read()
+        if library_cache is not None:
+            schematic = library_cache.load_schematic(source, parse_mhrd_schematic)
+        else:
+            schematic = parse_mhrd_schematic(source)
+        library.add_schematic(schematic)
+
+    for schematic in library.schematics:
+        if not library.is_sequential(schematic):
+            library.get_schematic_netlist(schematic)
+
+    return library
+
+
+async def serve(
+    server: SimulationServer, socket_path: str | None, host: str, port: int
+) -> None:
+    if socket_path is not None:
+        listener = await asyncio.start_unix_server(
+            server.handle_connection, socket_path, limit=MAX_LINE_BYTES
+        )
+        print(f"Serving on {socket_path}", file=sys.stderr)
+    else:
+        listener = await asyncio.start_server(
+            server.handle_connection, host, port, limit=MAX_LINE_BYTES
+        )
+        print(f"Serving on {host}:{port}", file=sys.stderr)
+
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Serve simulations of mhrd schematics."
+    )
+    parser.add_argument("--socket", help="Listen on this Unix socket path.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--schematics", default="../schematics")
+    parser.add_argument("--cache", help="Cache parsed schematics in this directory.")
+    parser.add_argument(
+        "--max-batch",
+        type=int,
+        default=DEFAULT_MAX_BATCH,
+        help="Coalesce at most this many simulate requests. 1 disables coalescing.",
+    )
+    args = parser.parse_args(argv)
+
+    server = SimulationServer(
+        load_library(args.schematics, args.cache), max_batch=args.max_batch
+    )
+    try:
+        asyncio.run(serve(server, args.socket, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
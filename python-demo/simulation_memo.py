@@ -0,0 +1,77 @@
+"""
+Memoization of sub-circuit simulation results.
+"""
+from schematic_types import *
+
+from collections import OrderedDict
+
+
+class SimulationMemo:
+    """
+    A bounded cache of simulation results keyed by schematic id and packed input bits.
+    The least recently used entry is evicted once max_entries is reached.
+    Only schematics with at most max_inputs input pins are memoized.
+    """
+
+    def __init__(self, max_entries: int, max_inputs: int):
+        if max_entries <= 0:
+            raise Exception("The simulation memo must hold at least one entry.")
+
+        self.max_entries = max_entries
+        self.max_inputs = max_inputs
+
+        self.entries: OrderedDict[
+            tuple[SchematicId, int], dict[InputPinId, bool]
+        ] = OrderedDict()
+
+        # The input pins of each memoized schematic in the order they are packed.
+        self.pin_orders: dict[SchematicId, list[PinId]] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def accepts(self, pin_count: int) -> bool:
+        """
+        Check whether a schematic with this many input pins is small enough to memoize.
+        """
+        return pin_count <= self.max_inputs
+
+    def make_key(
+        self, schematic_id: SchematicId, input_signals: dict[OutputPinId, bool]
+    ) -> tuple[SchematicId, int]:
+        pin_order = self.pin_orders.get(schematic_id)
+        if pin_order is None:
+            pin_order = sorted(input_signals)
+            self.pin_orders[schematic_id] = pin_order
+
+        packed = 0
+        for bit, pin in enumerate(pin_order):
+            if input_signals[pin]:  # type: ignore
+                packed |= 1 << bit
+        return (schematic_id, packed)
+
+    def get(self, key: tuple[SchematicId, int]) -> dict[InputPinId, bool] | None:
+        output_signals = self.entries.get(key)
+        if output_signals is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return dict(output_signals)
+
+    def put(
+        self, key: tuple[SchematicId, int], output_signals: dict[InputPinId, bool]
+    ) -> None:
+        self.entries[key] = dict(output_signals)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def discard_schematic(self, schematic_id: SchematicId) -> None:
+        """
+        Drop every entry of a schematic.
+        """
+        for key in [key for key in self.entries if key[0] == schematic_id]:
+            del self.entries[key]
+        self.pin_orders.pop(schematic_id, None)
@@ -0,0 +1,70 @@
+import glob
+import os
+import sys
+
+import pytest
+
+DEMO_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMATICS_DIRECTORY = os.path.join(os.path.dirname(DEMO_DIRECTORY), "schematics")
+
+# The modules of the demo are flat and imported by name, as when running main.py.
+sys.path.insert(0, DEMO_DIRECTORY)
+
+from mhrd_parser import parse_mhrd_schematic
+from schematic_library import SchematicLibrary
+
+
+def ripple_adder(width: int, name: str = "ADD") -> str:
+    """
+    The source of a ripple carry adder of FULLADDER parts with a[i], b[i] and s[i] bus pins.
+    """
+    wires = ["input.carryIn -> fa0.carryIn"]
+    for index in range(width):
+        wires += [
+            f"input.a[{index}] -> fa{index}.a",
+            f"input.b[{index}] -> fa{index}.b",
+            f"fa{index}.sum -> output.s[{index}]",
+        ]
+        if index:
+            wires.append(f"fa{index - 1}.carryOut -> fa{index}.carryIn")
+    wires.append(f"fa{width - 1}.carryOut -> output.carryOut")
+
+    parts = ", ".join(f"fa{index}->FULLADDER" for index in range(width))
+    return (
+        f'Name: "{name}";\n'
+        f"Inputs: a[{width}], b[{width}], carryIn;\n"
+        f"Outputs: s[{width}], carryOut;\n"
+        f"Parts: {parts};\n"
+        f"Wires: {', '.join(wires)};\n"
+    )
+
+
+def load_schematics(library: SchematicLibrary) -> None:
+    for file in sorted(
+        glob.glob(os.path.join(SCHEMATICS_DIRECTORY, "**", "*.mhrd"), recursive=True)
+    ):
+        with open(file) as mhrd_file:
+            library.add_schematic(parse_mhrd_schematic(mhrd_file.read()))
+
+
+@pytest.fixture
+def library() -> SchematicLibrary:
+    library = SchematicLibrary()
+    load_schematics(library)
+    return library
+
+
+def combinational_schematics(library: SchematicLibrary) -> list:
+    return [
+        schematic
+        for schematic in library.schematics
+        if not library.is_sequential(schematic)
+    ]
+
+
+@pytest.fixture
+def schematics(library: SchematicLibrary) -> list:
+    """
+    The combinational schematics of the schematics directory.
+    """
+    return combinational_schematics(library)
@@ -0,0 +1,74 @@
+import random
+
+from conftest import combinational_schematics, ripple_adder
+from mhrd_parser import parse_mhrd_schematic
+
+
+def test_bdd_matches_truth_table(library):
+    for schematic in combinational_schematics(library):
+        bdd = library.get_schematic_bdd(schematic)
+        for vector, outputs in library.get_scehematic_truth_table(schematic):
+            assignment = [vector[pin] for pin in bdd.variable_order]
+            assert {
+                pin: bdd.manager.evaluate(node, assignment)
+                for pin, node in bdd.output_nodes.items()
+            } == outputs, schematic.schematic_id
+
+
+def test_equivalence(library):
+    xor = library.get_schematic("XOR")
+    library.add_schematic(
+        parse_mhrd_schematic(
+            'Name: "XOR2"; Inputs: in1, in2; Outputs: out;'
+            "Parts: o->OR, n->NAND, a->AND;"
+            "Wires: input.in1 -> o.in1, input.in2 -> o.in2, input.in1 -> n.in1,"
+            " input.in2 -> n.in2, o.out -> a.in1, n.out -> a.in2, a.out -> output.out;"
+        )
+    )
+    assert (
+        library.check_schematic_equivalence(xor, library.get_schematic("XOR2")) is None
+    )
+
+    counterexample = library.check_schematic_equivalence(
+        xor, library.get_schematic("XNOR")
+    )
+    assert counterexample is not None
+    assert library.simulate_schematic(xor, counterexample) != (
+        library.simulate_schematic(library.get_schematic("XNOR"), counterexample)
+    )
+
+
+def test_model_counting(library):
+    for schematic in combinational_schematics(library):
+        bdd = library.get_schematic_bdd(schematic)
+        table = library.get_scehematic_truth_table(schematic)
+        for pin, node in bdd.output_nodes.items():
+            assert bdd.manager.satisfy_count(node) == sum(
+                outputs[pin] for _, outputs in table
+            )
+
+
+def test_bus_adder_default_order(library):
+    library.add_schematic(parse_mhrd_schematic(ripple_adder(32)))
+    schematic = library.get_schematic("ADD")
+    bdd = library.get_schematic_bdd(schematic)
+
+    # The bits of the operands are interleaved from the least significant bit up,
+    # which keeps the BDDs, and every intermediate node built, linear in the width.
+    assert bdd.variable_order[:5] == ["carryIn", "a[0]", "b[0]", "a[1]", "b[1]"]
+    assert bdd.manager.node_count < 20000
+
+    rng = random.Random(0)
+    for _ in range(20):
+        a, b, carry = rng.getrandbits(32), rng.getrandbits(32), rng.getrandbits(1)
+        signals = {"carryIn": bool(carry)}
+        signals.update({f"a[{bit}]": bool(a >> bit & 1) for bit in range(32)})
+        signals.update({f"b[{bit}]": bool(b >> bit & 1) for bit in range(32)})
+        assignment = [signals[pin] for pin in bdd.variable_order]
+        outputs = {
+            pin: bdd.manager.evaluate(node, assignment)
+            for pin, node in bdd.output_nodes.items()
+        }
+        total = a + b + carry
+        assert sum(outputs[f"s[{bit}]"] << bit for bit in range(32)) == total % 2**32
+        assert outputs["carryOut"] == bool(total >> 32)
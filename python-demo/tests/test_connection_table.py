@@ -0,0 +1,42 @@
+import random
+
+from schematic import Schematic
+from schematic_types import *
+
+
+def test_find_after_removes():
+    count = 500
+    schematic = Schematic(
+        SchematicId("S"),
+        {PinId("a")},
+        set(),
+        {
+            SchematicComponentId(f"n{index}"): SchematicId("NAND")
+            for index in range(count)
+        },
+    )
+    connections = [
+        Connection(
+            OutputAttachmentPoint(SchematicInput(), OutputPinId("a")),
+            InputAttachmentPoint(SchematicComponentId(f"n{index}"), InputPinId("in1")),
+        )
+        for index in range(count)
+    ]
+    for connection in connections:
+        schematic.add_connection(connection)
+    # Adding a connection again does not duplicate it.
+    for connection in connections:
+        schematic.add_connection(connection)
+    table = schematic.connection_table
+    assert len(table) == count
+
+    random.Random(0).shuffle(connections)
+    removed, kept = connections[: count // 2], connections[count // 2 :]
+    for connection in removed:
+        schematic.remove_connection(connection)
+
+    assert set(table) == set(kept)
+    for connection in kept:
+        assert table.find(*table.connection_indexes(connection)) is not None
+    for connection in removed:
+        assert table.find(*table.connection_indexes(connection)) is None
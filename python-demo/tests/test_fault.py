@@ -0,0 +1,56 @@
+import itertools
+import random
+
+from conftest import ripple_adder
+from mhrd_parser import parse_mhrd_schematic
+from netlist import simulate_netlist
+
+
+def first_detection(netlist, vectors, fault):
+    """
+    Simulate a single fault, one vector at a time, and return the first vector detecting it.
+    """
+    input_count = len(netlist.input_pins)
+    for index, vector in enumerate(vectors):
+        wires = [vector[pin] for pin in netlist.input_pins]
+        if fault.wire < input_count:
+            wires[fault.wire] = fault.stuck_at
+        for out, (in1, in2) in enumerate(netlist.gates, input_count):
+            signal = not (wires[in1] and wires[in2])
+            wires.append(fault.stuck_at if out == fault.wire else signal)
+
+        faulty = [wires[wire] for wire in netlist.output_wires]
+        if faulty != list(simulate_netlist(netlist, vector).values()):
+            return index
+    return None
+
+
+def test_full_adder_coverage(library):
+    schematic = library.get_schematic("FULLADDER")
+    pins = sorted(schematic.input_pins)
+    vectors = [
+        dict(zip(pins, signals))
+        for signals in itertools.product([False, True], repeat=len(pins))
+    ]
+    report = library.simulate_faults(schematic, vectors)
+    assert len(report.faults) == len(library.enumerate_faults(schematic))
+    assert report.vector_count <= len(vectors)
+    for fault in report.undetected:
+        assert (
+            first_detection(library.get_schematic_netlist(schematic), vectors, fault)
+            is None
+        )
+
+
+def test_parallel_faults_match_serial(library):
+    library.add_schematic(parse_mhrd_schematic(ripple_adder(8)))
+    schematic = library.get_schematic("ADD")
+    netlist = library.get_schematic_netlist(schematic)
+
+    rng = random.Random(1)
+    vectors = [
+        {pin: rng.random() < 0.5 for pin in netlist.input_pins} for _ in range(12)
+    ]
+    report = library.simulate_faults(schematic, vectors)
+    for fault in library.enumerate_faults(schematic):
+        assert report.detections.get(fault) == first_detection(netlist, vectors, fault)
@@ -0,0 +1,62 @@
+import random
+
+from benchmarks.generators import (
+    array_multiplier,
+    mux_tree,
+    random_nand_dag,
+    ripple_carry_adder,
+)
+from mhrd_parser import parse_mhrd_schematic
+
+
+def bits(prefix: str, value: int, width: int) -> dict[str, bool]:
+    return {f"{prefix}{index}": bool(value >> index & 1) for index in range(width)}
+
+
+def word(outputs: dict[str, bool], prefix: str, width: int) -> int:
+    return sum(outputs[f"{prefix}{index}"] << index for index in range(width))
+
+
+def test_adder(library):
+    schematic = parse_mhrd_schematic(ripple_carry_adder(8))
+    library.add_schematic(schematic)
+    rng = random.Random(0)
+    for _ in range(20):
+        a, b, carry = rng.getrandbits(8), rng.getrandbits(8), rng.getrandbits(1)
+        outputs = library.simulate_flattened_schematic(
+            schematic, {**bits("a", a, 8), **bits("b", b, 8), "carryIn": bool(carry)}
+        )
+        assert word(outputs, "s", 8) + (outputs["carryOut"] << 8) == a + b + carry
+
+
+def test_multiplier(library):
+    schematic = parse_mhrd_schematic(array_multiplier(4))
+    library.add_schematic(schematic)
+    for a in range(16):
+        for b in range(16):
+            outputs = library.simulate_flattened_schematic(
+                schematic, {**bits("a", a, 4), **bits("b", b, 4)}
+            )
+            assert word(outputs, "p", 8) == a * b
+
+
+def test_mux_tree(library):
+    schematic = parse_mhrd_schematic(mux_tree(3))
+    library.add_schematic(schematic)
+    for select in range(8):
+        for data in (1 << select, 0xFF ^ (1 << select)):
+            outputs = library.simulate_flattened_schematic(
+                schematic, {**bits("d", data, 8), **bits("s", select, 3)}
+            )
+            assert outputs["out"] == bool(data >> select & 1)
+
+
+def test_random_nand_dag(library):
+    schematic = parse_mhrd_schematic(random_nand_dag(200, inputs=6, outputs=4))
+    library.add_schematic(schematic)
+    rng = random.Random(1)
+    for _ in range(10):
+        vector = bits("i", rng.getrandbits(6), 6)
+        assert library.simulate_flattened_schematic(
+            schematic, vector
+        ) == library.simulate_schematic(schematic, vector)
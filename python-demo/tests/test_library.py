@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from conftest import SCHEMATICS_DIRECTORY
+from mhrd_parser import parse_mhrd_schematic
+
+
+def read_schematic_source(name: str) -> str:
+    with open(os.path.join(SCHEMATICS_DIRECTORY, "gates", f"{name}.mhrd")) as file:
+        return file.read()
+
+
+def test_lookup(library):
+    assert library.get_schematic("XOR").schematic_id == "XOR"
+    assert library.get_schematic_or_none("MISSING") is None
+    with pytest.raises(Exception, match="Could not find"):
+        library.get_schematic("MISSING")
+    with pytest.raises(Exception, match="duplicate id"):
+        library.add_schematic(library.get_schematic("XOR"))
+
+
+def test_dependants(library):
+    dependants = library.get_dependants("XOR")
+    assert {"HALFADDER", "FULLADDER"} <= dependants
+    assert "XOR" not in dependants
+    assert "NOT" not in library.get_dependants("FULLADDER")
+
+
+def test_replace_invalidates_dependants(library):
+    half_adder = library.get_schematic("HALFADDER")
+    inputs = {"a": True, "b": False}
+    assert library.simulate_flattened_schematic(half_adder, inputs)["sum"] is True
+    full_adder_netlist = library.get_schematic_netlist(
+        library.get_schematic("FULLADDER")
+    )
+    not_netlist = library.get_schematic_netlist(library.get_schematic("NOT"))
+
+    # An XOR computing XNOR flips the sum of every half adder using it.
+    xnor = read_schematic_source("XNOR").replace('"XNOR"', '"XOR"')
+    library.replace_schematic(parse_mhrd_schematic(xnor))
+    assert library.simulate_flattened_schematic(half_adder, inputs)["sum"] is False
+
+    # The netlists of the dependants are rebuilt, the others are kept.
+    assert (
+        library.get_schematic_netlist(library.get_schematic("FULLADDER"))
+        is not full_adder_netlist
+    )
+    assert library.get_schematic_netlist(library.get_schematic("NOT")) is not_netlist
+
+    with pytest.raises(Exception, match="NAND"):
+        library.replace_schematic(library.get_schematic("NAND"))
+
+
+def test_add_invalidates_dependants(library):
+    library.add_schematic(
+        parse_mhrd_schematic(
+            'Name: "HOLD"; Inputs: d; Outputs: q; Parts: r->REG;'
+            "Wires: input.d -> r.d, r.q -> output.q;"
+        )
+    )
+    hold = library.get_schematic("HOLD")
+    assert not library.is_sequential(hold)
+
+    # Adding the missing part drops what was worked out without it.
+    library.add_schematic(
+        parse_mhrd_schematic(
+            'Name: "REG"; Inputs: d; Outputs: q; Parts: f->DFF;'
+            "Wires: input.d -> f.d, f.q -> output.q;"
+        )
+    )
+    assert library.is_sequential(hold)
+
+
+def test_schematics_are_read_only(library):
+    schematics = library.schematics
+    assert schematics[0].schematic_id == "NAND"
+    with pytest.raises(AttributeError):
+        schematics.append(library.get_schematic("XOR"))
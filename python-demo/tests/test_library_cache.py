@@ -0,0 +1,113 @@
+import glob
+import os
+import pickle
+
+import pytest
+
+from conftest import (
+    SCHEMATICS_DIRECTORY,
+    combinational_schematics,
+    load_schematics,
+)
+from library_cache import LibraryCache
+from mhrd_parser import parse_mhrd_schematic
+from schematic_library import SchematicLibrary
+
+
+def build_library(cache: LibraryCache) -> SchematicLibrary:
+    library = SchematicLibrary(cache)
+    for file in sorted(
+        glob.glob(os.path.join(SCHEMATICS_DIRECTORY, "**", "*.mhrd"), recursive=True)
+    ):
+        with open(file) as mhrd_file:
+            library.add_schematic(
+                cache.load_schematic(mhrd_file.read(), parse_mhrd_schematic)
+            )
+    for schematic in combinational_schematics(library):
+        library.get_schematic_netlist(schematic)
+    return library
+
+
+def test_cache_hits(tmp_path):
+    build_library(LibraryCache(str(tmp_path)))
+    cache = LibraryCache(str(tmp_path))
+    library = build_library(cache)
+    assert cache.hits > 0 and cache.misses == 0
+
+    fresh_library = SchematicLibrary()
+    load_schematics(fresh_library)
+    for schematic in combinational_schematics(library):
+        assert library.get_schematic_netlist(
+            schematic
+        ) == fresh_library.get_schematic_netlist(
+            fresh_library.get_schematic(schematic.schematic_id)
+        )
+
+
+def test_malformed_entries_are_misses(tmp_path):
+    build_library(LibraryCache(str(tmp_path)))
+    for name in os.listdir(tmp_path):
+        with open(tmp_path / name, "wb") as file:
+            pickle.dump(("malformed",), file)
+
+    cache = LibraryCache(str(tmp_path))
+    library = build_library(cache)
+    assert cache.hits == 0
+    schematic = library.get_schematic("FULLADDER")
+    assert library.simulate_flattened_schematic(
+        schematic, {"a": True, "b": True, "carryIn": False}
+    ) == {"sum": False, "carryOut": True}
+
+
+def test_recursive_part_key(tmp_path):
+    library = SchematicLibrary()
+    schematic = parse_mhrd_schematic(
+        'Name: "REC"; Inputs: a; Outputs: o; Parts: r->REC;'
+        "Wires: input.a -> r.a, r.o -> output.o;"
+    )
+    library.add_schematic(schematic)
+    with pytest.raises(Exception, match="part of itself"):
+        LibraryCache(str(tmp_path)).netlist_key(schematic, library)
+
+
+def test_optimization_reports_are_cached(tmp_path):
+    build_library(LibraryCache(str(tmp_path)))
+    fresh_library = SchematicLibrary()
+    load_schematics(fresh_library)
+
+    cache = LibraryCache(str(tmp_path))
+    library = build_library(cache)
+    assert cache.misses == 0
+    for schematic in combinational_schematics(library):
+        fresh_library.get_schematic_netlist(
+            fresh_library.get_schematic(schematic.schematic_id)
+        )
+        assert (
+            library.optimization_reports[schematic.schematic_id]
+            == fresh_library.optimization_reports[schematic.schematic_id]
+        )
+
+
+def test_content_hashes_are_invalidated(tmp_path):
+    cache = LibraryCache(str(tmp_path))
+    library = build_library(cache)
+    full_adder = library.get_schematic("FULLADDER")
+    key = cache.netlist_key(full_adder, library)
+    assert "HALFADDER" in library.content_hashes
+
+    # Replacing a part drops the hashes of the schematics using it, changing their key.
+    half_adder = library.get_schematic("HALFADDER")
+    library.replace_schematic(
+        parse_mhrd_schematic(
+            'Name: "HALFADDER"; Inputs: a, b; Outputs: sum, carry;'
+            "Parts: x->XOR, n->AND;"
+            "Wires: input.a -> x.in1, input.b -> x.in2, input.a -> n.in1,"
+            " input.b -> n.in2, x.out -> output.carry, n.out -> output.sum;"
+        )
+    )
+    assert "HALFADDER" not in library.content_hashes
+    assert "FULLADDER" not in library.content_hashes
+    assert cache.netlist_key(full_adder, library) != key
+
+    library.replace_schematic(half_adder)
+    assert cache.netlist_key(full_adder, library) == key
@@ -0,0 +1,45 @@
+import itertools
+
+from conftest import combinational_schematics, load_schematics
+from mhrd_parser import parse_mhrd_schematic
+from netlist import simulate_netlist
+from optimize import optimize_netlist
+from schematic_library import SchematicLibrary
+
+
+def test_optimized_netlists_compute_the_same_outputs():
+    library = SchematicLibrary(optimize_netlists=False)
+    load_schematics(library)
+    for schematic in combinational_schematics(library):
+        netlist = library.get_schematic_netlist(schematic)
+        optimized, report = optimize_netlist(netlist)
+        assert report.gates_before == len(netlist.gates)
+        assert report.gates_after == len(optimized.gates) <= len(netlist.gates)
+
+        for signals in itertools.product([False, True], repeat=len(netlist.input_pins)):
+            vector = dict(zip(netlist.input_pins, signals))
+            assert simulate_netlist(optimized, vector) == simulate_netlist(
+                netlist, vector
+            )
+
+
+def test_double_inversion_and_constants(library):
+    library.add_schematic(
+        parse_mhrd_schematic(
+            'Name: "REDUNDANT"; Inputs: a; Outputs: same, zero;'
+            "Parts: n1->NOT, n2->NOT, n3->NOT, x->AND;"
+            "Wires: input.a -> n1.in, n1.out -> n2.in, n2.out -> output.same,"
+            " input.a -> n3.in, n3.out -> x.in1, input.a -> x.in2, x.out -> output.zero;"
+        )
+    )
+    schematic = library.get_schematic("REDUNDANT")
+    netlist = library.get_schematic_netlist(schematic)
+    report = library.optimization_reports["REDUNDANT"]
+    assert report.removed_double_inversions > 0
+    assert len(netlist.gates) < report.gates_before
+
+    for signal in (False, True):
+        assert library.simulate_flattened_schematic(schematic, {"a": signal}) == {
+            "same": signal,
+            "zero": False,
+        }
@@ -0,0 +1,114 @@
+import pytest
+
+from mhrd_parser import MHRDSyntaxError, parse_mhrd_schematic
+from schematic_types import SourceLocation
+from validation import SchematicValidationError
+
+
+def source(inputs: str, outputs: str, parts: str, wires: str) -> str:
+    return (
+        f'Name: "TEST";\nInputs: {inputs};\nOutputs: {outputs};\n'
+        f"Parts: {parts};\nWires: {wires};\n"
+    )
+
+
+def test_parse():
+    schematic = parse_mhrd_schematic(
+        source(
+            "a, b",
+            "o",
+            "n->NAND",
+            "input.a -> n.in1, input.b -> n.in2, n.out -> output.o",
+        )
+    )
+    assert schematic.schematic_id == "TEST"
+    assert set(schematic.input_pins) == {"a", "b"}
+    assert set(schematic.output_pins) == {"o"}
+    assert len(schematic.connections) == 3
+
+
+def test_buses():
+    schematic = parse_mhrd_schematic(
+        source(
+            "a[4], c",
+            "o[4], r[2], k[3]",
+            "",
+            "input.a -> output.o, input.a[3..2] -> output.r, input.c -> output.k",
+        )
+    )
+    wired = {
+        (connection.source.pin, connection.destination.pin)
+        for connection in schematic.connections
+    }
+    assert wired == {
+        ("a[0]", "o[0]"),
+        ("a[1]", "o[1]"),
+        ("a[2]", "o[2]"),
+        ("a[3]", "o[3]"),
+        ("a[3]", "r[0]"),
+        ("a[2]", "r[1]"),
+        ("c", "k[0]"),
+        ("c", "k[1]"),
+        ("c", "k[2]"),
+    }
+
+
+@pytest.mark.parametrize(
+    "mhrd_string, message, location",
+    [
+        (
+            'Name: "A"; Inputs: a; Outputs: o; Parts: ;',
+            "Wires section not found",
+            SourceLocation(1, 43),
+        ),
+        (
+            'Name: "A"; Name: "B";',
+            "Duplicate Name section",
+            SourceLocation(1, 12),
+        ),
+        ('Nmae: "A";', "Unknown section 'Nmae'", SourceLocation(1, 1)),
+        ("Name: A;", "Expected a string but found 'A'", SourceLocation(1, 7)),
+        ('Name: "A"', "Expected ';' but found end of file", SourceLocation(1, 10)),
+        (
+            'Name: "A";\nInputs: a[x];',
+            "Expected a number but found 'x'",
+            SourceLocation(2, 11),
+        ),
+        (
+            'Name: "A";\nInputs: a[0];',
+            "Bus a must be at least one bit wide",
+            SourceLocation(2, 9),
+        ),
+        (
+            source("a[4]", "o[3]", "", "input.a -> output.o"),
+            "Cannot wire 4 bits to 3 bits",
+            SourceLocation(5, 8),
+        ),
+        (
+            source("a[2], a", "o", "", "input.a[0] -> output.o"),
+            "Pin a is declared more than once",
+            SourceLocation(2, 15),
+        ),
+        (
+            source("x[2]", "y", "", "input.x -> output.y"),
+            "Cannot wire 2 bits to 1 bits",
+            SourceLocation(5, 8),
+        ),
+        (
+            source("a", "o", "n->NAND", "input.a -> n.$in1"),
+            "Unexpected character '$'",
+            SourceLocation(5, 21),
+        ),
+    ],
+)
+def test_syntax_errors(mhrd_string, message, location):
+    with pytest.raises(MHRDSyntaxError) as error:
+        parse_mhrd_schematic(mhrd_string)
+    assert str(error.value) == f"{message} ({location})"
+    assert error.value.location == location
+
+
+def test_wires_to_undeclared_pins():
+    with pytest.raises(SchematicValidationError) as error:
+        parse_mhrd_schematic(source("a", "o", "", "input.b -> output.o"))
+    assert error.value.schematic_id == "TEST"
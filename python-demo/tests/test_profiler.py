@@ -0,0 +1,40 @@
+import io
+import itertools
+
+
+def test_profile(library):
+    schematic = library.get_schematic("FULLADDER")
+    pins = sorted(schematic.input_pins)
+    vectors = [
+        dict(zip(pins, signals))
+        for signals in itertools.product([False, True], repeat=len(pins))
+    ]
+
+    profiler = library.enable_profiling()
+    library.enable_simulation_memo()
+    for vector in vectors * 2:
+        library.simulate_schematic(schematic, vector)
+    library.disable_profiling()
+
+    profile = profiler.profiles["FULLADDER"]
+    assert profile.evaluations == 16
+    # The second pass is answered by the memo without iterating.
+    assert profile.iterated_evaluations == 8
+    assert profile.shortcut_evaluations == 8
+    assert profile.iterations_per_evaluation >= 1.0
+
+    nand = profiler.profiles["NAND"]
+    assert nand.iterated_evaluations == 0 and nand.shortcut_evaluations > 0
+
+    report = io.StringIO()
+    profiler.write_report(report)
+    assert report.getvalue().splitlines()[0].split() == [
+        "schematic",
+        "evaluations",
+        "total",
+        "ms",
+        "self",
+        "ms",
+        "shortcuts",
+        "iterations",
+    ]
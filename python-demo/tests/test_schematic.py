@@ -0,0 +1,64 @@
+import random
+
+from schematic import Schematic
+from schematic_types import *
+
+
+def test_indexes_match_connections(library):
+    for schematic in library.schematics:
+        components = [SchematicInput(), SchematicOutput(), *schematic.components]
+        for component in components:
+            assert sorted(
+                map(str, schematic.get_input_connections_for_component(component))
+            ) == sorted(
+                str(connection)
+                for connection in schematic.connections
+                if connection.destination.component == component
+            )
+            assert sorted(
+                map(str, schematic.get_output_connections_for_component(component))
+            ) == sorted(
+                str(connection)
+                for connection in schematic.connections
+                if connection.source.component == component
+            )
+
+        for connection in schematic.connections:
+            assert schematic.get_driver_for_pin(connection.destination) == connection
+
+
+def test_add_and_remove_connections():
+    count = 200
+    schematic = Schematic(
+        SchematicId("S"),
+        {PinId("a")},
+        set(),
+        {
+            SchematicComponentId(f"n{index}"): SchematicId("NAND")
+            for index in range(count)
+        },
+        set(),
+    )
+    connections = [
+        Connection(
+            OutputAttachmentPoint(SchematicInput(), OutputPinId("a")),
+            InputAttachmentPoint(SchematicComponentId(f"n{index}"), InputPinId("in1")),
+        )
+        for index in range(count)
+    ]
+    for connection in connections:
+        schematic.add_connection(connection)
+
+    random.Random(0).shuffle(connections)
+    removed, kept = connections[: count // 2], connections[count // 2 :]
+    for connection in removed:
+        schematic.remove_connection(connection)
+
+    assert schematic.connections == set(kept)
+    assert set(schematic.get_output_connections_for_component(SchematicInput())) == (
+        set(kept)
+    )
+    for connection in kept:
+        assert schematic.get_driver_for_pin(connection.destination) == connection
+    for connection in removed:
+        assert schematic.get_driver_for_pin(connection.destination) is None
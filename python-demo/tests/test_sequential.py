@@ -0,0 +1,94 @@
+import itertools
+import linecache
+
+import pytest
+
+from mhrd_parser import parse_mhrd_schematic
+
+REGISTER = """
+Name: "REG4"; Inputs: d[4]; Outputs: q[4];
+Parts: r0->DFF, r1->DFF, r2->DFF, r3->DFF;
+Wires: input.d[0] -> r0.d, input.d[1] -> r1.d, input.d[2] -> r2.d, input.d[3] -> r3.d,
+  r0.q -> output.q[0], r1.q -> output.q[1], r2.q -> output.q[2], r3.q -> output.q[3];
+"""
+
+INCREMENTER = """
+Name: "INC4"; Inputs: a[4], inc; Outputs: s[4];
+Parts: h0->HALFADDER, h1->HALFADDER, h2->HALFADDER, h3->HALFADDER;
+Wires: input.a[0] -> h0.a, input.inc -> h0.b, h0.sum -> output.s[0],
+  input.a[1] -> h1.a, h0.carry -> h1.b, h1.sum -> output.s[1],
+  input.a[2] -> h2.a, h1.carry -> h2.b, h2.sum -> output.s[2],
+  input.a[3] -> h3.a, h2.carry -> h3.b, h3.sum -> output.s[3];
+"""
+
+COUNTER = """
+Name: "COUNTER"; Inputs: inc; Outputs: count[4];
+Parts: reg->REG4, add->INC4;
+Wires: reg.q[0..3] -> add.a[0..3], input.inc -> add.inc, add.s[0..3] -> reg.d[0..3],
+  reg.q[0..3] -> output.count;
+"""
+
+
+@pytest.fixture
+def counter(library):
+    for mhrd_string in (REGISTER, INCREMENTER, COUNTER):
+        library.add_schematic(parse_mhrd_schematic(mhrd_string))
+    return library.get_schematic("COUNTER")
+
+
+def count_words(outputs, cycles):
+    return [
+        sum(outputs[f"count[{bit}]"][cycle] << bit for bit in range(4))
+        for cycle in range(cycles)
+    ]
+
+
+def test_counter(library, counter):
+    assert library.is_sequential(counter)
+    assert library.get_registered_pins(counter) == {f"count[{bit}]" for bit in range(4)}
+
+    inc = [1] * 20 + [0] * 3 + [1] * 2
+    outputs = library.simulate_cycles(counter, {"inc": inc})
+    expected = list(itertools.accumulate([0] + inc[:-1]))
+    assert count_words(outputs, len(inc)) == [count % 16 for count in expected]
+
+
+def test_cycle_simulator_lanes(library, counter):
+    simulator = library.create_cycle_simulator(counter, ["count[3]"], lanes=2)
+    # Lane 0 holds inc low, lane 1 counts every cycle.
+    # The outputs are sampled before the registers load, when lane 1 has counted to 7 and 15.
+    outputs = simulator.step({"inc": itertools.repeat(0b10)}, cycles=16, sample_every=8)
+    assert outputs == {"count[3]": [0b00, 0b10]}
+    assert simulator.cycle == 16
+
+    simulator.reset()
+    assert simulator.cycle == 0 and simulator.state == [0] * 4
+
+
+def test_combinational_engines_reject_registers(library, counter):
+    with pytest.raises(Exception):
+        library.simulate_schematic(counter, {"inc": True})
+    with pytest.raises(Exception):
+        library.get_schematic_netlist(counter)
+    with pytest.raises(Exception, match="DFF registers"):
+        library.get_schematic_bdd(counter)
+
+
+def test_equivalence_rejects_registers(library, counter):
+    with pytest.raises(Exception, match="DFF registers"):
+        library.check_schematic_equivalence(counter, counter)
+
+
+def test_sequential_netlist_pin_order(library, counter):
+    netlist = library.get_sequential_netlist(counter)
+    assert netlist.input_pins == ["inc"]
+    assert netlist.output_pins == [f"count[{bit}]" for bit in range(4)]
+
+
+def test_compiled_cycles_source_is_released(library, counter):
+    simulator = library.create_cycle_simulator(counter, ["count[0]"])
+    filename = simulator.compiled.filename
+    assert filename in linecache.cache
+
+    library.invalidate_schematic("INC4")
+    assert filename not in linecache.cache
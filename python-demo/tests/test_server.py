@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+from server import SimulationServer
+
+AND_FROM_NANDS = """
+Name: "AND"; Inputs: in1, in2; Outputs: out;
+Parts: n->NAND, m->NAND;
+Wires: input.in1 -> n.in1, input.in2 -> n.in2, n.out -> m.in1, n.out -> m.in2, m.out -> output.out;
+"""
+
+
+def run_requests(server: SimulationServer, requests: list[dict]) -> dict:
+    responses: list[dict] = []
+
+    async def send(response: dict) -> None:
+        responses.append(response)
+
+    async def handle_all() -> None:
+        await asyncio.gather(
+            *(
+                server.handle_line(json.dumps(request).encode(), send)
+                for request in requests
+            )
+        )
+
+    asyncio.run(handle_all())
+    return {response["id"]: response for response in responses}
+
+
+def test_requests(library):
+    server = SimulationServer(library)
+    responses = run_requests(
+        server,
+        [
+            {
+                "id": 1,
+                "op": "simulate",
+                "schematic": "AND",
+                "inputs": {"in1": True, "in2": True},
+            },
+            {"id": 2, "op": "simulate", "schematic": "AND", "inputs": {"in1": True}},
+            {
+                "id": 3,
+                "op": "simulate",
+                "schematic": "AND",
+                "inputs": {"in1": True, "in2": False},
+            },
+            {"id": 4, "op": "schematics"},
+            {"id": 5, "op": "pins", "schematic": "AND"},
+            {"id": 6, "op": "simulate", "schematic": "MISSING", "inputs": {}},
+            {"id": 7, "op": "load", "source": AND_FROM_NANDS},
+            {"id": 8, "op": "nope"},
+        ],
+    )
+
+    assert responses[1] == {"id": 1, "outputs": {"out": True}}
+    assert "in2" in responses[2]["error"]
+    assert responses[3] == {"id": 3, "outputs": {"out": False}}
+    assert "AND" in responses[4]["schematics"]
+    assert responses[5] == {
+        "id": 5,
+        "input_pins": ["in1", "in2"],
+        "output_pins": ["out"],
+    }
+    assert "MISSING" in responses[6]["error"]
+    assert responses[7] == {"id": 7, "schematic": "AND"}
+    assert "nope" in responses[8]["error"]
+
+    # The simulate requests are coalesced into one batch per schematic,
+    # and an invalid vector only fails its own request.
+    assert server.requests == 4
+    assert server.batches == 2
@@ -0,0 +1,299 @@
+"""
+Every simulation engine must agree with the recursive simulate_schematic on the shipped schematics.
+"""
+import itertools
+import linecache
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from bitslice import exhaustive_input_lanes, unpack_lane
+from codegen import compile_schematic
+from mhrd_parser import parse_mhrd_schematic
+from truth_table import iter_truth_table_rows
+
+
+def exhaustive_vectors(schematic):
+    pins = sorted(schematic.input_pins)
+    for signals in itertools.product([False, True], repeat=len(pins)):
+        yield dict(zip(pins, signals))
+
+
+def random_vectors(schematic, count, seed=0):
+    rng = random.Random(seed)
+    pins = sorted(schematic.input_pins)
+    return [{pin: rng.random() < 0.5 for pin in pins} for _ in range(count)]
+
+
+def test_schematics_are_loaded(schematics):
+    schematic_ids = {schematic.schematic_id for schematic in schematics}
+    assert {"NAND", "NOT", "AND", "XOR", "FULLADDER", "MUX2-1"} <= schematic_ids
+
+
+def test_flattened_netlist(library, schematics):
+    for schematic in schematics:
+        for vector in exhaustive_vectors(schematic):
+            assert library.simulate_flattened_schematic(
+                schematic, vector
+            ) == library.simulate_schematic(schematic, vector), schematic.schematic_id
+
+
+# Prints the netlist of a schematic flattened in a fresh interpreter.
+PRINT_NETLIST = """
+import sys
+from conftest import load_schematics
+from schematic_library import SchematicLibrary
+library = SchematicLibrary()
+load_schematics(library)
+netlist = library.get_schematic_netlist(library.get_schematic(sys.argv[1]))
+print(netlist.input_pins, netlist.output_pins, netlist.gates, netlist.output_wires)
+"""
+
+
+def test_netlist_pin_order_ignores_hash_seed():
+    netlists = {
+        subprocess.run(
+            [sys.executable, "-c", PRINT_NETLIST, "FULLADDER"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env={**os.environ, "PYTHONHASHSEED": str(seed)},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for seed in range(4)
+    }
+    assert len(netlists) == 1
+    assert netlists.pop().startswith("['a', 'b', 'carryIn'] ['carryOut', 'sum']")
+
+
+def test_truth_table(library, schematics):
+    for schematic in schematics:
+        for vector, outputs in library.get_scehematic_truth_table(schematic):
+            assert library.simulate_schematic(schematic, vector) == outputs
+
+
+def test_bitsliced(library, schematics):
+    for schematic in schematics:
+        vectors = random_vectors(schematic, 50)
+        expected = [library.simulate_schematic(schematic, vector) for vector in vectors]
+        assert library.simulate_schematic_bitsliced(schematic, vectors) == expected
+        assert (
+            library.simulate_schematic_bitsliced(
+                schematic, vectors, workers=3, shard_size=7
+            )
+            == expected
+        )
+
+
+def test_bitsliced_shard_size(library):
+    schematic = library.get_schematic("XOR")
+    vectors = random_vectors(schematic, 4)
+    for shard_size in (0, -1):
+        with pytest.raises(Exception, match="Shard size"):
+            library.simulate_schematic_bitsliced(
+                schematic, vectors, workers=2, shard_size=shard_size
+            )
+
+
+def test_exhaustive_input_lanes_chunks():
+    full = exhaustive_input_lanes(5, 0, 32)
+    for first_row in range(0, 32, 8):
+        assert exhaustive_input_lanes(5, first_row, 8) == [
+            (lane >> first_row) & 0xFF for lane in full
+        ]
+
+
+def test_columns(library, schematics):
+    for schematic in schematics:
+        vectors = random_vectors(schematic, 50)
+        columns = {
+            pin: [vector[pin] for vector in vectors] for pin in schematic.input_pins
+        }
+        output_columns = library.simulate_schematic_columns(schematic, columns)
+        assert [
+            {pin: bool(column[row]) for pin, column in output_columns.items()}
+            for row in range(len(vectors))
+        ] == [library.simulate_schematic(schematic, vector) for vector in vectors]
+
+
+def test_numpy_columns(library, schematics):
+    np = pytest.importorskip("numpy")
+    for schematic in schematics:
+        vectors = random_vectors(schematic, 50)
+        columns = {
+            pin: np.array([vector[pin] for vector in vectors])
+            for pin in schematic.input_pins
+        }
+        output_columns = library.simulate_schematic_columns(schematic, columns)
+        assert all(isinstance(column, np.ndarray) for column in output_columns.values())
+        assert [
+            {pin: bool(column[row]) for pin, column in output_columns.items()}
+            for row in range(len(vectors))
+        ] == [library.simulate_schematic(schematic, vector) for vector in vectors]
+
+
+def test_truth_table_column_chunks(library, schematics):
+    for schematic in schematics:
+        input_columns, output_columns = library.get_schematic_truth_table_columns(
+            schematic
+        )
+        chunks = list(library.iter_schematic_truth_table_columns(schematic, 4))
+        assert len(chunks) == max(1, (1 << len(input_columns)) // 4)
+        for columns, chunk_columns in (
+            (input_columns, [inputs for inputs, _ in chunks]),
+            (output_columns, [outputs for _, outputs in chunks]),
+        ):
+            assert {
+                pin: [bool(signal) for chunk in chunk_columns for signal in chunk[pin]]
+                for pin in columns
+            } == {
+                pin: [bool(signal) for signal in column]
+                for pin, column in columns.items()
+            }
+
+
+def test_compiled(library, schematics):
+    for schematic in schematics:
+        for vector in exhaustive_vectors(schematic):
+            assert library.simulate_compiled_schematic(
+                schematic, vector
+            ) == library.simulate_schematic(schematic, vector)
+
+        compiled = compile_schematic(schematic, library, bitsliced=True)
+        row_count = 1 << len(compiled.input_pins)
+        lanes = exhaustive_input_lanes(len(compiled.input_pins), 0, row_count)
+        output_lanes = compiled.function((1 << row_count) - 1, *lanes)
+        _, expected = library.get_schematic_truth_table_columns(schematic)
+        assert [unpack_lane(lane, row_count) for lane in output_lanes] == [
+            list(expected[pin]) for pin in compiled.output_pins
+        ]
+
+
+def test_compiled_source_is_released(library):
+    # Both ids map to the same function name, but not to the same linecache entry.
+    for name in ("A-B", "A_B"):
+        library.add_schematic(
+            parse_mhrd_schematic(
+                f'Name: "{name}"; Inputs: a, b; Outputs: o; Parts: n->NAND;'
+                "Wires: input.a -> n.in1, input.b -> n.in2, n.out -> output.o;"
+            )
+        )
+    first, second = [
+        compile_schematic(library.get_schematic(name), library)
+        for name in ("A-B", "A_B")
+    ]
+    assert first.filename != second.filename
+    assert linecache.getlines(first.filename) == first.source.splitlines(True)
+
+    library.invalidate_schematic("A-B")
+    assert first.filename not in linecache.cache
+    assert second.filename in linecache.cache
+
+
+def test_memo(library, schematics):
+    expected = {
+        schematic.schematic_id: library.get_scehematic_truth_table(schematic)
+        for schematic in schematics
+    }
+
+    library.enable_simulation_memo(max_entries=6, max_inputs=2)
+    for _ in range(2):
+        for schematic in schematics:
+            for vector, outputs in expected[schematic.schematic_id]:
+                assert library.simulate_schematic(schematic, vector) == outputs
+    assert library.memo_hits > 0
+
+
+def test_incremental(library, schematics):
+    rng = random.Random(1)
+    for schematic in schematics:
+        pins = sorted(schematic.input_pins)
+        vector = {pin: False for pin in pins}
+        simulator = library.create_incremental_simulator(schematic, dict(vector))
+        previous = library.simulate_schematic(schematic, vector)
+        for _ in range(50):
+            changes = {
+                pin: rng.random() < 0.5
+                for pin in rng.sample(pins, rng.randint(0, len(pins)))
+            }
+            vector.update(changes)
+            changed = simulator.apply(changes)
+            expected = library.simulate_schematic(schematic, vector)
+            assert simulator.output_signals == expected
+            assert changed == {
+                pin: signal
+                for pin, signal in expected.items()
+                if previous[pin] != signal
+            }
+            previous = expected
+
+
+def test_truth_table_rows(library, schematics):
+    for schematic in schematics:
+        netlist = library.get_schematic_netlist(schematic)
+        assert list(iter_truth_table_rows(netlist, 2)) == (
+            library.get_scehematic_truth_table(schematic)
+        )
+        assert list(
+            library.iter_schematic_truth_table(schematic, chunk_rows=2, workers=2)
+        ) == library.get_scehematic_truth_table(schematic)
+
+
+def test_batch(library, schematics):
+    for schematic in schematics:
+        vectors = random_vectors(schematic, 40)
+        output_columns = library.simulate_batch(schematic, iter(vectors), chunk_rows=16)
+        assert [
+            {pin: column[row] for pin, column in output_columns.items()}
+            for row in range(len(vectors))
+        ] == [library.simulate_schematic(schematic, vector) for vector in vectors]
+
+        columns = {
+            pin: [vector[pin] for vector in vectors] for pin in schematic.input_pins
+        }
+        assert library.simulate_batch(schematic, columns) == output_columns
+
+
+def test_output_cone(library, schematics):
+    for schematic in schematics:
+        for pin in schematic.output_pins:
+            for vector in exhaustive_vectors(schematic):
+                assert library.simulate_schematic(schematic, vector, [pin]) == {
+                    pin: library.simulate_schematic(schematic, vector)[pin]
+                }
+
+
+def test_output_cone_inputs(library):
+    library.add_schematic(
+        parse_mhrd_schematic(
+            'Name: "SPLIT"; Inputs: a, b, c; Outputs: x, y;'
+            "Parts: n->NOT, g->AND;"
+            "Wires: input.a -> n.in, n.out -> output.x,"
+            " input.b -> g.in1, input.c -> g.in2, g.out -> output.y;"
+        )
+    )
+    schematic = library.get_schematic("SPLIT")
+    cone = library.get_output_cone(schematic, ["x"])
+    assert cone.input_pins == {"a"}
+    assert set(cone.components) == {"n"}
+
+    # Only the inputs in the cone have to be provided.
+    assert library.simulate_schematic(schematic, {"a": False}, ["x"]) == {"x": True}
+
+    netlist = library.get_output_cone_netlist(schematic, ["x"])
+    assert len(netlist.gates) < len(library.get_schematic_netlist(schematic).gates)
+
+
+def test_lookup_tables(library, schematics):
+    expected = {
+        schematic.schematic_id: library.get_scehematic_truth_table(schematic)
+        for schematic in schematics
+    }
+
+    library.enable_lookup_tables(max_inputs=3)
+    for schematic in schematics:
+        for vector, outputs in expected[schematic.schematic_id]:
+            assert library.simulate_schematic(schematic, vector) == outputs
@@ -0,0 +1,53 @@
+import io
+
+import pytest
+
+from conftest import combinational_schematics
+from truth_table import iter_bitset_chunks
+
+
+def test_csv_export(library):
+    for schematic in combinational_schematics(library):
+        table = library.get_scehematic_truth_table(schematic)
+        file = io.StringIO()
+        library.export_schematic_truth_table_csv(schematic, file, chunk_rows=2)
+
+        header, *lines = file.getvalue().splitlines()
+        pins = header.split(",")
+        assert [
+            dict(zip(pins, [value == "1" for value in line.split(",")]))
+            for line in lines
+        ] == [{**inputs, **outputs} for inputs, outputs in table]
+
+
+def test_bitset_export(library):
+    for schematic in combinational_schematics(library):
+        table = library.get_scehematic_truth_table(schematic)
+        file = io.BytesIO()
+        library.export_schematic_truth_table_bitset(schematic, file, chunk_rows=8)
+        file.seek(0)
+
+        rows = []
+        for pins, row_count, lanes in iter_bitset_chunks(file):
+            for row in range(row_count):
+                rows.append(
+                    {pin: bool(lane >> row & 1) for pin, lane in zip(pins, lanes)}
+                )
+        assert rows == [outputs for _, outputs in table]
+
+
+def test_chunk_size_is_checked_before_writing(library):
+    schematic = library.get_schematic("AND")
+    file = io.BytesIO()
+    with pytest.raises(Exception, match="power of two"):
+        library.export_schematic_truth_table_bitset(schematic, file, chunk_rows=3)
+    assert file.getvalue() == b""
+
+
+def test_csv_chunk_size_is_checked_before_writing(library):
+    file = io.StringIO()
+    with pytest.raises(Exception, match="power of two"):
+        library.export_schematic_truth_table_csv(
+            library.get_schematic("AND"), file, chunk_rows=0
+        )
+    assert file.getvalue() == ""
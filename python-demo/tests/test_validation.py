@@ -0,0 +1,177 @@
+import pytest
+
+from mhrd_parser import parse_mhrd_schematic
+from validation import (
+    COMBINATIONAL_LOOP,
+    MULTIPLY_DRIVEN_PIN,
+    RECURSIVE_PART,
+    UNDRIVEN_PIN,
+    UNKNOWN_COMPONENT,
+    UNKNOWN_PART,
+    UNKNOWN_PIN,
+    UNUSED_COMPONENT,
+    SchematicValidationError,
+    validate_schematic,
+)
+
+
+def source(name: str, parts: str, wires: str) -> str:
+    return (
+        f'Name: "{name}";\nInputs: a, b;\nOutputs: o;\n'
+        f"Parts: {parts};\nWires: {wires};\n"
+    )
+
+
+def issue_kinds(error: SchematicValidationError) -> set[str]:
+    return {issue.kind for issue in error.issues}
+
+
+def test_shipped_schematics_are_valid(library):
+    for schematic in library.schematics:
+        assert library.validate_schematic(schematic) == []
+
+
+def test_structural_errors():
+    with pytest.raises(SchematicValidationError) as error:
+        parse_mhrd_schematic(
+            source(
+                "BAD",
+                "n1->NAND, n2->NAND",
+                "input.a -> n1.in1, n2.out -> n1.in2, n1.out -> n2.in1, input.b -> n2.in2, "
+                "n1.out -> output.o, n2.out -> output.o, ghost.out -> n1.in1",
+            )
+        )
+    assert error.value.schematic_id == "BAD"
+    assert {
+        UNKNOWN_COMPONENT,
+        MULTIPLY_DRIVEN_PIN,
+        COMBINATIONAL_LOOP,
+    } <= issue_kinds(error.value)
+
+
+def test_undriven_output():
+    with pytest.raises(SchematicValidationError) as error:
+        parse_mhrd_schematic(
+            source("BAD", "n->NAND", "input.a -> n.in1, input.b -> n.in2")
+        )
+    assert UNDRIVEN_PIN in issue_kinds(error.value)
+
+
+def test_part_errors(library):
+    schematic = parse_mhrd_schematic(
+        source(
+            "PARTS",
+            "x->XOR, u->NOT, w->WHAT",
+            "input.a -> x.in1, input.b -> x.nope, x.out -> output.o, u.out -> w.in",
+        )
+    )
+    library.add_schematic(schematic)
+    with pytest.raises(SchematicValidationError) as error:
+        library.simulate_schematic(schematic, {"a": True, "b": False})
+    assert {UNKNOWN_PART, UNKNOWN_PIN, UNDRIVEN_PIN} <= issue_kinds(error.value)
+
+
+def test_unused_component_is_a_warning(library):
+    schematic = parse_mhrd_schematic(
+        source(
+            "UNUSED",
+            "n->NAND, u->NOT",
+            "input.a -> n.in1, input.b -> n.in2, n.out -> output.o, input.a -> u.in",
+        )
+    )
+    library.add_schematic(schematic)
+    warnings = library.validate_schematic(schematic)
+    assert [issue.kind for issue in warnings] == [UNUSED_COMPONENT]
+    assert library.simulate_schematic(schematic, {"a": True, "b": True}) == {"o": False}
+
+
+def test_loop_through_parts(library):
+    schematic = parse_mhrd_schematic(
+        source(
+            "LOOP",
+            "x->XOR, y->XOR",
+            "input.a -> x.in1, y.out -> x.in2, x.out -> y.in1, input.b -> y.in2, "
+            "x.out -> output.o",
+        )
+    )
+    # Without the parts the loop might go through a register.
+    assert COMBINATIONAL_LOOP not in {
+        issue.kind for issue in validate_schematic(schematic)
+    }
+
+    library.add_schematic(schematic)
+    with pytest.raises(SchematicValidationError) as error:
+        library.validate_schematic(schematic)
+    assert COMBINATIONAL_LOOP in issue_kinds(error.value)
+
+
+def test_unused_component_next_to_loop(library):
+    schematic = parse_mhrd_schematic(
+        source(
+            "LOOPUNUSED",
+            "x->XOR, y->XOR, u->NOT",
+            "input.a -> x.in1, y.out -> x.in2, x.out -> y.in1, input.b -> y.in2, "
+            "x.out -> output.o, input.a -> u.in",
+        )
+    )
+    issues = validate_schematic(
+        schematic, library.get_schematic_or_none, library.get_registered_pins
+    )
+    assert {issue.kind for issue in issues} == {COMBINATIONAL_LOOP, UNUSED_COMPONENT}
+    assert [issue.message for issue in issues if issue.kind == UNUSED_COMPONENT] == [
+        "u does not drive any output"
+    ]
+
+
+def test_feedback_through_register(library):
+    schematic = parse_mhrd_schematic(
+        'Name: "TOGGLE"; Inputs: t; Outputs: q;'
+        "Parts: f->DFF, x->XOR;"
+        "Wires: input.t -> x.in1, f.q -> x.in2, x.out -> f.d, f.q -> output.q;"
+    )
+    library.add_schematic(schematic)
+    assert library.validate_schematic(schematic) == []
+
+
+def test_recursive_parts(library):
+    first = parse_mhrd_schematic(
+        source("FIRST", "s->SECOND", "input.a -> s.a, input.b -> s.b, s.o -> output.o")
+    )
+    second = parse_mhrd_schematic(
+        source("SECOND", "f->FIRST", "input.a -> f.a, input.b -> f.b, f.o -> output.o")
+    )
+    library.add_schematic(first)
+    library.add_schematic(second)
+    with pytest.raises(SchematicValidationError) as error:
+        library.validate_schematic(first)
+    assert issue_kinds(error.value) == {RECURSIVE_PART}
+
+    with pytest.raises(SchematicValidationError):
+        library.get_schematic_netlist(second)
+
+
+def test_deep_hierarchy(library):
+    # Each level wraps the one below, so every part is checked once on the way down.
+    previous = "NOT"
+    for level in range(200):
+        library.add_schematic(
+            parse_mhrd_schematic(
+                f'Name: "LEVEL{level}"; Inputs: in; Outputs: out; Parts: p->{previous};'
+                "Wires: input.in -> p.in, p.out -> output.out;"
+            )
+        )
+        previous = f"LEVEL{level}"
+    top = library.get_schematic("LEVEL199")
+    assert library.validate_schematic(top) == []
+    assert library.simulate_flattened_schematic(top, {"in": True}) == {"out": False}
+
+    # A cycle closed at the bottom is found from the top.
+    library.replace_schematic(
+        parse_mhrd_schematic(
+            'Name: "LEVEL0"; Inputs: in; Outputs: out; Parts: p->LEVEL199;'
+            "Wires: input.in -> p.in, p.out -> output.out;"
+        )
+    )
+    with pytest.raises(SchematicValidationError) as error:
+        library.validate_schematic(top)
+    assert issue_kinds(error.value) == {RECURSIVE_PART}
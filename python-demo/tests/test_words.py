@@ -0,0 +1,37 @@
+import random
+
+from conftest import ripple_adder
+from mhrd_parser import parse_mhrd_schematic
+
+
+def test_adder_words(library):
+    library.add_schematic(parse_mhrd_schematic(ripple_adder(16)))
+    schematic = library.get_schematic("ADD")
+
+    rng = random.Random(0)
+    for _ in range(50):
+        a, b, carry = rng.getrandbits(16), rng.getrandbits(16), rng.getrandbits(1)
+        outputs = library.simulate_schematic_words(
+            schematic, {"a": a, "b": b, "carryIn": carry}
+        )
+        total = a + b + carry
+        assert outputs == {"s": total & 0xFFFF, "carryOut": total >> 16}
+
+
+def test_batch_words_agree_with_bits(library):
+    library.add_schematic(parse_mhrd_schematic(ripple_adder(8)))
+    schematic = library.get_schematic("ADD")
+
+    rng = random.Random(1)
+    a_words = [rng.getrandbits(8) for _ in range(100)]
+    b_words = [rng.getrandbits(8) for _ in range(100)]
+    outputs = library.simulate_batch_words(
+        schematic, {"a": a_words, "b": b_words, "carryIn": [0] * 100}
+    )
+    assert outputs["s"] == [(a + b) & 0xFF for a, b in zip(a_words, b_words)]
+
+    vector = {"carryIn": False}
+    vector.update({f"a[{index}]": bool(a_words[0] >> index & 1) for index in range(8)})
+    vector.update({f"b[{index}]": bool(b_words[0] >> index & 1) for index in range(8)})
+    bits = library.simulate_schematic(schematic, vector)
+    assert sum(bits[f"s[{index}]"] << index for index in range(8)) == outputs["s"][0]
@@ -0,0 +1,155 @@
+"""
+Streaming generation and export of truth tables.
+
+Truth tables are produced in chunks of bitsliced lanes, so only a single chunk is held in memory at a time.
+"""
+from schematic_types import *
+from netlist import Netlist
+from bitslice import exhaustive_input_lanes, simulate_netlist_bitsliced, unpack_lane
+from parallel import iter_parallel_truth_table_chunks
+
+from typing import BinaryIO, Iterator, TextIO
+import struct
+
+# The default number of rows evaluated per chunk.
+DEFAULT_CHUNK_ROWS = 1 << 16
+
+BITSET_MAGIC = b"MHRDTT1\0"
+
+
+def check_chunk_rows(chunk_rows: int) -> None:
+    if chunk_rows <= 0 or chunk_rows & (chunk_rows - 1):
+        raise Exception(f"Truth table chunk size must be a power of two: {chunk_rows}")
+
+
+def iter_truth_table_chunks(
+    netlist: Netlist, chunk_rows: int = DEFAULT_CHUNK_ROWS, workers: int = 1
+) -> Iterator[tuple[int, int, list[int], list[int]]]:
+    """
+    Evaluate the truth table of a netlist chunk by chunk.
+    Yields the first row of the chunk, the number of rows in it,
+    and one packed int per input pin and per output pin (row first_row is bit 0).
+    chunk_rows must be a power of two.
+    With more than one worker the chunks are evaluated by a process pool.
+    """
+    check_chunk_rows(chunk_rows)
+    if workers > 1:
+        yield from iter_parallel_truth_table_chunks(netlist, workers, chunk_rows)
+        return
+
+    input_count = len(netlist.input_pins)
+    row_count = 1 << input_count
+    chunk_rows = min(chunk_rows, row_count)
+
+    for first_row in range(0, row_count, chunk_rows):
+        input_lanes = exhaustive_input_lanes(input_count, first_row, chunk_rows)
+        output_lanes = simulate_netlist_bitsliced(netlist, input_lanes, chunk_rows)
+        yield first_row, chunk_rows, input_lanes, output_lanes
+
+
+def iter_truth_table_rows(
+    netlist: Netlist, chunk_rows: int = DEFAULT_CHUNK_ROWS, workers: int = 1
+) -> Iterator[tuple[dict[PinId, bool], dict[InputPinId, bool]]]:
+    """
+    Lazily yield the rows of the truth table of a netlist as signal dicts.
+    """
+    output_pins = [InputPinId(pin) for pin in netlist.output_pins]
+
+    for _, row_count, input_lanes, output_lanes in iter_truth_table_chunks(
+        netlist, chunk_rows, workers
+    ):
+        input_columns = [unpack_lane(lane, row_count) for lane in input_lanes]
+        output_columns = [unpack_lane(lane, row_count) for lane in output_lanes]
+
+        for row in range(row_count):
+            yield (
+                {
+                    pin: column[row]
+                    for pin, column in zip(netlist.input_pins, input_columns)
+                },
+                {pin: column[row] for pin, column in zip(output_pins, output_columns)},
+            )
+
+
+def export_truth_table_csv(
+    netlist: Netlist,
+    file: TextIO,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    workers: int = 1,
+) -> None:
+    """
+    Write the truth table of a netlist as CSV with a header row of pin names and 0/1 values.
+    """
+    # Check the arguments before anything is written, the chunks are only produced lazily.
+    check_chunk_rows(chunk_rows)
+    file.write(",".join([*netlist.input_pins, *netlist.output_pins]) + "\n")
+
+    for _, row_count, input_lanes, output_lanes in iter_truth_table_chunks(
+        netlist, chunk_rows, workers
+    ):
+        # One string of bits per column, with row 0 of the chunk first.
+        columns = [
+            format(lane, f"0{row_count}b")[::-1]
+            for lane in [*input_lanes, *output_lanes]
+        ]
+        file.writelines(",".join(row) + "\n" for row in zip(*columns))
+
+
+def export_truth_table_bitset(
+    netlist: Netlist,
+    file: BinaryIO,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    workers: int = 1,
+) -> None:
+    """
+    Write the outputs of the truth table of a netlist as a packed bitset file.
+
+    The file starts with BITSET_MAGIC, then the input count, output count and chunk size as
+    little endian uint32s, then the length of the newline separated output pin names and the names.
+    The chunks follow in row order. Each chunk holds, for each output pin in turn,
+    the output of every row in the chunk with one bit per row, least significant bit first.
+    The rows of each output are padded to a whole number of bytes.
+    """
+    check_chunk_rows(chunk_rows)
+    input_count = len(netlist.input_pins)
+    chunk_rows = min(chunk_rows, 1 << input_count)
+
+    pin_names = "\n".join(netlist.output_pins).encode()
+    file.write(BITSET_MAGIC)
+    file.write(
+        struct.pack(
+            "<IIII", input_count, len(netlist.output_pins), chunk_rows, len(pin_names)
+        )
+    )
+    file.write(pin_names)
+
+    for _, row_count, _, output_lanes in iter_truth_table_chunks(
+        netlist, chunk_rows, workers
+    ):
+        byte_count = (row_count + 7) // 8
+        for lane in output_lanes:
+            file.write(lane.to_bytes(byte_count, "little"))
+
+
+def iter_bitset_chunks(
+    file: BinaryIO,
+) -> Iterator[tuple[list[PinId], int, list[int]]]:
+    """
+    Read a bitset file written by export_truth_table_bitset chunk by chunk.
+    Yields the output pins, the number of rows in the chunk and one packed int per output pin.
+    """
+    if file.read(len(BITSET_MAGIC)) != BITSET_MAGIC:
+        raise Exception("Not a truth table bitset file.")
+
+    input_count, output_count, chunk_rows, names_length = struct.unpack(
+        "<IIII", file.read(16)
+    )
+    names = file.read(names_length).decode()
+    output_pins = [PinId(pin) for pin in names.split("\n")] if output_count else []
+
+    byte_count = (chunk_rows + 7) // 8
+    for _ in range((1 << input_count) // chunk_rows):
+        output_lanes = [
+            int.from_bytes(file.read(byte_count), "little") for _ in output_pins
+        ]
+        yield output_pins, chunk_rows, output_lanes
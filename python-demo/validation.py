@@ -0,0 +1,440 @@
+"""
+Structural checks of a schematic, run over its connection table in O(V + E).
+
+Without the schematics of its parts a schematic can still be checked for wires to
+undeclared components and pins, multiply driven and undriven output pins, combinational loops
+and unused components. Given a way to look the parts up, the part types, the pins wired on
+each part and the drivers of every part input pin are checked too.
+
+Feedback through a DFF register is not a combinational loop. A loop through parts that may
+hold registers of their own is only reported once the parts can be looked up.
+"""
+from __future__ import annotations
+
+from schematic_types import *
+from connection_table import BOUNDARY, INPUT_NAME, OUTPUT_NAME
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Collection, Iterable
+
+if TYPE_CHECKING:
+    from schematic import Schematic
+
+# The kinds of issue found by validate_schematic.
+UNKNOWN_COMPONENT = "unknown component"
+UNKNOWN_PART = "unknown part"
+UNKNOWN_PIN = "unknown pin"
+UNDRIVEN_PIN = "undriven pin"
+MULTIPLY_DRIVEN_PIN = "multiply driven pin"
+COMBINATIONAL_LOOP = "combinational loop"
+RECURSIVE_PART = "recursive part"
+UNUSED_COMPONENT = "unused component"
+
+# Kinds of issue that do not stop a schematic from being simulated.
+WARNING_KINDS = {UNUSED_COMPONENT}
+
+# The output pins of the hardcoded parts that only change on a clock cycle.
+PRIMITIVE_REGISTERED_PINS = {
+    SchematicId("NAND"): frozenset(),
+    SchematicId("DFF"): frozenset([PinId("q")]),
+}
+
+
+@dataclass
+class ValidationIssue:
+    """
+    A problem found in a schematic and the location of a wire involved in it, if known.
+    """
+
+    kind: str
+    message: str
+    location: SourceLocation | None = None
+
+    @property
+    def is_error(self) -> bool:
+        return self.kind not in WARNING_KINDS
+
+    def __str__(self) -> str:
+        if self.location is None:
+            return f"{self.kind}: {self.message}"
+        return f"{self.location}: {self.kind}: {self.message}"
+
+
+class SchematicValidationError(Exception):
+    """
+    Every error found in a schematic, reported together.
+    """
+
+    def __init__(self, schematic_id: SchematicId, issues: list[ValidationIssue]):
+        super().__init__(
+            f"Schematic {schematic_id} is invalid:\n"
+            + "\n".join(f"    {issue}" for issue in issues)
+        )
+        self.schematic_id = schematic_id
+        self.issues = issues
+
+
+def find_strongly_connected_components(
+    successors: list[list[int]], roots: Iterable[int] | None = None
+) -> list[list[int]]:
+    """
+    Tarjan's algorithm over nodes 0..n-1, without recursion so deep graphs don't overflow the stack.
+    If roots are given, only the nodes reachable from them are visited.
+    """
+    node_count = len(successors)
+    indexes = [-1] * node_count
+    lowlinks = [0] * node_count
+    on_stack = [False] * node_count
+    stack: list[int] = []
+    components: list[list[int]] = []
+    next_index = 0
+
+    for root in range(node_count) if roots is None else roots:
+        if indexes[root] != -1:
+            continue
+
+        indexes[root] = lowlinks[root] = next_index
+        next_index += 1
+        stack.append(root)
+        on_stack[root] = True
+        # The nodes being visited, with the position of the next successor to look at.
+        work = [(root, 0)]
+
+        while work:
+            node, position = work[-1]
+            node_successors = successors[node]
+
+            if position < len(node_successors):
+                work[-1] = (node, position + 1)
+                successor = node_successors[position]
+                if indexes[successor] == -1:
+                    indexes[successor] = lowlinks[successor] = next_index
+                    next_index += 1
+                    stack.append(successor)
+                    on_stack[successor] = True
+                    work.append((successor, 0))
+                elif on_stack[successor] and indexes[successor] < lowlinks[node]:
+                    lowlinks[node] = indexes[successor]
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if lowlinks[node] < lowlinks[parent]:
+                    lowlinks[parent] = lowlinks[node]
+
+            if lowlinks[node] == indexes[node]:
+                component: list[int] = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+
+    return components
+
+
+def describe_components(names: list[str], limit: int = 8) -> str:
+    if len(names) <= limit:
+        return ", ".join(names)
+    return f"{', '.join(names[:limit])} and {len(names) - limit} more"
+
+
+def validate_schematic(
+    schematic: Schematic,
+    get_part: Callable[[SchematicId], Schematic | None] | None = None,
+    get_registered_pins: Callable[[Schematic], Collection[PinId]] | None = None,
+) -> list[ValidationIssue]:
+    """
+    Find every problem in a schematic in a single pass over its connections.
+    get_part looks up the schematic of a part type, or returns None for unknown types.
+    Without it the parts themselves are not checked.
+    get_registered_pins gives the output pins of a part that feedback may go through.
+
+    The common case of a valid schematic is checked a column at a time,
+    and the connections are only walked one by one to report the issues found.
+    """
+    table = schematic.connection_table
+    component_names = table.components.names
+    pin_names = table.pins.names
+    pin_count = len(pin_names)
+    component_count = len(component_names)
+
+    source_components = table.source_components
+    source_pins = table.source_pins
+    destination_components = table.destination_components
+    destination_pins = table.destination_pins
+
+    issues: list[ValidationIssue] = []
+
+    def wire_name(index: int) -> str:
+        source = source_components[index]
+        destination = destination_components[index]
+        return (
+            f"{component_names[source] if source != BOUNDARY else INPUT_NAME}"
+            f".{pin_names[source_pins[index]]} -> "
+            f"{component_names[destination] if destination != BOUNDARY else OUTPUT_NAME}"
+            f".{pin_names[destination_pins[index]]}"
+        )
+
+    # The first wire out of and into each component, built the first time a component is reported.
+    first_wires: list[dict[int, int]] = []
+
+    def component_location(component: int) -> SourceLocation | None:
+        if not first_wires:
+            for side_components in (source_components, destination_components):
+                first_wires.append(
+                    dict(zip(reversed(side_components), reversed(range(len(table)))))
+                )
+        indexes = [side[component] for side in first_wires if component in side]
+        return table.location(min(indexes)) if indexes else None
+
+    # Components referenced by wires but not declared in the parts.
+    declared = [False] * component_count
+    declared[BOUNDARY] = True
+    for name in schematic.components:
+        index = table.components.get(name)
+        if index is not None:
+            declared[index] = True
+    for component in range(1, component_count):
+        if not declared[component]:
+            issues.append(
+                ValidationIssue(
+                    UNKNOWN_COMPONENT,
+                    f"{component_names[component]} is wired but not declared as a part",
+                    component_location(component),
+                )
+            )
+
+    # The pins checked on each side of a wire are grouped by the type of the component.
+    # Type 0 is the schematic itself, type 1 is anything that cannot be checked
+    # and the remaining types are the schematics of the parts.
+    part_types: list[Schematic] = []
+    part_type_indexes: dict[SchematicId, int] = {}
+    component_types = [1] * component_count
+    component_types[BOUNDARY] = 0
+    if get_part is not None:
+        for name, part_type in schematic.components.items():
+            index = table.components.get(name)
+            type_index = part_type_indexes.get(part_type)
+            if type_index is None:
+                part = get_part(part_type)
+                if part is None:
+                    issues.append(
+                        ValidationIssue(
+                            UNKNOWN_PART,
+                            f"{name} has the unknown part type {part_type}",
+                            component_location(index) if index is not None else None,
+                        )
+                    )
+                    continue
+                type_index = len(part_types) + 2
+                part_types.append(part)
+                part_type_indexes[part_type] = type_index
+            if index is not None:
+                component_types[index] = type_index
+
+    # Pins that don't exist on the schematic or its parts.
+    source_pin_names = [schematic.input_pins, set()] + [
+        part.output_pins for part in part_types
+    ]
+    destination_pin_names = [schematic.output_pins, set()] + [
+        part.input_pins for part in part_types
+    ]
+    for side_components, side_pins, side_pin_names, reads in (
+        (source_components, source_pins, source_pin_names, True),
+        (destination_components, destination_pins, destination_pin_names, False),
+    ):
+        keys = {
+            component_types[component] * pin_count + pin
+            for component, pin in zip(side_components, side_pins)
+        }
+        unknown_keys = {
+            key
+            for key in keys
+            if key // pin_count != 1
+            and pin_names[key % pin_count] not in side_pin_names[key // pin_count]
+        }
+        if not unknown_keys:
+            continue
+
+        for index, (component, pin) in enumerate(zip(side_components, side_pins)):
+            if component_types[component] * pin_count + pin not in unknown_keys:
+                continue
+            if component == BOUNDARY:
+                message = (
+                    f"{wire_name(index)} reads the undeclared input pin {pin_names[pin]}"
+                    if reads
+                    else f"{wire_name(index)} drives the undeclared output pin {pin_names[pin]}"
+                )
+            else:
+                part = part_types[component_types[component] - 2]
+                message = (
+                    f"{wire_name(index)} {'reads' if reads else 'drives'} {pin_names[pin]}, "
+                    f"which is not an {'output' if reads else 'input'} pin of {part.schematic_id}"
+                )
+            issues.append(ValidationIssue(UNKNOWN_PIN, message, table.location(index)))
+
+    # Every input attachment point must be driven by exactly one wire.
+    driven_keys = [
+        component * pin_count + pin
+        for component, pin in zip(destination_components, destination_pins)
+    ]
+    driven = set(driven_keys)
+    if len(driven) != len(driven_keys):
+        drivers: dict[int, int] = {}
+        for index, key in enumerate(driven_keys):
+            driver = drivers.setdefault(key, index)
+            if driver != index:
+                issues.append(
+                    ValidationIssue(
+                        MULTIPLY_DRIVEN_PIN,
+                        f"{wire_name(index)} drives a pin already driven by {wire_name(driver)}",
+                        table.location(index),
+                    )
+                )
+
+    for pin in sorted(schematic.output_pins):
+        pin_index = table.pins.get(pin)
+        if pin_index is None or BOUNDARY * pin_count + pin_index not in driven:
+            issues.append(ValidationIssue(UNDRIVEN_PIN, f"output.{pin} is not driven"))
+
+    # The pin indexes of the input pins of each part type, None if no wire mentions the pin.
+    part_input_pins = [
+        [(pin, table.pins.get(pin)) for pin in sorted(part.input_pins)]
+        for part in part_types
+    ]
+    for component in range(1, component_count):
+        type_index = component_types[component]
+        if type_index < 2:
+            continue
+        for pin, pin_index in part_input_pins[type_index - 2]:
+            if pin_index is None or component * pin_count + pin_index not in driven:
+                issues.append(
+                    ValidationIssue(
+                        UNDRIVEN_PIN,
+                        f"{component_names[component]}.{pin} is not driven",
+                        component_location(component),
+                    )
+                )
+
+    # The output pins of each component that only change on a clock cycle, keyed like the drivers,
+    # and the components that may hold registers nobody can see yet.
+    registered_keys: set[int] = set()
+    opaque = [False] * component_count
+    for name, part_type in schematic.components.items():
+        component = table.components.get(name)
+        if component is None:
+            continue
+        registered_pins = PRIMITIVE_REGISTERED_PINS.get(part_type)
+        if registered_pins is None:
+            if component_types[component] < 2:
+                opaque[component] = True
+                continue
+            part = part_types[component_types[component] - 2]
+            registered_pins = (
+                get_registered_pins(part) if get_registered_pins is not None else ()
+            )
+        for pin in registered_pins:
+            pin_index = table.pins.get(pin)
+            if pin_index is not None:
+                registered_keys.add(component * pin_count + pin_index)
+
+    # The wires between components, and whether each component drives an output.
+    # Wires out of registered pins are left out of the loop check.
+    successors: list[list[int]] = [[] for _ in range(component_count)]
+    predecessors: list[list[int]] = [[] for _ in range(component_count)]
+    in_degrees = [0] * component_count
+    drives_output = [False] * component_count
+    for source, source_pin, destination in zip(
+        source_components, source_pins, destination_components
+    ):
+        if destination == BOUNDARY:
+            drives_output[source] = True
+        elif source != BOUNDARY:
+            predecessors[destination].append(source)
+            if (
+                not registered_keys
+                or source * pin_count + source_pin not in registered_keys
+            ):
+                successors[source].append(destination)
+                in_degrees[destination] += 1
+
+    # Order the components topologically. Whatever is left over is on or behind a loop.
+    order = [
+        component
+        for component in range(1, component_count)
+        if in_degrees[component] == 0
+    ]
+    for component in order:
+        for successor in successors[component]:
+            in_degrees[successor] -= 1
+            if in_degrees[successor] == 0:
+                order.append(successor)
+
+    if len(order) < component_count - 1:
+        # A strongly connected component of more than one part, or a part wired to itself, is a loop.
+        looped = [
+            component
+            for component in range(1, component_count)
+            if in_degrees[component] != 0
+        ]
+        for members in find_strongly_connected_components(successors, looped):
+            if len(members) == 1 and members[0] not in successors[members[0]]:
+                continue
+            if any(opaque[member] for member in members):
+                continue
+            members.sort()
+            issues.append(
+                ValidationIssue(
+                    COMBINATIONAL_LOOP,
+                    "the outputs of "
+                    + describe_components(
+                        [component_names[member] for member in members]
+                    )
+                    + " feed back into their own inputs",
+                    component_location(members[0]),
+                )
+            )
+        # Components on or behind a loop are already reported, the rest are still checked.
+        for member in looped:
+            drives_output[member] = True
+
+    # Components that no output of the schematic depends on, found walking back from the outputs.
+    used = drives_output
+    stack = [component for component in range(component_count) if used[component]]
+    while stack:
+        for predecessor in predecessors[stack.pop()]:
+            if not used[predecessor]:
+                used[predecessor] = True
+                stack.append(predecessor)
+
+    for component in range(1, component_count):
+        if declared[component] and not used[component]:
+            issues.append(
+                ValidationIssue(
+                    UNUSED_COMPONENT,
+                    f"{component_names[component]} does not drive any output",
+                    component_location(component),
+                )
+            )
+
+    return issues
+
+
+def check_schematic(
+    schematic: Schematic,
+    get_part: Callable[[SchematicId], Schematic | None] | None = None,
+    get_registered_pins: Callable[[Schematic], Collection[PinId]] | None = None,
+) -> list[ValidationIssue]:
+    """
+    Validate a schematic and raise a SchematicValidationError listing every error found.
+    Returns the warnings.
+    """
+    issues = validate_schematic(schematic, get_part, get_registered_pins)
+    errors = [issue for issue in issues if issue.is_error]
+    if errors:
+        raise SchematicValidationError(schematic.schematic_id, errors)
+    return [issue for issue in issues if not issue.is_error]